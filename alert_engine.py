@@ -0,0 +1,333 @@
+"""
+Rolling-Window Alert Engine
+- Server-side, per-brand / per-platform time series of mention counts (total, negative,
+  positive) in fixed time buckets held in a ring buffer: adding a batch and advancing the
+  clock are O(1) per platform, whatever the traffic.
+- Each closed bucket updates EWMA baselines of the negative ratio (mean + variance) and of
+  the volume per bucket, so spikes are judged against the brand's own recent history
+  instead of a ratio supplied by the caller.
+- Alerts are evaluated from the running sums as mentions arrive (latest bucket vs. EWMA
+  baseline, per platform and for the brand overall; negative ratio over the last hour).
+- State is checkpointed to a JSON file (tmp + rename) and reloaded on start, so a restart
+  keeps the baselines.
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger("alert_engine")
+
+ALERT_BUCKET_SECONDS = int(os.getenv("ALERT_BUCKET_SECONDS", 300))     # 5 min buckets
+ALERT_WINDOW_BUCKETS = int(os.getenv("ALERT_WINDOW_BUCKETS", 288))     # 24h of history
+ALERT_SHORT_BUCKETS = int(os.getenv("ALERT_SHORT_BUCKETS", 12))        # 1h window for the ratio alert
+ALERT_SPIKE_BUCKETS = int(os.getenv("ALERT_SPIKE_BUCKETS", 1))         # latest bucket(s) compared to baseline
+ALERT_EWMA_ALPHA = float(os.getenv("ALERT_EWMA_ALPHA", 0.1))
+ALERT_WARMUP_BUCKETS = int(os.getenv("ALERT_WARMUP_BUCKETS", 6))      # closed buckets before spikes fire
+ALERT_MIN_MENTIONS = int(os.getenv("ALERT_MIN_MENTIONS", os.getenv("NEG_ALERT_MIN_MENTIONS", 10)))
+ALERT_NEG_RATIO = float(os.getenv("ALERT_NEG_RATIO", os.getenv("NEG_ALERT_RATIO", 0.30)))
+ALERT_SPIKE_FOLD = float(os.getenv("ALERT_SPIKE_FOLD", 2.0))
+ALERT_SPIKE_Z = float(os.getenv("ALERT_SPIKE_Z", 3.0))
+ALERT_VOLUME_FOLD = float(os.getenv("ALERT_VOLUME_FOLD", 3.0))
+ALERT_STATE_PATH = os.getenv("ALERT_STATE_PATH", os.path.join("outputs", "alert_state.json"))
+ALERT_CHECKPOINT_SECONDS = float(os.getenv("ALERT_CHECKPOINT_SECONDS", 60))
+
+ALL_PLATFORMS = "_all"
+TOTAL, NEG, POS = 0, 1, 2
+
+
+class RollingSeries:
+    """Ring buffer of per-bucket counts with running window sums and EWMA baselines."""
+
+    def __init__(self, n_buckets: int = ALERT_WINDOW_BUCKETS, alpha: float = ALERT_EWMA_ALPHA):
+        self.n = n_buckets
+        self.alpha = alpha
+        self.buckets = np.zeros((n_buckets, 3), dtype=np.int64)
+        self.sums = np.zeros(3, dtype=np.int64)
+        self.head: Optional[int] = None  # absolute bucket number of the open bucket
+        self.closed = 0                  # buckets folded into the baselines
+        self.ratio_mean = 0.0
+        self.ratio_var = 0.0
+        self.ratio_seen = 0              # closed buckets that had mentions
+        self.volume_mean = 0.0
+
+    def _close(self, counts: np.ndarray) -> None:
+        a = self.alpha
+        total = int(counts[TOTAL])
+        self.volume_mean += a * (total - self.volume_mean)
+        if total > 0:
+            ratio = counts[NEG] / total
+            if self.ratio_seen == 0:
+                self.ratio_mean = float(ratio)
+            else:
+                diff = ratio - self.ratio_mean
+                self.ratio_mean += a * diff
+                self.ratio_var = (1 - a) * (self.ratio_var + a * diff * diff)
+            self.ratio_seen += 1
+        self.closed += 1
+
+    def advance(self, bucket: int) -> None:
+        """Move the open bucket forward to `bucket`, closing (and recycling) the ones passed."""
+        if self.head is None:
+            self.head = bucket
+            return
+        gap = bucket - self.head
+        if gap <= 0:
+            return
+        # only the first n passed buckets can hold data; the rest are empty closes
+        for _ in range(min(gap, self.n)):
+            slot = self.head % self.n
+            self._close(self.buckets[slot])
+            self.head += 1
+            nxt = self.head % self.n
+            self.sums -= self.buckets[nxt]
+            self.buckets[nxt] = 0
+        rest = gap - min(gap, self.n)
+        if rest:
+            self.volume_mean *= (1 - self.alpha) ** rest
+            self.closed += rest
+            self.head += rest
+
+    def add(self, counts: np.ndarray) -> None:
+        self.buckets[self.head % self.n] += counts
+        self.sums += counts
+
+    def recent(self, k: int) -> np.ndarray:
+        """Counts over the last k buckets, including the open one."""
+        k = min(k, self.n)
+        idx = (self.head - np.arange(k)) % self.n
+        return self.buckets[idx].sum(axis=0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "buckets": self.buckets.tolist(), "head": self.head, "closed": self.closed,
+            "ratio_mean": self.ratio_mean, "ratio_var": self.ratio_var, "ratio_seen": self.ratio_seen,
+            "volume_mean": self.volume_mean,
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any], n_buckets: int, alpha: float) -> "RollingSeries":
+        s = cls(n_buckets, alpha)
+        buckets = np.asarray(d.get("buckets") or [], dtype=np.int64).reshape(-1, 3)
+        if len(buckets) == n_buckets:  # window length changed -> keep baselines only
+            s.buckets = buckets
+            s.sums = buckets.sum(axis=0)
+        s.head = d.get("head")
+        s.closed = int(d.get("closed", 0))
+        s.ratio_mean = float(d.get("ratio_mean", 0.0))
+        s.ratio_var = float(d.get("ratio_var", 0.0))
+        s.ratio_seen = int(d.get("ratio_seen", 0))
+        s.volume_mean = float(d.get("volume_mean", 0.0))
+        return s
+
+
+class AlertEngine:
+    def __init__(self, bucket_seconds: int = ALERT_BUCKET_SECONDS, n_buckets: int = ALERT_WINDOW_BUCKETS,
+                 short_buckets: int = ALERT_SHORT_BUCKETS, spike_buckets: int = ALERT_SPIKE_BUCKETS, alpha: float = ALERT_EWMA_ALPHA,
+                 state_path: Optional[str] = ALERT_STATE_PATH,
+                 checkpoint_seconds: float = ALERT_CHECKPOINT_SECONDS):
+        self.bucket_seconds = bucket_seconds
+        self.n_buckets = n_buckets
+        self.short_buckets = min(short_buckets, n_buckets)
+        self.spike_buckets = max(1, min(spike_buckets, n_buckets))
+        self.alpha = alpha
+        self.state_path = state_path
+        self.checkpoint_seconds = checkpoint_seconds
+        self.brands: Dict[str, Dict[str, RollingSeries]] = {}
+        self._lock = threading.Lock()
+        self._last_checkpoint = time.time()
+        self._dirty = False
+        if state_path:
+            self.load()
+
+    # ---------- updates ----------
+    def _bucket(self, now: Optional[float]) -> int:
+        return int((time.time() if now is None else now) // self.bucket_seconds)
+
+    def _series(self, brand: str, platform: str) -> RollingSeries:
+        per_brand = self.brands.setdefault(brand, {})
+        s = per_brand.get(platform)
+        if s is None:
+            s = per_brand[platform] = RollingSeries(self.n_buckets, self.alpha)
+        return s
+
+    def observe(self, brand: Optional[str], platforms: Sequence[Optional[str]], labels: Sequence[str],
+                weights: Optional[Sequence[int]] = None, now: Optional[float] = None) -> None:
+        """
+        Add a batch of scored mentions (arrival time = `now`). Counts are grouped per
+        platform with NumPy, then each platform's open bucket is updated in O(1).
+        """
+        if len(labels) == 0:
+            return
+        labels = np.asarray(labels)
+        codes = np.full(len(labels), 1, dtype=np.int8)
+        codes[labels == "negative"] = 0
+        codes[labels == "positive"] = 2
+        names, inverse = np.unique(np.asarray([p or "unknown" for p in platforms], dtype=object),
+                                   return_inverse=True)
+        self.observe_codes(brand, inverse.reshape(-1), names.tolist(), codes, weights, now)
+
+    def observe_codes(self, brand: Optional[str], platform_codes: np.ndarray, platforms: Sequence[Optional[str]],
+                      label_codes: np.ndarray, weights: Optional[Sequence[int]] = None,
+                      now: Optional[float] = None) -> None:
+        """
+        observe() for columnar input (see mention_batch): platform_codes index into
+        `platforms`, label codes are 0 negative / 1 neutral / 2 positive.
+        """
+        if len(label_codes) == 0:
+            return
+        w = np.ones(len(label_codes), dtype=np.int64) if weights is None else np.asarray(weights, dtype=np.int64)
+        counts = np.stack([w, w * (label_codes == 0), w * (label_codes == 2)], axis=1)
+        per_code = np.zeros((len(platforms), 3), dtype=np.int64)
+        np.add.at(per_code, np.asarray(platform_codes, dtype=np.int64), counts)
+
+        # several codes can map to one series name (None and "unknown")
+        per_platform: Dict[str, np.ndarray] = {}
+        for name, c in zip(platforms, per_code):
+            if c[0]:
+                name = name or "unknown"
+                per_platform[name] = per_platform[name] + c if name in per_platform else c
+
+        bucket = self._bucket(now)
+        key = brand or ""
+        with self._lock:
+            for name, c in per_platform.items():
+                s = self._series(key, name)
+                s.advance(bucket)
+                s.add(c)
+            s = self._series(key, ALL_PLATFORMS)
+            s.advance(bucket)
+            s.add(per_code.sum(axis=0))
+            self._dirty = True
+        self.maybe_checkpoint()
+
+    # ---------- alerts ----------
+    def evaluate(self, brand: Optional[str], now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Alerts for the brand's recent buckets against its EWMA baselines."""
+        bucket = self._bucket(now)
+        alerts: List[Dict[str, Any]] = []
+        with self._lock:
+            for platform, s in sorted(self.brands.get(brand or "", {}).items()):
+                s.advance(bucket)
+                alerts.extend(self._check(platform, s))
+        return alerts
+
+    def _check(self, platform: str, s: RollingSeries) -> List[Dict[str, Any]]:
+        out: List[Dict[str, Any]] = []
+        scope = None if platform == ALL_PLATFORMS else platform
+        where = f" on {platform}" if scope else ""
+        window_minutes = self.short_buckets * self.bucket_seconds // 60
+        total, neg, _ = (int(v) for v in s.recent(self.short_buckets))
+        if scope is None and total >= ALERT_MIN_MENTIONS and neg / total >= ALERT_NEG_RATIO:
+            out.append({
+                "type": "rolling_negative_ratio",
+                "message": f"Negative ratio {neg / total:.2%} over the last {window_minutes} min ({total} mentions)",
+                "neg_ratio": neg / total, "total_mentions": total, "platform": scope,
+            })
+
+        # spikes: the latest bucket(s) against the EWMA of closed per-bucket values
+        total, neg, _ = (int(v) for v in s.recent(self.spike_buckets))
+        if total < ALERT_MIN_MENTIONS:
+            return out
+        ratio = neg / total
+        if s.ratio_seen >= ALERT_WARMUP_BUCKETS:
+            base = s.ratio_mean
+            fold = float("inf") if base == 0 and ratio > 0 else ratio / max(1e-6, base)
+            # sampling noise of the window ratio + observed bucket-to-bucket variance
+            sd = math.sqrt(s.ratio_var + max(base * (1 - base), 1e-6) / total)
+            z = (ratio - base) / sd
+            if fold >= ALERT_SPIKE_FOLD and z >= ALERT_SPIKE_Z and ratio >= 0.05:
+                out.append({
+                    "type": "negative_spike",
+                    "message": f"Negative mentions{where} spiked {fold:.2f}x vs baseline ({base:.2%} -> {ratio:.2%})",
+                    "fold_change": fold, "z_score": round(z, 2), "neg_ratio": ratio, "baseline_ratio": base,
+                    "platform": scope,
+                })
+
+        if s.closed >= ALERT_WARMUP_BUCKETS and s.volume_mean > 0:
+            rate = total / self.spike_buckets
+            if rate >= ALERT_VOLUME_FOLD * s.volume_mean:
+                out.append({
+                    "type": "volume_spike",
+                    "message": f"Mention volume{where} is {rate / s.volume_mean:.1f}x its baseline",
+                    "fold_change": rate / s.volume_mean, "total_mentions": total, "platform": scope,
+                })
+        return out
+
+    def snapshot(self, brand: Optional[str]) -> Dict[str, Any]:
+        """Current window counts and baselines per platform (for dashboards / debugging)."""
+        with self._lock:
+            out = {}
+            for platform, s in sorted(self.brands.get(brand or "", {}).items()):
+                total, neg, pos = (int(v) for v in s.recent(self.short_buckets))
+                out[platform] = {
+                    "window": {"total": total, "negative": neg, "positive": pos},
+                    "day": {"total": int(s.sums[TOTAL]), "negative": int(s.sums[NEG]), "positive": int(s.sums[POS])},
+                    "baseline_neg_ratio": round(s.ratio_mean, 4),
+                    "baseline_volume_per_bucket": round(s.volume_mean, 2),
+                    "closed_buckets": s.closed,
+                }
+            return out
+
+    # ---------- persistence ----------
+    def maybe_checkpoint(self) -> None:
+        if self.state_path and self._dirty and time.time() - self._last_checkpoint >= self.checkpoint_seconds:
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        if not self.state_path:
+            return
+        with self._lock:
+            state = {
+                "bucket_seconds": self.bucket_seconds,
+                "brands": {b: {p: s.to_dict() for p, s in per.items()} for b, per in self.brands.items()},
+            }
+            self._dirty = False
+            self._last_checkpoint = time.time()
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.state_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp, self.state_path)
+        except OSError as e:
+            logger.warning("Could not checkpoint alert state to %s: %s", self.state_path, e)
+
+    def load(self) -> None:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable alert state %s: %s", self.state_path, e)
+            return
+        if state.get("bucket_seconds") != self.bucket_seconds:
+            logger.warning("Alert state bucket size changed; starting with fresh baselines.")
+            return
+        with self._lock:
+            self.brands = {
+                b: {p: RollingSeries.from_dict(d, self.n_buckets, self.alpha) for p, d in per.items()}
+                for b, per in (state.get("brands") or {}).items()
+            }
+
+
+_engine: Optional[AlertEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_alert_engine() -> AlertEngine:
+    """Process-wide engine configured from the ALERT_* environment variables."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = AlertEngine()
+        return _engine
@@ -0,0 +1,512 @@
+"""
+Batch Sentiment Engine
+- Scores a whole list of texts with VADER rules in one pass instead of calling
+  SentimentIntensityAnalyzer.polarity_scores once per mention.
+- Token features (valence, booster, negation, caps) are looked up once per distinct
+  token and the valence/booster/negation rules are applied as NumPy array operations
+  over every token of the batch.
+- Mirrors nltk's VADER implementation (the one sentiment_agent.py scores with).
+Run: python batch_sentiment.py   (parity check against stock VADER + timing)
+"""
+
+import os
+import re
+import string
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# ---------------------------
+# VADER constants (same values as nltk.sentiment.vader.VaderConstants)
+# ---------------------------
+B_INCR = 0.293
+B_DECR = -0.293
+C_INCR = 0.733
+N_SCALAR = -0.74
+ALPHA = 15
+
+NEGATE = {
+    "aint", "arent", "cannot", "cant", "couldnt", "darent", "didnt", "doesnt",
+    "ain't", "aren't", "can't", "couldn't", "daren't", "didn't", "doesn't",
+    "dont", "hadnt", "hasnt", "havent", "isnt", "mightnt", "mustnt", "neither",
+    "don't", "hadn't", "hasn't", "haven't", "isn't", "mightn't", "mustn't",
+    "neednt", "needn't", "never", "none", "nope", "nor", "not", "nothing",
+    "nowhere", "oughtnt", "shant", "shouldnt", "uhuh", "wasnt", "werent",
+    "oughtn't", "shan't", "shouldn't", "uh-uh", "wasn't", "weren't", "without",
+    "wont", "wouldnt", "won't", "wouldn't", "rarely", "seldom", "despite",
+}
+
+BOOSTER_DICT = {
+    "absolutely": B_INCR, "amazingly": B_INCR, "awfully": B_INCR, "completely": B_INCR,
+    "considerably": B_INCR, "decidedly": B_INCR, "deeply": B_INCR, "effing": B_INCR,
+    "enormously": B_INCR, "entirely": B_INCR, "especially": B_INCR, "exceptionally": B_INCR,
+    "extremely": B_INCR, "fabulously": B_INCR, "flipping": B_INCR, "flippin": B_INCR,
+    "fricking": B_INCR, "frickin": B_INCR, "frigging": B_INCR, "friggin": B_INCR,
+    "fully": B_INCR, "fucking": B_INCR, "greatly": B_INCR, "hella": B_INCR,
+    "highly": B_INCR, "hugely": B_INCR, "incredibly": B_INCR, "intensely": B_INCR,
+    "majorly": B_INCR, "more": B_INCR, "most": B_INCR, "particularly": B_INCR,
+    "purely": B_INCR, "quite": B_INCR, "really": B_INCR, "remarkably": B_INCR,
+    "so": B_INCR, "substantially": B_INCR, "thoroughly": B_INCR, "totally": B_INCR,
+    "tremendously": B_INCR, "uber": B_INCR, "unbelievably": B_INCR, "unusually": B_INCR,
+    "utterly": B_INCR, "very": B_INCR,
+    "almost": B_DECR, "barely": B_DECR, "hardly": B_DECR, "just enough": B_DECR,
+    "kind of": B_DECR, "kinda": B_DECR, "kindof": B_DECR, "kind-of": B_DECR,
+    "less": B_DECR, "little": B_DECR, "marginally": B_DECR, "occasionally": B_DECR,
+    "partly": B_DECR, "scarcely": B_DECR, "slightly": B_DECR, "somewhat": B_DECR,
+    "sort of": B_DECR, "sorta": B_DECR, "sortof": B_DECR, "sort-of": B_DECR,
+}
+
+SPECIAL_CASE_IDIOMS = {
+    "the shit": 3, "the bomb": 3, "bad ass": 1.5, "yeah right": -2,
+    "cut the mustard": 2, "kiss of death": -1.5, "hand to mouth": -2,
+}
+
+PUNC_LIST = [".", "!", "?", ",", ";", ":", "-", "'", '"', "!!", "!!!", "??", "???",
+             "?!?", "!?!", "?!?!", "!?!?"]
+PUNC_SET = set(PUNC_LIST)
+PUNCT_CHARS = string.punctuation
+REGEX_REMOVE_PUNCTUATION = re.compile(f"[{re.escape(string.punctuation)}]")
+
+# Words that can take part in a multi-word idiom / booster; only tokens near one of
+# these need the (rare) scalar idiom check.
+IDIOM_WORDS = {w for phrase in list(SPECIAL_CASE_IDIOMS) + [k for k in BOOSTER_DICT if " " in k]
+               for w in phrase.split()}
+
+# Per-token feature columns (see _token_features)
+F_IN_LEX, F_VALENCE, F_UPPER, F_BOOSTER, F_IS_BOOSTER, F_NEGATED, F_LEAST, F_AT_VERY, \
+    F_KIND, F_OF, F_BUT, F_NEVER, F_SO_THIS, F_IDIOM = range(14)
+N_FEATURES = 14
+
+TOKEN_CACHE_MAX = int(os.getenv("SENTIMENT_TOKEN_CACHE_MAX", 200_000))
+
+
+# ---------------------------
+# Lexicon loading
+# ---------------------------
+NLTK_LEXICON = os.path.join("sentiment", "vader_lexicon.zip")
+
+
+def _nltk_data_dirs() -> List[str]:
+    """nltk's default data search path, without importing nltk (its import is slow)."""
+    import sys
+
+    dirs = [p for p in os.getenv("NLTK_DATA", "").split(os.pathsep) if p]
+    dirs.append(os.path.expanduser("~/nltk_data"))
+    for prefix in (sys.prefix, getattr(sys, "base_prefix", sys.prefix)):
+        dirs += [os.path.join(prefix, "nltk_data"), os.path.join(prefix, "share", "nltk_data"),
+                 os.path.join(prefix, "lib", "nltk_data")]
+    dirs += ["/usr/share/nltk_data", "/usr/local/share/nltk_data", "/usr/lib/nltk_data", "/usr/local/lib/nltk_data"]
+    return dirs
+
+
+def _read_nltk_lexicon() -> Optional[str]:
+    import zipfile
+
+    for directory in _nltk_data_dirs():
+        path = os.path.join(directory, NLTK_LEXICON)
+        if os.path.exists(path):
+            with zipfile.ZipFile(path) as zf:
+                return zf.read("vader_lexicon/vader_lexicon.txt").decode("utf-8")
+        unzipped = os.path.join(directory, "sentiment", "vader_lexicon", "vader_lexicon.txt")
+        if os.path.exists(unzipped):
+            with open(unzipped, encoding="utf-8") as f:
+                return f.read()
+    return None
+
+
+def load_vader_lexicon(use_artifact: bool = True) -> Dict[str, float]:
+    """
+    Load the VADER lexicon as {token: valence}.
+    Order: the prebuilt binary artifact (lexicon_artifact.py), nltk's vader_lexicon data (what
+    sentiment_agent scores with, read straight from the nltk_data zip), then the copy
+    bundled with the vaderSentiment package.
+    """
+    if use_artifact:
+        from lexicon_artifact import load_artifact
+
+        lexicon = load_artifact()
+        if lexicon:
+            return lexicon
+
+    raw = _read_nltk_lexicon()
+    if raw is None:
+        try:
+            from vaderSentiment import vaderSentiment as vs
+            path = os.path.join(os.path.dirname(vs.__file__), "vader_lexicon.txt")
+            with open(path, encoding="utf-8") as f:
+                raw = f.read()
+        except ImportError:
+            raise RuntimeError(
+                "VADER lexicon not found: build the artifact (python lexicon_artifact.py build), "
+                "install nltk's vader_lexicon data or the vaderSentiment package."
+            )
+
+    lexicon: Dict[str, float] = {}
+    for line in raw.split("\n"):
+        parts = line.strip().split("\t")
+        if len(parts) >= 2:
+            lexicon[parts[0]] = float(parts[1])
+    return lexicon
+
+
+def label_compound(compound: np.ndarray, threshold: float = 0.05, inclusive: bool = True) -> np.ndarray:
+    """
+    Map compound scores to positive / negative / neutral labels.
+    inclusive=True matches sentiment_agent (>= / <=), False matches the monitoring agent (> / <).
+    """
+    compound = np.asarray(compound, dtype=np.float64)
+    if inclusive:
+        pos_mask, neg_mask = compound >= threshold, compound <= -threshold
+    else:
+        pos_mask, neg_mask = compound > threshold, compound < -threshold
+    return np.where(pos_mask, "positive", np.where(neg_mask, "negative", "neutral")).astype(object)
+
+
+def _round(values: np.ndarray, ndigits: int) -> np.ndarray:
+    # Python's round() (exact decimal rounding) so results match polarity_scores bit for bit;
+    # np.round scales by 10**n first and can land on the other side of a .5 boundary.
+    return np.array([round(x, ndigits) for x in values.tolist()], dtype=np.float64)
+
+
+# ---------------------------
+# Engine
+# ---------------------------
+class BatchSentimentEngine:
+    """
+    Vectorized VADER scorer. Build once (lexicon is compiled into a per-token feature cache)
+    and call score_texts() with any number of texts.
+    """
+
+    def __init__(self, lexicon: Dict[str, float]):
+        self.lexicon = lexicon
+        self._token_cache: Dict[str, tuple] = {}
+
+    # -- tokenization (identical output to nltk's SentiText.words_and_emoticons) --
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        words_only = {w for w in REGEX_REMOVE_PUNCTUATION.sub("", text).split() if len(w) > 1}
+        tokens = []
+        for we in text.split():
+            if len(we) <= 1:
+                continue
+            if we[0] not in PUNCT_CHARS:
+                core = we.rstrip(PUNCT_CHARS)
+                if core != we and we[len(core):] in PUNC_SET and core in words_only:
+                    we = core
+            else:
+                core = we.lstrip(PUNCT_CHARS)
+                if core and we[:len(we) - len(core)] in PUNC_SET and core in words_only:
+                    we = core
+            tokens.append(we)
+        return tokens
+
+    def _token_features(self, token: str) -> tuple:
+        feats = self._token_cache.get(token)
+        if feats is not None:
+            return feats
+        lower = token.lower()
+        in_lex = lower in self.lexicon
+        feats = (
+            in_lex,
+            self.lexicon[lower] if in_lex else 0.0,
+            token.isupper(),
+            BOOSTER_DICT.get(lower, 0.0),
+            lower in BOOSTER_DICT,
+            lower in NEGATE or "n't" in lower,
+            lower == "least",
+            lower == "at" or lower == "very",
+            lower == "kind",
+            lower == "of",
+            lower == "but",
+            token == "never",
+            token == "so" or token == "this",
+            token in IDIOM_WORDS,
+        )
+        if len(self._token_cache) >= TOKEN_CACHE_MAX:
+            self._token_cache.clear()
+        self._token_cache[token] = feats
+        return feats
+
+    @staticmethod
+    def _idioms_check(valence: float, words: List[str], i: int) -> float:
+        """Scalar port of nltk's _idioms_check; only run where an idiom word is nearby."""
+        onezero = f"{words[i - 1]} {words[i]}"
+        twoonezero = f"{words[i - 2]} {words[i - 1]} {words[i]}"
+        twoone = f"{words[i - 2]} {words[i - 1]}"
+        threetwoone = f"{words[i - 3]} {words[i - 2]} {words[i - 1]}"
+        threetwo = f"{words[i - 3]} {words[i - 2]}"
+        for seq in (onezero, twoonezero, twoone, threetwoone, threetwo):
+            if seq in SPECIAL_CASE_IDIOMS:
+                valence = SPECIAL_CASE_IDIOMS[seq]
+                break
+        if len(words) - 1 > i:
+            zeroone = f"{words[i]} {words[i + 1]}"
+            if zeroone in SPECIAL_CASE_IDIOMS:
+                valence = SPECIAL_CASE_IDIOMS[zeroone]
+        if len(words) - 1 > i + 1:
+            zeroonetwo = f"{words[i]} {words[i + 1]} {words[i + 2]}"
+            if zeroonetwo in SPECIAL_CASE_IDIOMS:
+                valence = SPECIAL_CASE_IDIOMS[zeroonetwo]
+        if threetwo in BOOSTER_DICT or twoone in BOOSTER_DICT:
+            valence = valence + B_DECR
+        return valence
+
+    def score_texts(self, texts: Sequence[str]) -> Dict[str, np.ndarray]:
+        """
+        Score every text in one pass.
+        Returns {"neg", "neu", "pos", "compound"} float arrays and a "label" object array,
+        all aligned with `texts`.
+        """
+        n_docs = len(texts)
+        doc_tokens: List[List[str]] = []
+        feat_rows: List[tuple] = []
+        ctx_rel: List[int] = []
+        lengths = np.zeros(n_docs, dtype=np.int64)
+        ep_count = np.zeros(n_docs, dtype=np.float64)
+        qm_count = np.zeros(n_docs, dtype=np.float64)
+
+        # 1) tokenize + feature lookup (the only per-token Python work)
+        for d, text in enumerate(texts):
+            if not isinstance(text, str):
+                text = str(text.encode("utf-8"))
+            tokens = self.tokenize(text)
+            doc_tokens.append(tokens)
+            lengths[d] = len(tokens)
+            ep_count[d] = text.count("!")
+            qm_count[d] = text.count("?")
+            # nltk resolves context from the *first* occurrence of a repeated token
+            first_index: Dict[str, int] = {}
+            for idx, tok in enumerate(tokens):
+                ctx_rel.append(first_index.setdefault(tok, idx))
+                feat_rows.append(self._token_features(tok))
+
+        n_tokens = len(feat_rows)
+        empty = np.zeros(n_docs, dtype=np.float64)
+        if n_tokens == 0:
+            return {"neg": empty, "neu": empty.copy(), "pos": empty.copy(), "compound": empty.copy(),
+                    "label": label_compound(empty)}
+
+        F = np.array(feat_rows, dtype=np.float64).reshape(n_tokens, N_FEATURES)
+        in_lex = F[:, F_IN_LEX].astype(bool)
+        upper = F[:, F_UPPER].astype(bool)
+        is_booster = F[:, F_IS_BOOSTER].astype(bool)
+        negated = F[:, F_NEGATED].astype(bool)
+        never = F[:, F_NEVER].astype(bool)
+        so_this = F[:, F_SO_THIS].astype(bool)
+
+        doc = np.repeat(np.arange(n_docs), lengths)
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        pos = np.arange(n_tokens) - starts[doc]
+        ctx = np.asarray(ctx_rel, dtype=np.int64)
+        g = starts[doc] + ctx  # global index of the context token
+        doc_len = lengths[doc]
+
+        # allcap_differential: some but not all tokens are ALL CAPS
+        n_upper = np.bincount(doc, weights=upper, minlength=n_docs)
+        cap_diff_doc = (n_upper > 0) & (n_upper < lengths)
+        cap_diff = cap_diff_doc[doc]
+
+        def prev(k):
+            """(valid mask, clipped index) for the token k places before the context token."""
+            return ctx >= k, np.maximum(g - k, 0)
+
+        # 2) boosters and "kind of" are skipped (valence 0)
+        has_next = ctx + 1 < doc_len
+        next_idx = np.minimum(g + 1, n_tokens - 1)
+        kind_of = F[:, F_KIND].astype(bool) & has_next & F[next_idx, F_OF].astype(bool)
+        active = in_lex & ~is_booster & ~kind_of
+
+        v = np.where(active, F[:, F_VALENCE], 0.0)
+        cap_bump = upper & cap_diff & active
+        v = np.where(cap_bump, np.where(v > 0, v + C_INCR, v - C_INCR), v)
+
+        # 3) preceding 1..3 tokens: booster scalar then negation ("never" checks)
+        idiom_rows = np.zeros(n_tokens, dtype=bool)
+        for start_i, decay in ((0, 1.0), (1, 0.95), (2, 0.9)):
+            _, w = prev(start_i + 1)
+            cond = active & (ctx > start_i) & ~in_lex[w]
+            s = np.where(v < 0, -F[w, F_BOOSTER], F[w, F_BOOSTER])
+            s = np.where(is_booster[w] & upper[w] & cap_diff,
+                         np.where(v > 0, s + C_INCR, s - C_INCR), s)
+            v = np.where(cond, v + s * decay, v)
+
+            if start_i == 0:
+                v = np.where(cond & negated[w], v * N_SCALAR, v)
+            elif start_i == 1:
+                _, w1 = prev(1)
+                boost = never[w] & so_this[w1]
+                v = np.where(cond & boost, v * 1.5, np.where(cond & ~boost & negated[w], v * N_SCALAR, v))
+            else:
+                _, w1 = prev(1)
+                _, w2 = prev(2)
+                boost = (never[w] & so_this[w2]) | so_this[w1]
+                v = np.where(cond & boost, v * 1.25, np.where(cond & ~boost & negated[w], v * N_SCALAR, v))
+                near = np.zeros(n_tokens, dtype=bool)
+                for off in (-3, -2, -1, 0, 1, 2):
+                    idx = g + off
+                    inside = (ctx + off >= 0) & (ctx + off < doc_len)
+                    near |= inside & F[np.clip(idx, 0, n_tokens - 1), F_IDIOM].astype(bool)
+                idiom_rows = cond & near
+
+        # rare path: multi-word idioms, evaluated with the scalar rule
+        for t in np.flatnonzero(idiom_rows):
+            v[t] = self._idioms_check(v[t], doc_tokens[doc[t]], int(ctx[t]))
+
+        # 4) "least" check
+        ok1, w1 = prev(1)
+        ok2, w2 = prev(2)
+        least_prev = active & ok1 & ~in_lex[w1] & F[w1, F_LEAST].astype(bool)
+        at_very = ok2 & F[w2, F_AT_VERY].astype(bool)
+        v = np.where(least_prev & ~(ok2 & at_very), v * N_SCALAR, v)
+
+        # 5) "but": damp everything before the first "but", amplify everything after
+        is_but = F[:, F_BUT].astype(bool)
+        but_pos = np.full(n_docs, np.iinfo(np.int64).max)
+        np.minimum.at(but_pos, doc[is_but], pos[is_but])
+        bi = but_pos[doc]
+        has_but = bi != np.iinfo(np.int64).max
+        v = np.where(has_but & (pos < bi), v * 0.5, np.where(has_but & (pos > bi), v * 1.5, v))
+
+        # 6) per-document aggregation (score_valence)
+        sum_s = np.bincount(doc, weights=v, minlength=n_docs)
+        ep_amp = np.minimum(ep_count, 4) * 0.292
+        qm_amp = np.where(qm_count > 1, np.where(qm_count <= 3, qm_count * 0.18, 0.96), 0.0)
+        amp = ep_amp + qm_amp
+        sum_s = np.where(sum_s > 0, sum_s + amp, np.where(sum_s < 0, sum_s - amp, sum_s))
+        compound = sum_s / np.sqrt(sum_s * sum_s + ALPHA)
+
+        pos_sum = np.bincount(doc, weights=np.where(v > 0, v + 1, 0.0), minlength=n_docs)
+        neg_sum = np.bincount(doc, weights=np.where(v < 0, v - 1, 0.0), minlength=n_docs)
+        neu_count = np.bincount(doc, weights=(v == 0), minlength=n_docs)
+        pos_sum = np.where(pos_sum > np.abs(neg_sum), pos_sum + amp, pos_sum)
+        neg_sum = np.where(pos_sum < np.abs(neg_sum), neg_sum - amp, neg_sum)
+        total = pos_sum + np.abs(neg_sum) + neu_count
+
+        has_tokens = lengths > 0
+        safe_total = np.where(has_tokens, total, 1.0)
+        compound = np.where(has_tokens, _round(compound, 4), 0.0)
+        result = {
+            "neg": np.where(has_tokens, _round(np.abs(neg_sum / safe_total), 3), 0.0),
+            "neu": np.where(has_tokens, _round(np.abs(neu_count / safe_total), 3), 0.0),
+            "pos": np.where(has_tokens, _round(np.abs(pos_sum / safe_total), 3), 0.0),
+            "compound": compound,
+        }
+        result["label"] = label_compound(compound)
+        return result
+
+
+_engine: Optional[BatchSentimentEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> BatchSentimentEngine:
+    """Process-wide shared engine (lexicon loaded on first use)."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = BatchSentimentEngine(load_vader_lexicon())
+    return _engine
+
+
+def concat_scores(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Stitch per-shard score dicts back together (in shard order)."""
+    if len(parts) == 1:
+        return parts[0]
+    return {key: np.concatenate([p[key] for p in parts]) for key in parts[0]}
+
+
+# ---------------------------
+# Process-pool scoring (opt-in, for very large batches)
+# ---------------------------
+def _init_worker() -> None:
+    # Load the lexicon once per worker so shards never pay for it.
+    get_engine()
+
+
+def _score_shard(texts: List[str]) -> Dict[str, np.ndarray]:
+    return get_engine().score_texts(texts)
+
+
+class ParallelScorer:
+    """
+    Shards a text list across a ProcessPoolExecutor whose workers each hold a pre-loaded
+    engine.
+    """
+
+    def __init__(self, workers: Optional[int] = None, shard_size: int = 5000):
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_size = max(1, shard_size)
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+
+    def warm_up(self) -> None:
+        """Start every worker now (and load its lexicon) instead of on the first request."""
+        list(self.executor.map(_score_shard, [["warm up"]] * self.workers))
+
+    def _shards(self, texts: Sequence[str]) -> List[List[str]]:
+        return [list(texts[i:i + self.shard_size]) for i in range(0, len(texts), self.shard_size)]
+
+    def score(self, texts: Sequence[str]) -> Dict[str, np.ndarray]:
+        if not texts:
+            return get_engine().score_texts([])
+        return concat_scores(list(self.executor.map(_score_shard, self._shards(texts))))
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+# ---------------------------
+# Local parity check + timing
+# ---------------------------
+if __name__ == "__main__":
+    import random
+    import time
+    from nltk.sentiment import SentimentIntensityAnalyzer
+
+    sia = SentimentIntensityAnalyzer()
+    engine = BatchSentimentEngine(dict(sia.lexicon))
+
+    samples = [
+        "Love the new update — great work!",
+        "Delayed delivery, very upset",
+        "Product is okay, nothing special.",
+        "Really bad experience, broken on arrival.",
+        "Amazing battery life!",
+        "The autopilot is NOT good, but the battery is GREAT!!!",
+        "I am not very happy with this, it is kind of bad at least",
+        "This car is the bomb, never so happy",
+        "yeah right, customer support is the shit... NOT",
+        "It barely works and support was hardly helpful???",
+        "good good good bad bad not good",
+        "",
+        "!!!",
+        ":) :( lol",
+        "Can't believe how AWESOME the new FSD beta is",
+        "At least it didn't catch fire, the least they could do",
+    ]
+    vocab = list(sia.lexicon)[:3000] + ["not", "very", "but", "never", "so", "kind of", "least",
+                                        "the", "car", "battery", "!", "?", "HAPPY", "BAD"]
+    rng = random.Random(7)
+    samples += [" ".join(rng.choice(vocab) for _ in range(rng.randint(1, 30))) for _ in range(3000)]
+
+    batch = engine.score_texts(samples)
+    mismatches = 0
+    for i, text in enumerate(samples):
+        ref = sia.polarity_scores(text)
+        for key in ("neg", "neu", "pos", "compound"):
+            if ref[key] != batch[key][i]:
+                mismatches += 1
+                print(f"MISMATCH {key}: {text!r} ref={ref[key]} batch={batch[key][i]}")
+                break
+    print(f"Parity: {len(samples) - mismatches}/{len(samples)} texts match stock VADER")
+
+    big = samples * 10
+    t0 = time.perf_counter()
+    for t in big:
+        sia.polarity_scores(t)
+    t1 = time.perf_counter()
+    engine.score_texts(big)
+    t2 = time.perf_counter()
+    print(f"{len(big)} texts: polarity_scores loop {t1 - t0:.2f}s, batch engine {t2 - t1:.2f}s")
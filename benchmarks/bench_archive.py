@@ -0,0 +1,87 @@
+"""
+Bulk-insert rate and search latency of the mention archive (mention_archive.py).
+- Fills a scratch SQLite database with seeded synthetic mentions spread over several
+  brands, then times typical drill-down queries: brand timeline, full-text within a brand,
+  full-text + sentiment, platform + date window, and a rare term. Each query is timed for
+  its first page and for a page deep in the keyset pagination.
+Run: python benchmarks/bench_archive.py --size 1000000 [--pages 100]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from mention_archive import MentionArchive  # noqa: E402
+from synthetic import generate_mentions  # noqa: E402
+
+BRANDS = ["Tesla", "Ford", "Rivian", "Lucid", "Polestar"]
+LABELS = ["negative", "neutral", "positive"]
+QUERIES = {
+    "brand timeline": dict(brand="Tesla"),
+    "brand + text": dict(brand="Tesla", query="battery"),
+    "brand + text + sentiment": dict(brand="Tesla", query="battery", sentiment="negative"),
+    "platform + window": dict(brand="Ford", platforms=["reddit"], start="2025-01-20"),
+    "rare term": dict(query="zeppelin"),
+}
+
+
+def make_rows(size, seed, chunk=100_000):
+    """Rows in chunks (the corpus generator is the expensive part at millions of rows)."""
+    for start in range(0, size, chunk):
+        for i, m in enumerate(generate_mentions(min(chunk, size - start), seed=seed + start)):
+            n = start + i
+            yield dict(m, id=f"{m['id']}-{n}", url=f"{m['url']}/{n}", brand=BRANDS[n % len(BRANDS)],
+                       date=m["created_at"], sentiment=LABELS[n % 3], sentiment_score=0.0)
+
+
+def timed_pages(archive, query, pages):
+    first = last = 0.0
+    cursor, visited = None, 0
+    for _ in range(pages):
+        t0 = time.perf_counter()
+        page = archive.search(**query, limit=50, cursor=cursor)
+        elapsed = time.perf_counter() - t0
+        first = first or elapsed
+        last = elapsed
+        visited += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    return first, last, visited
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mention archive benchmark")
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--pages", type=int, default=100, help="pages walked per query (last one is reported)")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        archive = MentionArchive(os.path.join(scratch, "archive.db"))
+        t0 = time.perf_counter()
+        inserted = archive.add_rows(make_rows(args.size, args.seed), "bench")
+        seconds = time.perf_counter() - t0
+        archive.optimize()
+        size_mb = os.path.getsize(os.path.join(scratch, "archive.db")) / 1e6
+        print(f"inserted {inserted:,} rows in {seconds:.1f}s ({inserted / seconds:,.0f} rows/s), {size_mb:.0f} MB")
+
+        print(f"{'query':<28}{'first page ms':>15}{'page N ms':>12}{'N':>6}")
+        for name, query in QUERIES.items():
+            runs = [timed_pages(archive, query, args.pages) for _ in range(args.repeats)]
+            first = statistics.median(r[0] for r in runs) * 1000
+            last = statistics.median(r[1] for r in runs) * 1000
+            print(f"{name:<28}{first:>15.2f}{last:>12.2f}{runs[0][2]:>6}")
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Trending-keyword benchmark: per-request TfidfVectorizer refit vs. the streaming index.
+- Feeds the same sequence of synthetic batches through both paths and reports time per
+  batch and how many of the top-k keywords agree.
+Run: python benchmarks/bench_keyword_index.py --batches 20 --batch-size 5000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_index import KeywordIndex  # noqa: E402
+from sentiment_agent import extract_trending_keywords  # noqa: E402
+
+TOPICS = ["battery drain", "autopilot crash", "software update", "service center", "delivery delay",
+          "range anxiety", "charging network", "build quality", "customer support", "price cut"]
+FILLER = ["really", "new", "car", "today", "love", "hate", "terrible", "amazing", "week", "again",
+          "owners", "model", "issue", "fixed", "broken", "review", "drive", "road", "trip", "home"]
+
+
+def make_batch(rng: random.Random, size: int, hot: str):
+    texts = []
+    for _ in range(size):
+        words = [rng.choice(FILLER) for _ in range(rng.randint(6, 25))]
+        topic = hot if rng.random() < 0.3 else rng.choice(TOPICS)
+        words.insert(rng.randrange(len(words) + 1), topic)
+        texts.append(" ".join(words))
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batches", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    index = KeywordIndex()
+    refit_total = index_total = 0.0
+    print(f"{'batch':>5} {'refit ms':>9} {'index ms':>9} {'query us':>9} {'overlap':>8}")
+    for b in range(args.batches):
+        texts = make_batch(rng, args.batch_size, TOPICS[b % len(TOPICS)])
+
+        t0 = time.perf_counter()
+        refit = extract_trending_keywords(texts, top_k=args.top_k)
+        t1 = time.perf_counter()
+        index.update(texts)
+        t2 = time.perf_counter()
+        streamed = index.top_k(args.top_k)
+        t3 = time.perf_counter()
+
+        refit_total += t1 - t0
+        index_total += t2 - t1
+        overlap = len({k["keyword"] for k in refit} & {k["keyword"] for k in streamed})
+        print(f"{b:>5} {(t1 - t0) * 1000:9.1f} {(t2 - t1) * 1000:9.1f} {(t3 - t2) * 1e6:9.1f} "
+              f"{overlap:>5}/{args.top_k}")
+
+    print(f"total: refit {refit_total:.2f}s, index {index_total:.2f}s "
+          f"({refit_total / max(index_total, 1e-9):.1f}x); index memory {index.stats()['sketch_bytes'] / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Per-mention memory and allocations of the /process_batch pipeline representation.
+- "rows": the representation used before mention_batch - kept Mention list + stripped
+  texts, dict items for dedup, a pandas DataFrame of the scored rows and record dicts for
+  the draft candidates.
+- "columnar": the current path - MentionBatch (categorical codes, float32 scores, one UTF-8
+  text buffer) through sentiment_agent.dedup_mentions / score_mentions.
+Both validate the same raw records into Mention objects (as /process_stream does per chunk);
+the records are generated inside the traced window and released after the pipeline, so
+"bytes" is everything the representation keeps alive on its own. Scores come from
+precomputed arrays and dedup is off unless --dedup, so the numbers show the representation,
+not the engine or MinHash. Reported per mention: bytes still held afterwards, peak bytes
+(input records included), live allocated blocks afterwards (tracemalloc), and pipeline time.
+pandas >= 3 keeps string columns in Arrow buffers, which tracemalloc does not see; bytes
+held by the Arrow memory pool are added to "bytes" when pyarrow is installed.
+Run: python benchmarks/bench_mention_batch.py --sizes 1000 10000 100000 [--dedup]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+os.environ.setdefault("ALERT_STATE_PATH", "")
+os.environ.setdefault("REPUTATION_STATE_PATH", "")
+os.environ.setdefault("MENTION_ARCHIVE_DB", "")
+os.environ.setdefault("SENTIMENT_CACHE_DB", "")
+
+import numpy as np  # noqa: E402
+
+from synthetic import generate_mentions  # noqa: E402
+
+
+def arrow_bytes() -> int:
+    try:
+        import pyarrow
+    except ImportError:
+        return 0
+    return pyarrow.total_allocated_bytes()
+
+
+def precomputed(sent):
+    """score_fn returning (copies of) the first len(texts) precomputed scores."""
+    return lambda texts: {k: v[:len(texts)].copy() for k, v in sent.items()}
+
+
+def pipeline_rows(records, score_fn, dedup):
+    import pandas as pd
+    from dedup import dedup_items
+    from sentiment_agent import Mention
+
+    mentions = [Mention(**r) for r in records]
+    kept, texts = [], []
+    for m in mentions:
+        text = (m.text or "").strip()
+        if text:
+            kept.append(m)
+            texts.append(text)
+    sizes = None
+    if dedup:
+        items = [{"id": m.id, "url": (m.metadata or {}).get("url"), "text": t, "_idx": i}
+                 for i, (m, t) in enumerate(zip(kept, texts))]
+        reps = dedup_items(items)
+        idx = [r["_idx"] for r in reps]
+        kept, texts, sizes = [kept[i] for i in idx], [texts[i] for i in idx], [r["cluster_size"] for r in reps]
+    sent = score_fn(texts)
+    df = pd.DataFrame({
+        "id": [m.id for m in kept],
+        "platform": [m.platform for m in kept],
+        "author": [m.author for m in kept],
+        "created_at": [m.created_at for m in kept],
+        "text": texts,
+        "compound": sent["compound"],
+        "label": sent["label"],
+        "neg": sent["neg"],
+        "neu": sent["neu"],
+        "pos": sent["pos"],
+        "cluster_size": sizes if sizes is not None else np.ones(len(texts), dtype=np.int64),
+    })
+    counts = df["label"].value_counts().to_dict()
+    negatives = df[df["label"] == "negative"].head(10).to_dict(orient="records")
+    return df, counts, negatives
+
+
+def pipeline_columnar(records, score_fn, dedup):
+    from mention_batch import MentionBatch
+    from sentiment_agent import Mention, dedup_mentions, score_mentions
+
+    batch, texts = MentionBatch.from_mentions([Mention(**r) for r in records])
+    if dedup:
+        batch, texts = dedup_mentions(batch, texts)
+    score_mentions(batch, texts, score_fn=score_fn)
+    del texts
+    return batch, batch.label_counts(), batch.rows_with_label("negative", 10)
+
+
+def make_records(size, seed):
+    return [{k: m[k] for k in ("id", "platform", "author", "text", "created_at")}
+            for m in generate_mentions(size, seed=seed)]
+
+
+def measure(pipeline, size, seed, score_fn, dedup):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    arrow_before = arrow_bytes()
+    records = make_records(size, seed)
+    t0 = time.perf_counter()
+    held = pipeline(records, score_fn, dedup)
+    seconds = time.perf_counter() - t0
+    del records
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    current += arrow_bytes() - arrow_before
+    blocks = sum(s.count_diff for s in tracemalloc.take_snapshot().compare_to(before, "filename"))
+    tracemalloc.stop()
+    del held
+    n = size
+    return {"bytes": current / n, "peak": peak / n, "blocks": blocks / n, "seconds": seconds}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mention batch memory benchmark")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1_000, 10_000, 100_000])
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--dedup", action="store_true", help="include the dedup stage")
+    args = parser.parse_args()
+
+    import pandas  # noqa: F401  (import cost is not part of the measurement)
+    from batch_sentiment import get_engine
+
+    print(f"{'size':>8}  {'layout':<9}{'bytes/m':>10}{'peak/m':>10}{'blocks/m':>10}{'ms':>9}")
+    for size in args.sizes:
+        records = make_records(size, args.seed)
+        score_fn = precomputed(get_engine().score_texts([r["text"].strip() for r in records]))
+        for name, pipeline in (("rows", pipeline_rows), ("columnar", pipeline_columnar)):
+            pipeline(records[:100], score_fn, args.dedup)  # first-call imports outside the measurement
+            r = measure(pipeline, size, args.seed, score_fn, args.dedup)
+            print(f"{size:>8}  {name:<9}{r['bytes']:>10.1f}{r['peak']:>10.1f}{r['blocks']:>10.2f}"
+                  f"{r['seconds'] * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Scaling benchmark for process-pool sentiment scoring.
+- Scores the same synthetic batch with ParallelScorer at 1..N workers and reports
+  mentions/sec and speedup vs. the single-process engine.
+Run: python benchmarks/bench_parallel_scoring.py --mentions 200000 --max-workers 8
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_sentiment import ParallelScorer, get_engine  # noqa: E402
+
+WORDS = ["great", "terrible", "battery", "autopilot", "update", "not", "very", "love", "hate",
+         "delivery", "late", "support", "amazing", "broken", "but", "okay", "never", "so", "happy",
+         "car", "service", "refund", "the", "is", "was", "really", "bad", "good", "!", "??"]
+
+
+def make_texts(n: int, seed: int = 42):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 40))) for _ in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mentions", type=int, default=100_000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shard-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    texts = make_texts(args.mentions)
+
+    engine = get_engine()
+    t0 = time.perf_counter()
+    engine.score_texts(texts)
+    base = time.perf_counter() - t0
+    print(f"{'workers':>8} {'seconds':>9} {'mentions/s':>12} {'speedup':>8}")
+    print(f"{'inline':>8} {base:9.2f} {args.mentions / base:12.0f} {1.0:8.2f}")
+
+    for workers in range(1, args.max_workers + 1):
+        scorer = ParallelScorer(workers=workers, shard_size=args.shard_size)
+        scorer.warm_up()
+        t0 = time.perf_counter()
+        scorer.score(texts)
+        elapsed = time.perf_counter() - t0
+        scorer.shutdown()
+        print(f"{workers:>8} {elapsed:9.2f} {args.mentions / elapsed:12.0f} {base / elapsed:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+RSS parsing benchmark on large synthetic feeds.
+- "full": the previous path (decode text, rewrite xmlns, ET.fromstring, findall()[:limit]).
+- "stream": rss_stream.iter_rss_items over a byte stream with early cutoff.
+Reports time, bytes read and peak traced memory per feed size.
+Run: python benchmarks/bench_rss_parse.py --items 1000 10000 100000 --limit 10
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from typing import BinaryIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rss_stream import iter_rss_items  # noqa: E402
+
+
+class CountingReader:
+    """File-like wrapper that counts the bytes actually pulled from the stream."""
+
+    def __init__(self, raw: BinaryIO):
+        self.raw = raw
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.raw.read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+def make_feed(n_items: int) -> bytes:
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<rss version="2.0" xmlns="http://example.com/ns" xmlns:media="http://search.yahoo.com/mrss/">',
+             "<channel><title>Synthetic</title>"]
+    for i in range(n_items):
+        parts.append(
+            f"<item><title>Headline {i} about the brand battery and autopilot</title>"
+            f"<link>https://news.example.com/{i}</link><pubDate>Mon, 06 Oct 2025 10:{i % 60:02d}:00 GMT</pubDate>"
+            f"<description>{'Lorem ipsum dolor sit amet. ' * 8}</description>"
+            f'<source url="https://example.com">Outlet {i % 50}</source>'
+            f'<media:content url="https://img.example.com/{i}.jpg"/></item>'
+        )
+    parts.append("</channel></rss>")
+    return "".join(parts).encode("utf-8")
+
+
+def parse_full(payload: bytes, limit: int):
+    root = ET.fromstring(payload.decode("utf-8").replace("xmlns=", "ns="))
+    return [{"title": it.findtext("title"), "link": it.findtext("link")} for it in root.findall(".//item")[:limit]]
+
+
+def parse_stream(payload: bytes, limit: int):
+    reader = CountingReader(io.BytesIO(payload))
+    items = [{"title": it.get("title"), "link": it.get("link")} for it in iter_rss_items(reader, limit)]
+    return items, reader.bytes_read
+
+
+def measure(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn()
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return out, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'items':>8} {'feed MB':>8} | {'full ms':>8} {'full peak MB':>12} | "
+          f"{'stream ms':>9} {'read KB':>8} {'stream peak MB':>14}")
+    for n in args.items:
+        payload = make_feed(n)
+        full, t_full, m_full = measure(lambda: parse_full(payload, args.limit))
+        (stream, read), t_stream, m_stream = measure(lambda: parse_stream(payload, args.limit))
+        assert [x["title"] for x in full] == [x["title"] for x in stream]
+        print(f"{n:>8} {len(payload) / 1e6:8.1f} | {t_full * 1000:8.1f} {m_full / 1e6:12.1f} | "
+              f"{t_stream * 1000:9.2f} {read / 1e3:8.1f} {m_stream / 1e6:14.2f}")
+
+        # no cutoff, items consumed (not kept): parser memory stays flat
+        _, t_all, m_all = measure(lambda: sum(1 for _ in iter_rss_items(io.BytesIO(payload))))
+        print(f"{'':>8} {'':>8}   stream all items: {t_all * 1000:.1f} ms, peak {m_all / 1e6:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Response serialization cost of /process_batch (fast_json.py vs. FastAPI's default path).
+- Builds a process_batch-style payload with include_mentions (per-mention rows with a nested
+  scores dict, from a scored synthetic batch) and times:
+  - "fastapi": jsonable_encoder + JSONResponse rendering (what returning the dict costs),
+  - "fast_json": one fast_json.dumps pass (orjson when installed),
+  - "+gzip" / "+zstd": fast_json plus the negotiated compression (zstd if installed).
+- Also reports the time to build the rows column-wise (MentionBatch.score_rows) vs. per row.
+Run: python benchmarks/bench_serialization.py --sizes 1000 10000 100000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+import fast_json  # noqa: E402
+from batch_sentiment import get_engine  # noqa: E402
+from mention_batch import MentionBatch  # noqa: E402
+from sentiment_agent import Mention  # noqa: E402
+from synthetic import generate_mentions  # noqa: E402
+
+
+def scored_batch(size, seed):
+    mentions = [Mention(**{k: m[k] for k in ("id", "platform", "author", "text", "created_at")})
+                for m in generate_mentions(size, seed=seed)]
+    batch, texts = MentionBatch.from_mentions(mentions)
+    batch.set_scores(get_engine().score_texts(texts))
+    return batch
+
+
+def rows_per_row(batch):
+    out = []
+    for i in range(len(batch)):
+        row = batch.row(i)
+        out.append({"id": row["id"], "platform": row["platform"], "label": row["label"],
+                    "compound": row["compound"], "cluster_size": row["cluster_size"],
+                    "scores": {"neg": float(batch.neg[i]), "neu": float(batch.neu[i]),
+                               "pos": float(batch.pos[i]), "compound": row["compound"]}})
+    return out
+
+
+def timed(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response serialization benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    encoder = "orjson" if fast_json.orjson is not None else "json"
+    compressors = ["gzip"] + (["zstd"] if fast_json.zstandard is not None else [])
+    print(f"fast_json encoder: {encoder}; compression: {', '.join(compressors)}")
+    print(f"{'size':>8}  {'path':<16}{'median ms':>11}{'bytes':>13}")
+    for size in args.sizes:
+        batch = scored_batch(size, args.seed)
+        for name, build in (("rows per-row", lambda: rows_per_row(batch)), ("rows columnar", batch.score_rows)):
+            seconds, rows = timed(build, args.repeats)
+            print(f"{size:>8}  {name:<16}{seconds * 1000:>11.2f}{'':>13}")
+        payload = {"status": "ok", "data": {"summary": batch.label_counts(), "mentions": rows}}
+
+        cases = {
+            "fastapi": lambda: JSONResponse(jsonable_encoder(payload)).body,
+            "fast_json": lambda: fast_json.dumps(payload),
+        }
+        for encoding in compressors:
+            cases[f"fast_json+{encoding}"] = lambda e=encoding: fast_json.compress(fast_json.dumps(payload), e)
+        for name, fn in cases.items():
+            seconds, body = timed(fn, args.repeats)
+            print(f"{size:>8}  {name:<16}{seconds * 1000:>11.2f}{len(body):>13,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Cold-start benchmark for the sentiment agent.
+Each measurement runs in a fresh interpreter (nothing cached in sys.modules):
+- "import": import sentiment_agent (what uvicorn pays before serving /health).
+- "first_score": import + first analyze_sentiment call (lexicon load on first use).
+- "warm_up": import + the full background warm-up (what /ready waits for).
+- "lexicon_text" / "lexicon_artifact": load the VADER lexicon from nltk data vs. the binary artifact.
+Reports the median and max over --repeats runs.
+Run: python benchmarks/bench_startup.py --repeats 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = {
+    "import": "import sentiment_agent",
+    "first_score": "import sentiment_agent; sentiment_agent.analyze_sentiment('great product, awful support')",
+    "warm_up": "import sentiment_agent; sentiment_agent.warm_up(); assert sentiment_agent.readiness['ready']",
+    "lexicon_text": "import batch_sentiment; batch_sentiment.load_vader_lexicon(use_artifact=False)",
+    "lexicon_artifact": "import lexicon_artifact; assert lexicon_artifact.load_artifact()",
+}
+
+TIMER = "import time; _t0 = time.perf_counter()\n{code}\nprint(time.perf_counter() - _t0)"
+
+
+def run_case(code: str) -> float:
+    out = subprocess.run([sys.executable, "-c", TIMER.format(code=code)], cwd=ROOT, check=True,
+                         capture_output=True, text=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--cases", nargs="+", default=list(CASES), choices=list(CASES))
+    args = parser.parse_args()
+
+    if "lexicon_artifact" in args.cases:
+        sys.path.insert(0, ROOT)
+        import lexicon_artifact
+
+        if lexicon_artifact.load_artifact() is None:
+            subprocess.run([sys.executable, "lexicon_artifact.py", "build"], cwd=ROOT, check=True)
+
+    print(f"{'case':<18}{'median s':>10}{'max s':>10}")
+    for name in args.cases:
+        times = [run_case(CASES[name]) for _ in range(args.repeats)]
+        print(f"{name:<18}{statistics.median(times):>10.3f}{max(times):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
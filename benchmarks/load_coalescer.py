@@ -0,0 +1,118 @@
+"""
+Load test for /process_batch micro-batching (COALESCE_REQUESTS).
+- Starts the sentiment agent under uvicorn once per mode (coalescing off / on), waits for
+  /ready, then fires --requests small requests (--min..--max mentions each, seeded synthetic
+  mentions) from --concurrency client threads over keep-alive sessions.
+- Reports requests/s, mentions/s and client-side p50 / p99 latency per mode.
+Run: python benchmarks/load_coalescer.py --requests 3000 --concurrency 32 [--window-ms 5]
+"""
+
+import argparse
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic import generate_mentions  # noqa: E402
+
+FIELDS = ("id", "platform", "author", "text", "created_at")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def make_payloads(n, lo, hi, seed):
+    rng = random.Random(seed)
+    sizes = [rng.randint(lo, hi) for _ in range(n)]
+    pool = generate_mentions(sum(sizes), seed=seed)
+    payloads, start = [], 0
+    for size in sizes:
+        mentions = [{k: m[k] for k in FIELDS} for m in pool[start:start + size]]
+        payloads.append({"brand": rng.choice(["Tesla", "Ford", "Rivian"]), "mentions": mentions})
+        start += size
+    return payloads
+
+
+def start_server(port, env):
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "sentiment_agent:app", "--port", str(port),
+                             "--log-level", "warning", "--no-access-log"], cwd=ROOT, env=env)
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/ready", timeout=1).status_code == 200:
+                return proc
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("sentiment agent did not become ready")
+
+
+def run_load(url, payloads, concurrency):
+    local = threading.local()
+
+    def send(payload):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        t0 = time.perf_counter()
+        resp = session.post(url, json=payload, timeout=60)
+        resp.raise_for_status()
+        return time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(send, payloads))
+    return time.perf_counter() - t0, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="process_batch coalescing load test")
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--min", type=int, default=1, help="mentions per request (min)")
+    parser.add_argument("--max", type=int, default=20, help="mentions per request (max)")
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    payloads = make_payloads(args.requests, args.min, args.max, args.seed)
+    warm = payloads[:max(1, len(payloads) // 20)]
+    mentions = sum(len(p["mentions"]) for p in payloads)
+    base_env = dict(os.environ, REPUTATION_STATE_PATH="", ALERT_STATE_PATH="", SENTIMENT_CACHE_DB="",
+                    MENTION_ARCHIVE_DB="", COALESCE_WINDOW_MS=str(args.window_ms))
+
+    print(f"{args.requests} requests ({mentions} mentions), {args.concurrency} concurrent clients")
+    print(f"{'mode':<12}{'req/s':>10}{'mentions/s':>12}{'p50 ms':>10}{'p99 ms':>10}")
+    for mode, flag in (("sequential", "false"), ("coalesced", "true")):
+        port = free_port()
+        proc = start_server(port, dict(base_env, COALESCE_REQUESTS=flag))
+        try:
+            url = f"http://127.0.0.1:{port}/process_batch"
+            run_load(url, warm, args.concurrency)
+            seconds, latencies = run_load(url, payloads, args.concurrency)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"{mode:<12}{len(payloads) / seconds:>10,.0f}{mentions / seconds:>12,.0f}"
+              f"{statistics.median(latencies) * 1000:>10.1f}{p99 * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""
+Reproducible benchmark suite for the scoring / keyword / batch paths.
+- Corpora come from benchmarks/synthetic.py (seeded), so every run sees the same input.
+- Each (case, size) runs in a fresh interpreter in a scratch directory: peak RSS is that
+  case's own, module-level caches start empty, and nothing is written into the repo.
+  Imports and the lexicon are loaded before timing (sentiment_agent.warm_up).
+- Reports throughput (mentions/s at the median run), p50/p99 latency (per call for
+  analyze_sentiment, per run otherwise) and peak RSS; writes JSON that can be compared
+  against an earlier run with --baseline.
+Run: python benchmarks/run_suite.py --sizes 100 1000 10000 100000 --out results.json
+     python benchmarks/run_suite.py --baseline results.json --fail-on-regression
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+
+DEFAULT_SIZES = [100, 1_000, 10_000, 100_000]
+# isolate the benchmarked code from local state: no persisted caches, alerts, cursors or OpenAI calls
+WORKER_ENV = {
+    "SENTIMENT_CACHE_DB": "",
+    "ALERT_STATE_PATH": "",
+    "REPUTATION_STATE_PATH": "",
+    "MENTION_ARCHIVE_DB": "",
+    "OPENAI_API_KEY": "",
+    "OUTPUT_FORMAT": "csv",
+    "PARALLEL_SCORING": "false",
+    "MONITOR_INCREMENTAL": "false",  # every repeat re-scores the same corpus
+    "MONITOR_CURSOR_PATH": "",
+}
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# ---------- cases (run inside the worker) ----------
+# Each case: setup(mentions) -> state; run(state) -> optional per-call latencies.
+
+def case_analyze_sentiment(mentions):
+    import sentiment_agent as sa
+
+    texts = [m["text"] for m in mentions]
+
+    def run():
+        sa.sentiment_cache.clear()
+        laps = []
+        for text in texts:
+            t0 = time.perf_counter()
+            sa.analyze_sentiment(text)
+            laps.append(time.perf_counter() - t0)
+        return laps
+    return run
+
+
+def case_analyze_sentiment_batch(mentions):
+    import sentiment_agent as sa
+
+    texts = [m["text"] for m in mentions]
+
+    def run():
+        sa.sentiment_cache.clear()
+        sa.analyze_sentiment_batch(texts)
+    return run
+
+
+def case_extract_trending_keywords(mentions):
+    import sentiment_agent as sa
+
+    texts = [m["text"] for m in mentions]
+    return lambda: sa.extract_trending_keywords(texts)
+
+
+def case_keyword_index(mentions):
+    from keyword_index import KeywordIndex
+
+    texts = [m["text"] for m in mentions]
+
+    def run():
+        index = KeywordIndex()
+        index.update(texts)
+        index.top_k(10)
+    return run
+
+
+def case_process_batch(mentions):
+    import sentiment_agent as sa
+
+    payload = [{k: m[k] for k in ("id", "platform", "author", "text", "created_at")} for m in mentions]
+    req = sa.ProcessRequest(brand="Tesla", mentions=payload)
+    counter = iter(range(1 << 30))
+
+    def run():
+        sa.sentiment_cache.clear()
+        req.brand = f"Tesla-{next(counter)}"  # fresh keyword index / alert series each run
+        asyncio.run(sa.process_batch(req))
+    return run
+
+
+def case_monitor_score_write(mentions):
+    import monitoring_agent_v3 as mon
+
+    items = [dict(m, date=m["created_at"], sentiment_score=None, sentiment=None) for m in mentions]
+    sources = {"synthetic": lambda brand, keywords, days, limit: [dict(i) for i in items]}
+
+    def run():
+        mon.sentiment_cache.clear()
+        mon.run_monitor("Tesla", ["synthetic"], [], limit_per_platform=len(items), sources=sources)
+    return run
+
+
+def case_monitor_incremental(mentions):
+    import monitoring_agent_v3 as mon
+
+    # frequent polling: the feed returns everything again plus 1% fresh items per run
+    base = [dict(m, date=m["created_at"].replace("T", " "), sentiment_score=None, sentiment=None) for m in mentions]
+    fresh = base[:max(1, len(base) // 100)]
+    feed = {"items": base}
+    sources = {"synthetic": lambda brand, keywords, days, limit: [dict(i) for i in feed["items"]]}
+    poll = iter(range(1 << 30))
+    mon.run_monitor("Tesla", ["synthetic"], [], days=3650, limit_per_platform=len(base), sources=sources,
+                    incremental=True)  # first run primes the cursors (not timed)
+
+    def run():
+        k = next(poll)
+        feed["items"] = base + [dict(m, id=f"n{k}_{j}", url=f"https://new.example.com/{k}/{j}",
+                                     text=f"{m['text']} (update {k})", date="2025-02-01 00:00:00")
+                                for j, m in enumerate(fresh)]
+        mon.run_monitor("Tesla", ["synthetic"], [], days=3650, limit_per_platform=len(feed["items"]),
+                        sources=sources, incremental=True)
+    return run
+
+
+def brand_feed(mentions, brands=20, latency=0.05):
+    """
+    The corpus split over `brands` brands (brand name swapped into the text) and a source
+    answering plain or OR queries after `latency` seconds, like one HTTP round trip.
+    """
+    names = [f"Brand{i:02d}" for i in range(brands)]
+    per_brand = {b: [] for b in names}
+    for i, m in enumerate(mentions):
+        b = names[i % brands]
+        per_brand[b].append(dict(m, text=m["text"].replace("Tesla", b), date=m["created_at"].replace("T", " "),
+                                 url=f"https://{b.lower()}.example.com/{m['id']}"))
+
+    def source(brand, keywords, days, limit):
+        time.sleep(latency)
+        return [dict(i) for b in ([brand] if isinstance(brand, str) else brand) for i in per_brand[b]]
+    configs = [{"brand": b, "keywords": [], "platforms": ["synthetic"]} for b in names]
+    return configs, {"synthetic": source}, max(len(v) for v in per_brand.values())
+
+
+def case_monitor_per_brand(mentions):
+    import monitoring_agent_v3 as mon
+
+    configs, sources, limit = brand_feed(mentions)
+
+    def run():
+        mon.sentiment_cache.clear()
+        for c in configs:
+            mon.run_monitor(c["brand"], c["platforms"], c["keywords"], limit_per_platform=limit, sources=sources)
+    return run
+
+
+def case_monitor_multi_brand(mentions):
+    import monitoring_agent_v3 as mon
+    import multi_monitor
+
+    configs, sources, limit = brand_feed(mentions)
+
+    def run():
+        mon.sentiment_cache.clear()
+        multi_monitor.run_multi_monitor(configs, limit_per_brand=limit, sources=sources, mergeable={"synthetic"})
+    return run
+
+
+CASES: Dict[str, Callable] = {
+    "analyze_sentiment": case_analyze_sentiment,
+    "analyze_sentiment_batch": case_analyze_sentiment_batch,
+    "extract_trending_keywords": case_extract_trending_keywords,
+    "keyword_index": case_keyword_index,
+    "process_batch": case_process_batch,
+    "monitor_score_write": case_monitor_score_write,
+    "monitor_incremental": case_monitor_incremental,
+    "monitor_per_brand": case_monitor_per_brand,
+    "monitor_multi_brand": case_monitor_multi_brand,
+}
+PER_CALL_CASES = {"analyze_sentiment"}
+
+
+def run_worker(case: str, size: int, repeats: int, seed: int) -> Dict[str, Any]:
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, BENCH_DIR)
+    from synthetic import generate_mentions
+
+    import sentiment_agent
+
+    # lexicon and scikit-learn load before timing starts (same as after /ready)
+    sentiment_agent.warm_up()
+    mentions = generate_mentions(size, seed=seed)
+    run = CASES[case](mentions)
+    rss_setup = peak_rss_mb()
+
+    seconds, laps = [], []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        out = run()
+        seconds.append(time.perf_counter() - t0)
+        if case in PER_CALL_CASES and out:
+            laps.extend(out)
+
+    latencies = laps or seconds
+    median = statistics.median(seconds)
+    return {
+        "case": case,
+        "size": size,
+        "repeats": repeats,
+        "seconds": [round(s, 6) for s in seconds],
+        "median_seconds": round(median, 6),
+        "throughput": round(size / median, 2) if median > 0 else None,
+        "latency_unit": "call" if laps else "run",
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 4),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "setup_rss_mb": round(rss_setup, 1),
+    }
+
+
+# ---------- driver ----------
+def spawn(case: str, size: int, repeats: int, seed: int, scratch: str) -> Dict[str, Any]:
+    env = dict(os.environ, **WORKER_ENV)
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", case, str(size),
+           "--repeats", str(repeats), "--seed", str(seed)]
+    proc = subprocess.run(cmd, cwd=scratch, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"case": case, "size": size, "error": proc.stderr.strip().splitlines()[-1:] or ["failed"]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def environment(seed: int) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    import numpy
+
+    return {
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": seed,
+    }
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], threshold: float) -> List[Tuple]:
+    """(case, size, baseline_tp, current_tp, ratio, regressed) for every pair present in both."""
+    base = {(r["case"], r["size"]): r for r in baseline.get("results", []) if r.get("throughput")}
+    rows = []
+    for r in results:
+        b = base.get((r["case"], r["size"]))
+        if b is None or not r.get("throughput"):
+            continue
+        ratio = r["throughput"] / b["throughput"]
+        rows.append((r["case"], r["size"], b["throughput"], r["throughput"], ratio, ratio < 1 - threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite")
+    parser.add_argument("--cases", nargs="+", default=list(CASES), choices=list(CASES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--max-per-call", type=int, default=10_000,
+                        help="skip per-call cases above this size (they loop in Python)")
+    parser.add_argument("--out", default=os.path.join(BENCH_DIR, "results", "latest.json"))
+    parser.add_argument("--baseline", default=None, help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="throughput drop counted as regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--worker", nargs=2, metavar=("CASE", "SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker[0], int(args.worker[1]), args.repeats, args.seed)))
+        return
+
+    results = []
+    print(f"{'case':<28}{'size':>9}{'median s':>11}{'mentions/s':>13}{'p50 ms':>10}{'p99 ms':>10}{'RSS MB':>9}")
+    with tempfile.TemporaryDirectory(prefix="bench_") as scratch:
+        for case in args.cases:
+            for size in args.sizes:
+                if case in PER_CALL_CASES and size > args.max_per_call:
+                    continue
+                r = spawn(case, size, args.repeats, args.seed, scratch)
+                results.append(r)
+                if "error" in r:
+                    print(f"{case:<28}{size:>9}  ERROR {r['error'][0]}")
+                    continue
+                print(f"{case:<28}{size:>9}{r['median_seconds']:>11.4f}{r['throughput']:>13,.0f}"
+                      f"{r['p50_ms']:>10.3f}{r['p99_ms']:>10.3f}{r['peak_rss_mb']:>9.1f}")
+
+    report = {"environment": environment(args.seed), "results": results}
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.threshold)
+        print(f"\nvs. {args.baseline} (commit {baseline.get('environment', {}).get('git_commit')})")
+        print(f"{'case':<28}{'size':>9}{'baseline/s':>13}{'current/s':>13}{'ratio':>8}")
+        for case, size, b, c, ratio, regressed in rows:
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{case:<28}{size:>9}{b:>13,.0f}{c:>13,.0f}{ratio:>8.2f}{flag}")
+        if args.fail_on_regression and any(row[-1] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
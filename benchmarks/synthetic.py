@@ -0,0 +1,108 @@
+"""
+Seeded synthetic mention corpora for benchmarks.
+- Platform mix and text shapes follow what the collectors produce: short tweets with
+  handles / hashtags / emoji, news headlines with an outlet suffix, longer reddit posts.
+- Sentiment vocabulary includes the VADER features that cost time (negations, boosters,
+  "but", ALL CAPS, punctuation emphasis, idioms), and a share of mentions are retweets /
+  syndicated copies so dedup and the caches see realistic repetition.
+- The same (n, seed) always yields the same corpus.
+"""
+
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+PLATFORM_MIX = (("twitter", 0.55), ("news", 0.25), ("reddit", 0.20))
+DUPLICATE_RATE = 0.08  # retweets / syndicated headlines
+
+POSITIVE = ["great", "love", "amazing", "excellent", "happy", "smooth", "impressive", "best", "fantastic",
+            "reliable", "fast", "helpful", "recommend", "enjoying", "solid", "good"]
+NEGATIVE = ["terrible", "awful", "broken", "hate", "worst", "slow", "disappointed", "refund", "crash",
+            "useless", "angry", "scam", "delayed", "bug", "bad", "unacceptable"]
+NEUTRAL = ["update", "battery", "delivery", "support", "service", "app", "price", "model", "order",
+           "software", "feature", "charging", "range", "dealer", "recall", "launch", "review", "today",
+           "the", "a", "is", "was", "my", "new", "with", "after", "for", "this", "about", "on"]
+BOOSTERS = ["very", "really", "extremely", "so", "incredibly", "barely", "kind of", "hardly"]
+NEGATIONS = ["not", "never", "isn't", "don't", "wasn't", "no"]
+IDIOMS = ["the bomb", "cut the mustard", "yeah right", "kiss of death", "hand to mouth"]
+EMOJI = [":)", ":(", ":D", "<3", "🔥", "😡", "🙌", "💀"]
+OUTLETS = ["Reuters", "Bloomberg", "The Verge", "TechCrunch", "CNBC", "BBC News", "Electrek"]
+
+
+def _words(rng: random.Random, n: int, tone: float) -> List[str]:
+    out = []
+    for _ in range(n):
+        r = rng.random()
+        if r < 0.12:
+            out.append(rng.choice(POSITIVE if rng.random() < tone else NEGATIVE))
+        elif r < 0.16:
+            out.append(rng.choice(BOOSTERS))
+        elif r < 0.19:
+            out.append(rng.choice(NEGATIONS))
+        elif r < 0.20:
+            out.append("but")
+        else:
+            out.append(rng.choice(NEUTRAL))
+    if rng.random() < 0.05:
+        out.insert(rng.randrange(len(out) + 1), rng.choice(IDIOMS))
+    if out and rng.random() < 0.1:
+        i = rng.randrange(len(out))
+        out[i] = out[i].upper()
+    return out
+
+
+def _tweet(rng: random.Random, brand: str, tone: float) -> str:
+    words = _words(rng, rng.randint(6, 30), tone)
+    words.insert(rng.randrange(len(words) + 1), f"@{brand}")
+    if rng.random() < 0.5:
+        words.append(f"#{rng.choice(NEUTRAL)}")
+    if rng.random() < 0.3:
+        words.append(rng.choice(EMOJI))
+    return " ".join(words) + rng.choice(["", "", "!", "!!!", "?", "..."])
+
+
+def _headline(rng: random.Random, brand: str, tone: float) -> str:
+    words = _words(rng, rng.randint(6, 14), tone)
+    words.insert(rng.randrange(len(words) + 1), brand)
+    return " ".join(words).capitalize() + f" - {rng.choice(OUTLETS)}"
+
+
+def _post(rng: random.Random, brand: str, tone: float) -> str:
+    title = " ".join(_words(rng, rng.randint(4, 12), tone))
+    body = ". ".join(" ".join(_words(rng, rng.randint(8, 25), tone)) for _ in range(rng.randint(1, 6)))
+    return f"{title} {brand}. {body}."
+
+
+TEXT_MAKERS = {"twitter": _tweet, "news": _headline, "reddit": _post}
+
+
+def generate_mentions(n: int, seed: int = 1234, brand: str = "Tesla") -> List[Dict[str, Any]]:
+    """n mention dicts (id, platform, author, text, created_at, url, engagement)."""
+    rng = random.Random(seed)
+    platforms = [p for p, _ in PLATFORM_MIX]
+    weights = [w for _, w in PLATFORM_MIX]
+    start = datetime(2025, 1, 1)
+    out: List[Dict[str, Any]] = []
+    for i in range(n):
+        if out and rng.random() < DUPLICATE_RATE:
+            src = out[rng.randrange(len(out))]
+            text = src["text"] if src["platform"] != "twitter" else f"RT {src['text']}"
+            platform = src["platform"]
+        else:
+            platform = rng.choices(platforms, weights)[0]
+            tone = rng.betavariate(2, 2)  # per-mention mix of positive vs negative words
+            text = TEXT_MAKERS[platform](rng, brand, tone)
+        out.append({
+            "id": f"{platform[:2]}{i}",
+            "platform": platform,
+            "author": f"user{rng.randrange(max(10, n // 5))}",
+            "text": text,
+            "created_at": (start + timedelta(seconds=rng.randrange(30 * 86400))).isoformat(),
+            "url": f"https://{platform}.example.com/{i}",
+            "engagement": int(rng.paretovariate(1.2)) - 1,
+        })
+    return out
+
+
+def generate_texts(n: int, seed: int = 1234, brand: str = "Tesla") -> List[str]:
+    return [m["text"] for m in generate_mentions(n, seed, brand)]
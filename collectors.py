@@ -0,0 +1,525 @@
+"""
+Async Collectors
+- A source is a Collector whose stream(query) is an async generator yielding mention dicts
+  as they are read, or lists of them when a whole page arrives at once. Collectors raise on failure; timeouts, rate limits, error accounting and
+  partial results are handled once, in collect().
+- register_collector() adds a source; run_monitor / multi_monitor pick it up by name with
+  no other change. One instance per source per process, so clients (the pooled HTTP
+  session, praw.Reddit) are built once and reused across runs.
+- Blocking libraries (requests + streaming XML parse, snscrape, praw) run through
+  iterate_in_thread(): the iterator lives in a worker thread and hands items over a small
+  bounded queue, so a consumer that falls behind stops the reader instead of buffering.
+- collect() runs the requested collectors concurrently behind the shared per-source
+  limits (rate_limit), funnels their items into one bounded asyncio.Queue (COLLECT_QUEUE_SIZE)
+  and passes them in chunks to an optional on_chunk consumer (e.g. sentiment pre-scoring);
+  when that stage is slower than the sources the queue fills and the producers wait.
+- Time limits: one overall deadline for the whole collect() call, plus a per-source budget
+  that only counts the source's own fetching (not the rate-limit wait before it starts, nor
+  time spent blocked on the full queue while the consumer catches up).
+- A source that times out or fails midway keeps the items it delivered before that.
+"""
+
+import abc
+import asyncio
+import concurrent.futures
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import quote_plus
+
+from http_client import get_client
+from metrics import REGISTRY
+from rate_limit import get_limiter
+from rss_stream import iter_rss_items
+
+# Optional modules
+try:
+    import snscrape.modules.twitter as sntwitter
+except Exception:
+    sntwitter = None
+
+try:
+    import praw
+except Exception:
+    praw = None
+
+COLLECT_QUEUE_SIZE = int(os.getenv("COLLECT_QUEUE_SIZE", 1000))   # items/pages buffered between sources and consumer
+COLLECT_CHUNK_SIZE = int(os.getenv("COLLECT_CHUNK_SIZE", 256))     # min items per on_chunk call
+COLLECTOR_BUFFER = int(os.getenv("COLLECTOR_BUFFER", 64))          # items a blocking reader may run ahead
+
+FETCH_SECONDS = REGISTRY.histogram("monitor_source_fetch_seconds", "Collector run time per source", ["source", "status"])
+FETCH_ERRORS = REGISTRY.counter("monitor_source_errors_total", "Collector failures per source", ["source", "kind"])
+FETCH_ITEMS = REGISTRY.counter("monitor_source_items_total", "Items collected per source", ["source"])
+
+
+def now_str() -> str:
+    return datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+
+
+# Convert date safely
+def safe_date_str(value):
+    try:
+        if isinstance(value, datetime):
+            return value.strftime("%Y-%m-%d %H:%M:%S")
+        if isinstance(value, time.struct_time):
+            return datetime(*value[:6]).strftime("%Y-%m-%d %H:%M:%S")
+        if isinstance(value, (int, float)):
+            return datetime.fromtimestamp(value).strftime("%Y-%m-%d %H:%M:%S")
+        if isinstance(value, str):
+            try:
+                return datetime.fromisoformat(value.replace("Z", "+00:00")).strftime("%Y-%m-%d %H:%M:%S")
+            except Exception:
+                pass
+            try:
+                # RSS pubDate is RFC 822 ("Tue, 14 Oct 2026 10:00:00 GMT"); cursors compare in UTC
+                parsed = parsedate_to_datetime(value)
+                if parsed.tzinfo is not None:
+                    parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+                return parsed.strftime("%Y-%m-%d %H:%M:%S")
+            except Exception:
+                return value
+    except Exception:
+        return ""
+    return ""
+
+
+def brand_query(brand, quoted=False):
+    """Search term for one brand, or an OR group when several brands share one query."""
+    brands = [brand] if isinstance(brand, str) else list(brand)
+    if len(brands) == 1:
+        return f'"{brands[0]}"' if quoted else brands[0]
+    return "(" + " OR ".join(f'"{b}"' for b in brands) + ")"
+
+
+class CollectorQuery:
+    """What to fetch; brand may be a list for mergeable collectors (one OR query)."""
+    __slots__ = ("brand", "keywords", "days", "limit")
+
+    def __init__(self, brand, keywords: Sequence[str], days: int, limit: int):
+        self.brand = brand
+        self.keywords = list(keywords or [])
+        self.days = days
+        self.limit = limit
+
+
+class Collector(abc.ABC):
+    name = ""
+    mergeable = False  # accepts a list of brands as one OR query
+
+    def unavailable(self) -> Optional[str]:
+        """Why the collector cannot run here (missing library / credentials), or None."""
+        return None
+
+    @abc.abstractmethod
+    def stream(self, query: CollectorQuery) -> AsyncIterator[Any]:
+        """Async generator of item dicts (or lists of them, one page at a time) for the query."""
+
+
+async def iterate_in_thread(make_iter: Callable[[], Iterable], buffer: int = COLLECTOR_BUFFER) -> AsyncIterator[Any]:
+    """
+    Drive a blocking iterator in a worker thread, yielding its items on the event loop.
+    The thread waits while `buffer` items are pending; closing the generator stops it.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, buffer))
+    stop = threading.Event()
+    done = object()
+
+    def put(entry) -> bool:
+        while not stop.is_set():
+            try:
+                fut = asyncio.run_coroutine_threadsafe(queue.put(entry), loop)
+            except RuntimeError:  # loop closed
+                return False
+            try:
+                fut.result(timeout=0.5)
+                return True
+            except concurrent.futures.TimeoutError:
+                if not fut.cancel():  # completed while we gave up on it
+                    return True
+        return False
+
+    def run():
+        try:
+            for item in make_iter():
+                if not put((item, None)):
+                    return
+        except BaseException as e:
+            put((done, e))
+            return
+        put((done, None))
+
+    threading.Thread(target=run, name="collector-reader", daemon=True).start()
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+# ---------- Google News ----------
+class NewsCollector(Collector):
+    name = "news"
+    mergeable = True
+
+    def __init__(self):
+        self.http = get_client()
+        # Last parsed items per feed URL, reused when the feed answers 304 Not Modified.
+        self._last_items: Dict[str, List[Dict[str, Any]]] = {}
+
+    def _read(self, query: CollectorQuery) -> Iterator[Dict[str, Any]]:
+        q = quote_plus(f"{brand_query(query.brand)} {' '.join(query.keywords)}")
+        since = (datetime.utcnow() - timedelta(days=query.days)).strftime("%Y-%m-%d")
+        rss_url = f"https://news.google.com/rss/search?q={q}+after:{since}&hl=en-US&gl=US&ceid=US:en"
+        t0 = time.perf_counter()
+        resp = self.http.get(rss_url, conditional=rss_url in self._last_items, timeout=10, stream=True)
+        try:
+            if resp.status_code == 304:
+                print(f"[News] Feed unchanged (304) in {resp.elapsed.total_seconds():.2f}s — reusing last parse.")
+                collected_at = now_str()
+                for item in self._last_items[rss_url][:query.limit]:
+                    yield dict(item, collected_at=collected_at)
+                return
+            resp.raise_for_status()
+
+            # Parse straight off the socket and stop reading once `limit` items are in.
+            resp.raw.decode_content = True
+            results = []
+            for item in iter_rss_items(resp.raw, query.limit):
+                mention = {
+                    "platform": "news",
+                    "author": (item.get("source") or "Unknown").strip(),
+                    "text": (item.get("title") or "") + " " + (item.get("description") or ""),
+                    "date": safe_date_str(item.get("pubDate")),
+                    "url": item.get("link") or "",
+                    "engagement": 0,
+                    "brand": query.brand,
+                    "collected_at": now_str(),
+                }
+                results.append(mention)
+                yield mention
+        finally:
+            # drains a short leftover so the connection is reused, and records the bytes received
+            received = self.http.release(resp)
+        print(f"[News] Received {received} bytes, {len(results)} items in {time.perf_counter() - t0:.2f}s")
+        self._last_items[rss_url] = results
+
+    async def stream(self, query):
+        async for item in iterate_in_thread(lambda: self._read(query)):
+            yield item
+
+
+# ---------- Twitter (robust) ----------
+def _tweet_item(tweet, brand) -> Optional[Dict[str, Any]]:
+    # author
+    try:
+        user = getattr(tweet, "user", None)
+        author = getattr(user, "username", "") or getattr(user, "displayname", "") or ""
+    except Exception:
+        author = ""
+
+    # text/content
+    try:
+        content = getattr(tweet, "content", "") or getattr(tweet, "renderedContent", "") or ""
+    except Exception:
+        content = ""
+    if not content:
+        return None
+
+    try:
+        date_str = safe_date_str(getattr(tweet, "date", None))
+    except Exception:
+        date_str = ""
+
+    # url / tweet id
+    try:
+        tweet_id = getattr(tweet, "id", None) or getattr(tweet, "tweetId", None)
+        url = f"https://twitter.com/{author}/status/{tweet_id}" if tweet_id and author else getattr(tweet, "url", "") or ""
+    except Exception:
+        url = ""
+
+    # engagement counts (robustly handle missing fields / different names)
+    engagement = 0
+    for primary, fallback in (("likeCount", "likes"), ("retweetCount", "retweets"), ("replyCount", "replies")):
+        try:
+            engagement += int(getattr(tweet, primary, None) or getattr(tweet, fallback, 0) or 0)
+        except Exception:
+            pass
+
+    return {
+        "platform": "twitter",
+        "author": author or "unknown",
+        "text": content[:400],
+        "date": date_str or now_str(),
+        "url": url,
+        "engagement": engagement,
+        "brand": brand,
+        "collected_at": now_str(),
+    }
+
+
+class TwitterCollector(Collector):
+    name = "twitter"
+    mergeable = True
+
+    def unavailable(self):
+        return None if sntwitter is not None else "snscrape not available"
+
+    def _read(self, query: CollectorQuery) -> Iterator[Dict[str, Any]]:
+        since = (datetime.utcnow() - timedelta(days=query.days)).strftime("%Y-%m-%d")
+        # build query safely (avoid extra spaces when keywords empty)
+        kw_part = " ".join(k.strip() for k in query.keywords if k and k.strip())
+        search = " ".join(p for p in (brand_query(query.brand, quoted=True), kw_part, f"since:{since}") if p)
+        print(f"[Twitter] Query: {search}")
+        for i, tweet in enumerate(sntwitter.TwitterSearchScraper(search).get_items()):
+            if i >= query.limit:
+                break
+            item = _tweet_item(tweet, query.brand)
+            if item is not None:
+                yield item
+
+    async def stream(self, query):
+        async for item in iterate_in_thread(lambda: self._read(query)):
+            yield item
+
+
+# ---------- Reddit ----------
+class RedditCollector(Collector):
+    name = "reddit"
+    mergeable = True
+
+    def __init__(self):
+        self._client = None
+        self._lock = threading.Lock()
+
+    def unavailable(self):
+        if praw is None or not os.getenv("REDDIT_CLIENT_ID"):
+            return "missing credentials"
+        return None
+
+    @property
+    def client(self):
+        """One authenticated praw.Reddit per process (praw refreshes its own token)."""
+        with self._lock:
+            if self._client is None:
+                self._client = praw.Reddit(
+                    client_id=os.getenv("REDDIT_CLIENT_ID"),
+                    client_secret=os.getenv("REDDIT_CLIENT_SECRET"),
+                    user_agent=os.getenv("REDDIT_USER_AGENT", "monitoring-agent"),
+                )
+            return self._client
+
+    def _read(self, query: CollectorQuery) -> Iterator[Dict[str, Any]]:
+        search = f"{brand_query(query.brand)} {' OR '.join(query.keywords)}"
+        for post in self.client.subreddit("all").search(search, limit=query.limit):
+            yield {
+                "platform": "reddit",
+                "author": str(post.author),
+                "text": (post.title or "") + " " + (post.selftext[:300] or ""),
+                "date": datetime.fromtimestamp(post.created_utc).strftime("%Y-%m-%d %H:%M:%S"),
+                "url": f"https://www.reddit.com{post.permalink}",
+                "engagement": int(post.score),
+                "brand": query.brand,
+                "collected_at": now_str(),
+            }
+
+    async def stream(self, query):
+        async for item in iterate_in_thread(lambda: self._read(query)):
+            yield item
+
+
+class FunctionCollector(Collector):
+    """Adapter for a plain fn(brand, keywords, days, limit) -> list of items."""
+
+    def __init__(self, name: str, fn: Callable, mergeable: bool = False):
+        self.name = name
+        self.fn = fn
+        self.mergeable = mergeable
+
+    async def stream(self, query):
+        items = await asyncio.to_thread(self.fn, query.brand, query.keywords, query.days, query.limit)
+        if items:
+            yield list(items)
+
+
+# ---------- Registry ----------
+COLLECTORS: Dict[str, Callable[[], Collector]] = {}
+_instances: Dict[str, Collector] = {}
+_instances_lock = threading.Lock()
+
+
+def register_collector(name: str, factory: Callable[[], Collector]) -> None:
+    """Make `name` available to every orchestrator; the instance is created on first use."""
+    with _instances_lock:
+        COLLECTORS[name] = factory
+        _instances.pop(name, None)
+
+
+def get_collector(name: str) -> Collector:
+    """Process-wide instance of the registered collector `name`."""
+    with _instances_lock:
+        collector = _instances.get(name)
+        if collector is None:
+            collector = _instances[name] = COLLECTORS[name]()
+        return collector
+
+
+def mergeable_sources() -> set:
+    return {name for name in COLLECTORS if getattr(COLLECTORS[name], "mergeable", False)}
+
+
+register_collector("news", NewsCollector)
+register_collector("twitter", TwitterCollector)
+register_collector("reddit", RedditCollector)
+
+
+def as_collector(name: str, source=None) -> Collector:
+    """Registered collector for `name`, or `source` (Collector or plain function) wrapped as one."""
+    if source is None:
+        return get_collector(name)
+    if isinstance(source, Collector):
+        return source
+    return FunctionCollector(name, source)
+
+
+def fetch_items(name: str, brand, keywords, days, limit) -> List[Dict[str, Any]]:
+    """Blocking fn(brand, keywords, days, limit) over a registered collector (for thread pools)."""
+    collector = get_collector(name)
+    reason = collector.unavailable()
+    if reason:
+        print(f"[{name}] Skipping — {reason}.")
+        return []
+
+    async def drain():
+        items = []
+        async for entry in collector.stream(CollectorQuery(brand, keywords, days, limit)):
+            if isinstance(entry, list):
+                items.extend(entry)
+            else:
+                items.append(entry)
+        return items[:limit]
+    return asyncio.run(drain())
+
+
+# ---------- Orchestration ----------
+async def collect(brand, platforms: Sequence[str], keywords: Sequence[str], days: int, limit: int,
+                  sources: Optional[Dict[str, Any]] = None, per_source_timeout: float = 20.0,
+                  total_deadline: float = 30.0, on_chunk: Optional[Callable[[List[Dict[str, Any]]], Any]] = None,
+                  queue_size: int = COLLECT_QUEUE_SIZE,
+                  chunk_size: int = COLLECT_CHUNK_SIZE) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """
+    Run every requested collector at the same time. `sources` overrides the registry
+    (name -> Collector or fn(brand, keywords, days, limit)). Everything stops at
+    total_deadline after the call; within that, each source may spend per_source_timeout
+    fetching, counted from when its fetch starts (after the rate-limit wait) and excluding
+    time blocked on the full queue. on_chunk runs in a worker thread as items arrive; while
+    it is busy the queue fills and producers wait. on_chunk is not bounded by the deadline:
+    it sees every collected item (callers rely on that, e.g. run_monitor's incremental
+    filter), so collect() can return later than total_deadline by the on_chunk work still
+    queued when the producers stop (at most one call per chunk_size items).
+    Returns (items, timings): items in platform order, timings maps
+    source -> {"status": ok|timeout|error|skipped, "seconds", "items"[, "error"]};
+    "seconds" is the source's wall time from its fetch start (0 when it never started).
+    """
+    registry = COLLECTORS if sources is None else sources
+    selected = [p for p in platforms if p in registry]
+    timings: Dict[str, Dict[str, Any]] = {}
+    if not selected:
+        return [], timings
+
+    query = CollectorQuery(brand, keywords, days, limit)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+    finished = object()
+    start = time.monotonic()
+    deadline = start + total_deadline
+
+    def remaining() -> float:
+        return max(0.0, deadline - time.monotonic())
+
+    async def produce(name: str) -> None:
+        count = 0
+        fetch_start = None
+        status, error = "ok", None
+        try:
+            collector = as_collector(name, None if sources is None else sources[name])
+            reason = collector.unavailable()
+            if reason:
+                print(f"[{name}] Skipping — {reason}.")
+                status = "skipped"
+                return
+
+            async def pump():
+                nonlocal count, fetch_start
+                # global per-source limits (shared with other runs); only the overall deadline covers the wait
+                async with get_limiter(name).async_slot(timeout=remaining()):
+                    fetch_start = time.monotonic()
+                    stream = collector.stream(query)
+                    fetching = 0.0  # the source's own time; queue.put waits are the consumer's
+                    try:
+                        while count < limit:
+                            t0 = time.monotonic()
+                            try:
+                                entry = await asyncio.wait_for(stream.__anext__(),
+                                                               min(per_source_timeout - fetching, remaining()))
+                            except StopAsyncIteration:
+                                break
+                            fetching += time.monotonic() - t0
+                            page = entry[:limit - count] if isinstance(entry, list) else [entry]
+                            await queue.put((name, page))
+                            count += len(page)
+                    finally:
+                        await stream.aclose()
+
+            await asyncio.wait_for(pump(), timeout=remaining())
+        except asyncio.TimeoutError:
+            status = "timeout"
+            print(f"[Monitor] {name} timed out — continuing with partial results.")
+        except Exception as e:
+            status, error = "error", str(e)
+            print(f"[{name}] Error:", e)
+        finally:
+            seconds = round(time.monotonic() - fetch_start, 3) if fetch_start is not None else 0.0
+            timings[name] = {"status": status, "seconds": seconds, "items": count}
+            if error is not None:
+                timings[name]["error"] = error
+            if status in ("timeout", "error"):
+                FETCH_ERRORS.inc(source=name, kind=status)
+            if status != "skipped":
+                FETCH_ITEMS.inc(count, source=name)
+                FETCH_SECONDS.observe(seconds, source=name, status=status)
+            await queue.put((name, finished))
+
+    producers = [asyncio.create_task(produce(name)) for name in selected]
+    results: Dict[str, List[Dict[str, Any]]] = {name: [] for name in selected}
+    chunk: List[Dict[str, Any]] = []
+    try:
+        pending = len(producers)
+        while pending:
+            name, page = await queue.get()
+            if page is finished:
+                pending -= 1
+                continue
+            results[name].extend(page)
+            if on_chunk is not None:
+                chunk.extend(page)
+                if len(chunk) >= chunk_size:
+                    await asyncio.to_thread(on_chunk, chunk)
+                    chunk = []
+        if chunk:
+            await asyncio.to_thread(on_chunk, chunk)
+    finally:
+        for task in producers:
+            task.cancel()
+        await asyncio.gather(*producers, return_exceptions=True)
+
+    # keep the sequential run's row order (by platform) regardless of finish order
+    items = [item for name in selected for item in results[name]]
+    return items, {name: timings[name] for name in selected if name in timings}
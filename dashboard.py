@@ -1,13 +1,33 @@
 import streamlit as st
 import pandas as pd
-import subprocess
-import threading
 import time
 from pathlib import Path
 import requests
+from datetime import datetime, timedelta
+from mention_store import get_store
+from mention_archive import get_archive
+from monitor_jobs import get_job_queue, TERMINAL
+from dashboard_cache import DashboardCache, prescored_mentions
 
 st.set_page_config(page_title="AI Reputation Dashboard", layout="wide")
 
+
+@st.cache_resource
+def get_dashboard_cache():
+    return DashboardCache()
+
+
+def load_latest_results(brand):
+    """Latest monitoring run for `brand` from the mention store (CSV fallback when unavailable)."""
+    store = get_store()
+    if store is not None:
+        df = store.latest_run(brand)
+        if not df.empty:
+            return df
+    files = sorted(Path("outputs").glob("monitoring_*.csv"), key=lambda f: f.stat().st_mtime, reverse=True)
+    return pd.read_csv(files[0]) if files else None
+
+
 st.markdown("""
     <style>
     body { background: linear-gradient(120deg, #0a0f24, #1b2845); color: white; }
@@ -27,51 +47,124 @@ st.caption("Live Social + News Sentiment • Powered by Dual AI Agents")
 brand = st.text_input("Enter Brand Name:", "Tesla")
 days = st.slider("Days to Monitor:", 1, 30, 7)
 platforms = st.multiselect("Platforms", ["news", "twitter", "reddit"], default=["news", "twitter"])
-keywords = st.text_area("Keywords", "autopilot, battery, software update").split(",")
+keywords = [k.strip() for k in st.text_area("Keywords", "autopilot, battery, software update").split(",") if k.strip()]
+limit = st.slider("Max mentions per platform:", 5, 100, 10)
 
 st.markdown("---")
 
+# Monitoring runs in-process on the shared job queue; an identical run already in
+# progress is joined instead of started again.
+jobs = get_job_queue()
 if st.button("🔥 Start Analysis"):
-    st.info("Starting monitoring agent...")
-    def run_monitoring():
-        subprocess.run(["python", "monitoring_agent_v3.py"], check=False)
-    threading.Thread(target=run_monitoring).start()
-    time.sleep(8)
+    st.session_state["job_id"] = jobs.submit(brand, platforms, keywords, days, limit)
 
-    st.success("✅ Monitoring complete. Fetching latest data...")
+job_id = st.session_state.get("job_id")
+job = jobs.status(job_id) if job_id else None
+if job is not None and job["status"] not in TERMINAL:
+    st.info(f"⏳ Monitoring {job['brand']} ({', '.join(job['platforms'])}) — {job['status']}...")
+    time.sleep(0.5)
+    st.rerun()
+elif job is not None and job["status"] == "failed":
+    st.error(f"Monitoring failed: {job['error']}")
+else:
+    if job is not None:
+        st.success(f"✅ Monitoring complete in {job['run_seconds']:.1f}s. Fetching results...")
 
-    # Find latest CSV
-    files = sorted(Path("outputs").glob("monitoring_*.csv"), key=lambda f: f.stat().st_mtime, reverse=True)
-    if not files:
-        st.error("No monitoring results found.")
+    # Served from the per-brand cache: unchanged store -> no read; new runs -> read only those
+    cache = get_dashboard_cache()
+    view = cache.view(brand)
+    run_id = job["result"] if job is not None and job["result"] in view.runs else view.latest_run_id
+    if job is not None and job["status"] == "done" and not job["result"]:
+        st.info("No new mentions since the last run.")
+    if run_id is not None:
+        # Runs are incremental (each holds the mentions new at the time), so the table and
+        # counts cover every stored run in the window; the agent sees only this run's rows.
+        run_df = view.run(run_id)
+        df = view.recent(days)
+        counts = df["sentiment"].value_counts().to_dict()
+        if job is not None and job["result"] == run_id:
+            st.caption(f"{len(run_df)} new mention(s) in this run")
+    else:
+        # CSV output (no mention store)
+        df = jobs.load_result(job_id) if job is not None else None
+        if df is None and job is not None:
+            df = load_latest_results(brand)  # nothing new collected; show the last stored run
+        run_df = df
+        counts = df["sentiment"].value_counts().to_dict() if df is not None and not df.empty else {}
+
+    if df is None or df.empty:
+        if job is not None:
+            st.error("No monitoring results found.")
     else:
-        df = pd.read_csv(files[0])
         st.dataframe(df.head(20), use_container_width=True)
 
         # Sentiment stats
-        pos = (df["sentiment"] == "positive").sum()
-        neg = (df["sentiment"] == "negative").sum()
-        neu = (df["sentiment"] == "neutral").sum()
-
-        st.metric("Positive Mentions", pos)
-        st.metric("Negative Mentions", neg)
-        st.metric("Neutral Mentions", neu)
-
-        # Send to Sentiment Agent
-        try:
-            mentions = df[["platform", "author", "text", "date"]].to_dict(orient="records")
-            resp = requests.post("http://127.0.0.1:8001/process_batch", json={
-                "brand": brand,
-                "mentions": mentions,
-                "historical_negative_ratio": 0.1,
-                "historical_window_size": 200
-            })
-            if resp.status_code == 200:
-                data = resp.json()["data"]
-                st.subheader("📊 Reputation Summary")
-                st.json(data["summary"])
-                st.metric("Reputation Score", data["reputation_score"])
-            else:
+        st.metric("Positive Mentions", counts.get("positive", 0))
+        st.metric("Negative Mentions", counts.get("negative", 0))
+        st.metric("Neutral Mentions", counts.get("neutral", 0))
+
+        # Send to Sentiment Agent (rows are already scored by run_monitor, so skip re-scoring)
+        def analyze_run():
+            try:
+                resp = requests.post("http://127.0.0.1:8001/process_batch", json={
+                    "brand": brand,
+                    "mentions": prescored_mentions(run_df),
+                    "prescored": True,
+                    "dedup": False,  # run_monitor already collapsed duplicates
+                }, timeout=60)
+            except Exception as e:
+                st.error(f"⚠️ Error contacting sentiment agent: {e}")
+                return None
+            if resp.status_code != 200:
                 st.warning("Sentiment Agent not responding properly.")
-        except Exception as e:
-            st.error(f"⚠️ Error contacting sentiment agent: {e}")
+                return None
+            return resp.json()["data"]
+
+        data = cache.agent_result(brand, run_id, analyze_run) if run_id else analyze_run()
+        if data:
+            st.subheader("📊 Reputation Summary")
+            st.json(data["summary"])
+            st.metric("Reputation Score", data["reputation_score"])
+            rep = data.get("reputation")
+            if rep:
+                # engagement / recency / intensity weighted; "brand" is the agent's running score
+                st.caption(f"Weighted: {rep['score']} · brand running score: {rep['brand']['score']}")
+                if rep["by_platform"]:
+                    st.dataframe(pd.DataFrame.from_dict(rep["by_platform"], orient="index"),
+                                 use_container_width=True)
+            # Alerts come from the agent's per-brand rolling baselines
+            for alert in data.get("alerts", []):
+                st.warning(f"🚨 {alert['message']}")
+
+# Drill-down into the mention archive (every mention ever stored / scored, full-text indexed)
+archive = get_archive()
+if archive is not None:
+    st.markdown("---")
+    st.subheader("🔎 Search Mention History")
+    c1, c2, c3 = st.columns([3, 1, 1])
+    query = c1.text_input("Text contains (all words):", "")
+    sentiment = c2.selectbox("Sentiment", ["any", "negative", "neutral", "positive"])
+    since_days = c3.number_input("Last N days (0 = all)", min_value=0, value=30)
+    search_platforms = st.multiselect("Platforms ", ["news", "twitter", "reddit"], default=[])
+    search = (brand, query, tuple(search_platforms), sentiment, since_days)
+    # keyset pagination: one cursor per page visited, reset whenever the filters change
+    if st.session_state.get("archive_search") != search:
+        st.session_state["archive_search"] = search
+        st.session_state["archive_cursors"] = [None]
+    cursors = st.session_state["archive_cursors"]
+    page = archive.search(brand, query or None, search_platforms, None if sentiment == "any" else sentiment,
+                          start=datetime.utcnow() - timedelta(days=since_days) if since_days else None,
+                          cursor=cursors[-1])
+    if page["items"]:
+        st.dataframe(pd.DataFrame(page["items"])[["date", "platform", "author", "sentiment", "sentiment_score",
+                                                   "engagement", "text", "url"]], use_container_width=True)
+    else:
+        st.info("No archived mentions match.")
+    b1, b2, _ = st.columns([1, 1, 6])
+    if len(cursors) > 1 and b1.button("◀ Newer"):
+        cursors.pop()
+        st.rerun()
+    if page["next_cursor"] and b2.button("Older ▶"):
+        cursors.append(page["next_cursor"])
+        st.rerun()
+    st.caption(f"Page {len(cursors)}")
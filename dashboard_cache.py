@@ -0,0 +1,130 @@
+"""
+Dashboard Data Cache
+- Per-brand view of the mention store, keyed by the store's dataset version: while the
+  version is unchanged a view costs one directory stat, no Parquet read.
+- When the version moves, only runs not loaded yet are read (run_id filter pushed down,
+  older day partitions pruned) and appended; sentiment counts are updated from the new
+  rows only.
+- Sentiment-agent results are cached per (brand, run), so re-rendering a view does not
+  post the same mentions again.
+- Incremental monitoring runs hold only the mentions that were new at the time, so the
+  brand's current picture is recent(days): all loaded runs, newest first, within the window.
+"""
+
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from mention_store import MentionStore, get_store
+
+DASHBOARD_COLUMNS = ["platform", "author", "text", "date", "url", "engagement", "collected_at",
+                     "sentiment_score", "sentiment", "cluster_size", "cluster_engagement", "run_id", "day"]
+
+
+class BrandView:
+    def __init__(self, brand: str):
+        self.brand = brand
+        self.version: Optional[str] = None
+        self.runs: Dict[str, pd.DataFrame] = {}   # run_id -> rows of that run
+        self.counts: Dict[str, Counter] = {}      # run_id -> sentiment counts
+        self.last_day: Optional[str] = None
+        self.agent_results: Dict[str, Dict[str, Any]] = {}
+        self.loads = 0  # store reads performed (for the UI / debugging)
+        self._combined: Optional[pd.DataFrame] = None  # all runs, rebuilt when runs change
+
+    @property
+    def latest_run_id(self) -> Optional[str]:
+        return max(self.runs) if self.runs else None
+
+    def run(self, run_id: Optional[str] = None) -> pd.DataFrame:
+        run_id = run_id or self.latest_run_id
+        return self.runs.get(run_id, pd.DataFrame(columns=DASHBOARD_COLUMNS))
+
+    def sentiment_counts(self, run_id: Optional[str] = None) -> Counter:
+        run_id = run_id or self.latest_run_id
+        return self.counts.get(run_id, Counter())
+
+    def recent(self, days: Optional[int] = None) -> pd.DataFrame:
+        """Rows of all loaded runs, newest run first; with `days`, only mentions dated in that window."""
+        if self._combined is None:
+            frames = [self.runs[r] for r in sorted(self.runs, reverse=True)]
+            self._combined = (pd.concat(frames, ignore_index=True) if frames
+                              else pd.DataFrame(columns=DASHBOARD_COLUMNS))
+        df = self._combined
+        if days is None or df.empty:
+            return df
+        dates = pd.to_datetime(df["date"], errors="coerce")
+        return df[dates.isna() | (dates >= datetime.utcnow() - timedelta(days=days))]
+
+    def total_counts(self) -> Counter:
+        total: Counter = Counter()
+        for c in self.counts.values():
+            total.update(c)
+        return total
+
+
+class DashboardCache:
+    def __init__(self, store: Optional[MentionStore] = None):
+        self.store = store if store is not None else get_store()
+        self.views: Dict[str, BrandView] = {}
+        self._lock = threading.Lock()
+
+    def view(self, brand: str) -> BrandView:
+        """Brand view, refreshed incrementally if the store changed since the last call."""
+        with self._lock:
+            view = self.views.setdefault(brand, BrandView(brand))
+            if self.store is None:
+                return view
+            version = self.store.version(brand)
+            if version == view.version:
+                return view
+            new = self.store.read_new_runs(brand, list(view.runs), since=view.last_day, columns=DASHBOARD_COLUMNS)
+            view.loads += 1
+            if not new.empty:
+                for run_id, rows in new.groupby("run_id", sort=True):
+                    rows = rows.reset_index(drop=True)
+                    view.runs[run_id] = rows
+                    view.counts[run_id] = Counter(rows["sentiment"].dropna().tolist())
+                view.last_day = max(filter(None, [view.last_day, str(new["day"].max())]))
+                view._combined = None
+            view.version = version
+            return view
+
+    def agent_result(self, brand: str, run_id: str, compute: Callable[[], Optional[Dict[str, Any]]]
+                     ) -> Optional[Dict[str, Any]]:
+        """Sentiment-agent response for one run, computed once (failures are not cached)."""
+        view = self.view(brand)
+        cached = view.agent_results.get(run_id)
+        if cached is None:
+            cached = compute()
+            if cached is not None:
+                view.agent_results[run_id] = cached
+        return cached
+
+
+def prescored_mentions(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Mention payload for /process_batch with prescored=true (carries the stored scores, the
+    dedup cluster's size and engagement for the weighted reputation, and the url so the
+    agent's archive recognizes mentions run_monitor already archived).
+    """
+    cols = {"platform": df.get("platform"), "author": df.get("author"), "text": df["text"],
+            "created_at": df.get("date"), "compound": df.get("sentiment_score"), "label": df.get("sentiment")}
+    frame = pd.DataFrame({k: v for k, v in cols.items() if v is not None})
+    frame = frame.astype(object).where(frame.notna(), None)
+    records = frame.to_dict(orient="records")
+    engagement = df.get("cluster_engagement")
+    if engagement is None or engagement.isna().all():
+        engagement = df.get("engagement")
+    n = len(records)
+    engagement = pd.to_numeric(engagement, errors="coerce").fillna(0).tolist() if engagement is not None else [0] * n
+    urls = df["url"].astype(object).where(df["url"].notna(), None).tolist() if "url" in df else [None] * n
+    sizes = df.get("cluster_size")
+    sizes = pd.to_numeric(sizes, errors="coerce").fillna(1).astype(int).tolist() if sizes is not None else [1] * n
+    for record, value, url, size in zip(records, engagement, urls, sizes):
+        record["metadata"] = {"engagement": value, "url": url}
+        record["cluster_size"] = size
+    return records
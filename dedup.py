@@ -0,0 +1,203 @@
+"""
+Mention Deduplication
+- Exact dedup by URL / id (the same Google News item or tweet collected twice).
+- Near-duplicate clustering with MinHash + LSH banding over word shingles (syndicated
+  headlines, retweets, cross-posts).
+- One representative per cluster is kept, carrying a `cluster_size` weight so counts can
+  still reflect reach without scoring every copy.
+- Signatures are computed with NumPy over all shingles at once and candidate pairs come
+  from LSH buckets, so cost grows ~linearly with mention volume.
+- Before shingling, a trailing outlet name (" - BBC News", " | Reuters") is dropped so the
+  same story from two outlets compares on the story itself, and texts shorter than
+  DEDUP_MIN_WORDS are never near-duplicate merged (too few shingles to tell "Love it!"
+  from "Love it?"); exact url / id duplicates are still collapsed.
+"""
+
+import os
+import re
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", 64))
+DEDUP_BANDS = int(os.getenv("DEDUP_BANDS", 16))
+DEDUP_SHINGLE_SIZE = int(os.getenv("DEDUP_SHINGLE_SIZE", 3))
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.7))
+DEDUP_MIN_WORDS = int(os.getenv("DEDUP_MIN_WORDS", 6))
+
+_WORD_RE = re.compile(r"\w+")
+# " - BBC News", " | The Verge", " — electrek.co": up to five words, capitalized or a domain
+_SOURCE_SUFFIX_RE = re.compile(r"\s+[-|\u2013\u2014]\s+(?:[A-Z0-9][\w&'.]*(?:\s+[\w&'.]+){0,4}|[\w-]+\.[a-z]{2,})\s*$")
+_MERSENNE = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_rng = np.random.default_rng(1337)
+_PERM_A = _rng.integers(1, (1 << 32) - 1, size=1024, dtype=np.uint64)
+_PERM_B = _rng.integers(0, (1 << 32) - 1, size=1024, dtype=np.uint64)
+
+
+def strip_source_suffix(text: str) -> str:
+    """Text without a trailing " - Outlet Name" attribution."""
+    return _SOURCE_SUFFIX_RE.sub("", text)
+
+
+def shingles(text: str, k: int = DEDUP_SHINGLE_SIZE, min_words: int = DEDUP_MIN_WORDS) -> List[int]:
+    """
+    Hashed word k-shingles of the lowercased text minus its source suffix (falls back to
+    the words themselves); none for texts under `min_words` words, so they never cluster.
+    """
+    words = _WORD_RE.findall(strip_source_suffix(text).lower())
+    if len(words) < min_words:
+        return []
+    if len(words) < k:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = [" ".join(words[i:i + k]) for i in range(len(words) - k + 1)]
+    return [zlib.crc32(g.encode("utf-8")) for g in set(grams)]
+
+
+def minhash_signatures(texts: Sequence[str], num_perm: int = DEDUP_NUM_PERM) -> np.ndarray:
+    """(n_texts, num_perm) uint64 MinHash signatures; all shingles are hashed in one pass."""
+    per_doc = [shingles(t) for t in texts]
+    lengths = np.fromiter((len(s) for s in per_doc), dtype=np.int64, count=len(per_doc))
+    sig = np.full((len(texts), num_perm), _MAX_HASH, dtype=np.uint64)
+    if lengths.sum() == 0:
+        return sig
+
+    flat = np.fromiter((h for s in per_doc for h in s), dtype=np.uint64, count=int(lengths.sum()))
+    doc = np.repeat(np.arange(len(texts)), lengths)
+    a, b = _PERM_A[:num_perm], _PERM_B[:num_perm]
+    # universal hashing (a*x + b) mod p, 32-bit result; chunked to bound memory
+    chunk = max(1, 2_000_000 // num_perm)
+    for start in range(0, len(flat), chunk):
+        x = flat[start:start + chunk, None]
+        with np.errstate(over="ignore"):
+            hv = ((a[None, :] * x + b[None, :]) % _MERSENNE) & _MAX_HASH
+        np.minimum.at(sig, doc[start:start + chunk], hv)
+    return sig
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+def cluster_near_duplicates(texts: Sequence[str], threshold: float = DEDUP_THRESHOLD,
+                            num_perm: int = DEDUP_NUM_PERM, bands: int = DEDUP_BANDS) -> List[int]:
+    """
+    Return a cluster label per text (label = index of the cluster's first member).
+    Texts landing in the same LSH bucket are merged if their estimated Jaccard
+    similarity (signature agreement) is >= threshold.
+    """
+    n = len(texts)
+    if n == 0:
+        return []
+    rows = max(1, num_perm // bands)
+    sig = minhash_signatures(texts, rows * bands)
+    no_shingles = (sig == _MAX_HASH).all(axis=1)  # empty / too short texts never cluster
+    uf = _UnionFind(n)
+
+    for band in range(bands):
+        block = np.ascontiguousarray(sig[:, band * rows:(band + 1) * rows])
+        keys = block.view(np.dtype((np.void, block.dtype.itemsize * rows))).ravel()
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        # boundaries of runs of equal band keys
+        starts = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+        ends = np.append(starts[1:], n)
+        for s, e in zip(starts.tolist(), ends.tolist()):
+            if e - s < 2:
+                continue
+            members = order[s:e]
+            members = members[~no_shingles[members]]
+            if len(members) < 2:
+                continue
+            head = int(members[0])
+            for m in members[1:].tolist():
+                if uf.find(m) == uf.find(head):
+                    continue
+                if np.mean(sig[head] == sig[m]) >= threshold:
+                    uf.union(head, m)
+
+    return [uf.find(i) for i in range(n)]
+
+
+def dedup_groups(texts: Sequence[str], ids: Sequence[Sequence[Optional[str]]] = (),
+                 threshold: Optional[float] = DEDUP_THRESHOLD) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Group exact duplicates (any equal non-empty id in `ids`, e.g. url / mention id columns)
+    and near-duplicate texts.
+    Returns (reps, group): reps are the indices of each group's first member in input
+    order, group[i] is the position in reps that item i was collapsed into.
+    """
+    n = len(texts)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    # 1) exact: first occurrence of each non-empty url/id wins
+    first = np.arange(n)
+    seen: Dict[Tuple[int, str], int] = {}
+    for i in range(n):
+        idx = None
+        for col, column in enumerate(ids):
+            value = column[i]
+            if value:
+                idx = seen.get((col, str(value)))
+                if idx is not None:
+                    break
+        if idx is not None:
+            first[i] = idx
+            continue
+        for col, column in enumerate(ids):
+            value = column[i]
+            if value:
+                seen[(col, str(value))] = i
+    survivors = np.flatnonzero(first == np.arange(n))
+
+    # 2) near-duplicates among the survivors
+    root = np.arange(len(survivors))
+    if threshold is not None and len(survivors) > 1:
+        root = np.asarray(cluster_near_duplicates([texts[i] for i in survivors.tolist()], threshold=threshold))
+    pos = np.full(n, -1, dtype=np.int64)
+    pos[survivors] = survivors[root]          # survivor -> index of its cluster's first member
+    rep_of = pos[first]                       # every item -> that index
+    reps, group = np.unique(rep_of, return_inverse=True)
+    return reps, group.reshape(-1)
+
+
+def dedup_items(items: List[Dict[str, Any]], text_key: str = "text",
+                id_keys: Tuple[str, ...] = ("url", "id"), threshold: Optional[float] = DEDUP_THRESHOLD
+                ) -> List[Dict[str, Any]]:
+    """
+    Collapse exact duplicates (same url/id) and near-duplicate texts.
+    Returns one representative dict per cluster (first seen, in original order) with
+    `cluster_size` (copies collapsed into it, incl. itself) and, for engagement-bearing
+    items, the summed `cluster_engagement`. Input dicts are not modified.
+    """
+    if not items:
+        return []
+    reps, group = dedup_groups([str(it.get(text_key) or "") for it in items],
+                               [[it.get(k) for it in items] for k in id_keys], threshold=threshold)
+    sizes = np.bincount(group, minlength=len(reps))
+    engagement = np.bincount(group, weights=[float(it.get("engagement") or 0) for it in items],
+                             minlength=len(reps))
+
+    out = []
+    for r, i in enumerate(reps.tolist()):
+        rep = dict(items[i])
+        rep["cluster_size"] = int(sizes[r])
+        if "engagement" in rep:
+            rep["cluster_engagement"] = float(engagement[r])
+        out.append(rep)
+    return out
@@ -0,0 +1,114 @@
+"""
+Fast JSON Responses
+- dumps(): orjson when it is installed (C encoder; numpy scalars / arrays serialize
+  natively, non-finite floats become null), the standard json module otherwise (same
+  output: NaN / Infinity are written as null there too, never as bare NaN).
+- json_response(): a finished Response for payloads that are already plain dicts / lists /
+  numbers, so FastAPI's jsonable_encoder walk and the second json.dumps pass are skipped.
+- Optional compression negotiated from Accept-Encoding for bodies of at least
+  RESPONSE_COMPRESS_MIN_BYTES: zstd (when the zstandard package is installed) or gzip.
+  RESPONSE_COMPRESSION=false turns it off (e.g. behind a compressing proxy).
+"""
+
+import gzip
+import json
+import math
+import os
+from typing import Any, Dict, Optional
+
+import numpy as np
+from fastapi.responses import Response
+
+# Optional modules
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+try:
+    import zstandard
+except Exception:
+    zstandard = None
+
+RESPONSE_COMPRESSION = os.getenv("RESPONSE_COMPRESSION", "true").lower() in ("1", "true", "yes")
+RESPONSE_COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", 16384))
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", 5))
+RESPONSE_ZSTD_LEVEL = int(os.getenv("RESPONSE_ZSTD_LEVEL", 3))
+
+_ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _finite(obj: Any) -> Any:
+    """Copy of `obj` with non-finite floats replaced by None (what orjson writes for them)."""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(v) for v in obj]
+    if isinstance(obj, (np.generic, np.ndarray)):
+        return _finite(_default(obj))
+    return obj
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default,
+                      allow_nan=False).encode("utf-8")
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+    try:
+        return _stdlib_dumps(obj)
+    except ValueError:  # NaN / Infinity somewhere: rewrite them as null (rare, so only then)
+        return _stdlib_dumps(_finite(obj))
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best of zstd / gzip that the client accepts (q > 0); zstd wins ties."""
+    if not RESPONSE_COMPRESSION or not accept_encoding:
+        return None
+    offered: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        offered[name.strip().lower()] = q
+    candidates = (["zstd"] if zstandard is not None else []) + ["gzip"]
+    quality = {c: offered.get(c, offered.get("*", 0.0)) for c in candidates}
+    best = max(candidates, key=quality.__getitem__)
+    return best if quality[best] > 0 else None
+
+
+def compress(body: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=RESPONSE_ZSTD_LEVEL).compress(body)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=RESPONSE_GZIP_LEVEL, mtime=0)
+    return body
+
+
+def json_response(payload: Any, accept_encoding: Optional[str] = None, status_code: int = 200) -> Response:
+    """Serialize `payload` once and compress it if the client allows and it is big enough."""
+    body = dumps(payload)
+    headers = {"Vary": "Accept-Encoding"} if RESPONSE_COMPRESSION else {}
+    encoding = negotiate_encoding(accept_encoding) if len(body) >= RESPONSE_COMPRESS_MIN_BYTES else None
+    if encoding is not None:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
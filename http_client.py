@@ -0,0 +1,168 @@
+"""
+Shared HTTP client for the collectors
+- One pooled requests.Session (keep-alive, no new TCP/TLS handshake per run).
+- Remembers ETag / Last-Modified per URL and sends conditional requests, so an unchanged
+  feed comes back as a bodiless 304.
+- Retries connection errors and 429/5xx with exponential backoff.
+- Records bytes fetched and time per request; for stream=True responses the bytes actually
+  received are recorded when the caller hands the response back with release().
+- release() drains what is left of a stream=True body up to HTTP_DRAIN_BYTES so the
+  keep-alive connection goes back to the pool; bigger leftovers close the socket instead
+  (re-connecting is cheaper than downloading the rest of a large feed).
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from metrics import REGISTRY
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 10))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", 3))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", 0.5))
+HTTP_USER_AGENT = os.getenv("HTTP_USER_AGENT", "monitoring-agent/1.0")
+HTTP_DRAIN_BYTES = int(os.getenv("HTTP_DRAIN_BYTES", 256 * 1024))  # leftover body read to keep the connection
+
+
+class HTTPClient:
+    def __init__(self, pool_size: int = HTTP_POOL_SIZE, retries: int = HTTP_RETRIES,
+                 backoff: float = HTTP_BACKOFF, user_agent: str = HTTP_USER_AGENT):
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = user_agent
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.validators: Dict[str, Dict[str, str]] = {}
+        self.totals = {"requests": 0, "not_modified": 0, "bytes": 0, "seconds": 0.0, "errors": 0}
+        self._lock = threading.Lock()
+
+    def get(self, url: str, conditional: bool = False, timeout: float = 10, **kwargs) -> requests.Response:
+        """
+        GET `url` through the pooled session.
+        conditional=True sends the stored ETag / Last-Modified for this URL; check
+        `resp.status_code == 304` to skip re-downloading and re-parsing.
+        """
+        headers = dict(kwargs.pop("headers", None) or {})
+        if conditional:
+            v = self.validators.get(url, {})
+            if "etag" in v:
+                headers["If-None-Match"] = v["etag"]
+            if "last_modified" in v:
+                headers["If-Modified-Since"] = v["last_modified"]
+
+        t0 = time.perf_counter()
+        try:
+            resp = self.session.get(url, headers=headers, timeout=timeout, **kwargs)
+        except Exception:
+            self._record(url, None, 0, time.perf_counter() - t0)
+            raise
+        seconds = time.perf_counter() - t0
+
+        if resp.status_code == 200:
+            v = {}
+            if resp.headers.get("ETag"):
+                v["etag"] = resp.headers["ETag"]
+            if resp.headers.get("Last-Modified"):
+                v["last_modified"] = resp.headers["Last-Modified"]
+            with self._lock:
+                if v:
+                    self.validators[url] = v
+                else:
+                    self.validators.pop(url, None)
+
+        if kwargs.get("stream"):
+            # body not read yet: release() adds the bytes that actually came off the socket
+            resp.fetch_record = self._record(url, resp.status_code, 0, seconds)
+        else:
+            self._record(url, resp.status_code, len(resp.content), seconds)
+        return resp
+
+    def release(self, resp: requests.Response, drain_bytes: int = HTTP_DRAIN_BYTES) -> int:
+        """
+        Finish a stream=True response: read what is left of the body (up to `drain_bytes`)
+        so the connection can be reused, record the bytes received and return them.
+        A longer leftover is not downloaded; the socket is closed instead. Safe to call twice.
+        """
+        released = getattr(resp, "released_bytes", None)
+        if released is not None:
+            return released
+        raw = resp.raw
+        reusable = False
+        try:
+            start = raw.tell()
+            while raw.tell() - start < drain_bytes:
+                if not raw.read(64 * 1024):
+                    reusable = True
+                    break
+        except Exception:
+            pass
+        try:
+            size = int(raw.tell())  # bytes read off the socket (before decompression)
+        except Exception:
+            size = 0
+        if reusable:
+            raw.release_conn()
+        else:
+            resp.close()
+        resp.released_bytes = size
+        record = getattr(resp, "fetch_record", None)
+        with self._lock:
+            self.totals["bytes"] += size
+            if record is not None:
+                record["bytes"] += size
+        return size
+
+    def _record(self, url: str, status: Optional[int], size: int, seconds: float) -> Dict[str, Any]:
+        with self._lock:
+            self.totals["requests"] += 1
+            self.totals["seconds"] += seconds
+            self.totals["bytes"] += size
+            if status == 304:
+                self.totals["not_modified"] += 1
+            if status is None or status >= 400:
+                self.totals["errors"] += 1
+            return {"url": url, "status": status, "bytes": size, "seconds": round(seconds, 4)}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.totals, validators=len(self.validators))
+
+
+_client: Optional[HTTPClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> HTTPClient:
+    """Process-wide pooled client shared by all collectors."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HTTPClient()
+        return _client
+
+
+def _http_metrics():
+    if _client is None:
+        return
+    t = _client.stats()
+    yield ("http_client_requests_total", "counter", "Requests made by the pooled client", [({}, t["requests"])])
+    yield ("http_client_not_modified_total", "counter", "Conditional requests answered 304", [({}, t["not_modified"])])
+    yield ("http_client_errors_total", "counter", "Failed requests (exception or >= 400)", [({}, t["errors"])])
+    yield ("http_client_bytes_total", "counter", "Response bytes received", [({}, t["bytes"])])
+    yield ("http_client_seconds_total", "counter", "Time spent in requests", [({}, round(t["seconds"], 6))])
+
+
+REGISTRY.add_collector(_http_metrics)
@@ -0,0 +1,208 @@
+"""
+Streaming Trending-Keyword Index
+- Per-brand index updated incrementally with each batch instead of refitting a
+  TfidfVectorizer on every request.
+- Unigrams + bigrams (same tokenization / English stop words as the old TF-IDF path) are
+  hashed into count-min sketches of term frequency and document frequency.
+- Counts decay exponentially with age (forward decay: new counts are weighted up instead
+  of old counts being scaled down), so "trending" means recent across batches.
+- A bounded heavy-hitter candidate set keeps the top keywords ranked, so top_k() is O(k)
+  and memory is fixed regardless of how many mentions were seen.
+- Requests without a brand share nothing: a batch is ranked from exact Counters of its own
+  n-grams (batch_keywords, same scores as a fresh index, no sketch allocated); a brandless
+  stream upload gets a private, throwaway index so memory stays fixed however large it is.
+"""
+
+import heapq
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from collections import Counter, OrderedDict
+from itertools import chain
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SKETCH_WIDTH = int(os.getenv("KEYWORD_SKETCH_WIDTH", 2 ** 14))
+SKETCH_DEPTH = int(os.getenv("KEYWORD_SKETCH_DEPTH", 4))
+CANDIDATE_CAPACITY = int(os.getenv("KEYWORD_CANDIDATES", 256))
+HALF_LIFE_SECONDS = float(os.getenv("KEYWORD_HALF_LIFE_SECONDS", 6 * 3600))
+MAX_BRANDS = int(os.getenv("KEYWORD_INDEX_MAX_BRANDS", 256))
+
+TOKEN_RE = re.compile(r"(?u)\b\w\w+\b")  # TfidfVectorizer's default token_pattern
+_RESCALE_EXPONENT = 200.0  # re-anchor before exp() weights overflow float64
+_SEEDS = np.random.default_rng(20240601).integers(1, 2 ** 63, size=(2, 32), dtype=np.uint64) | np.uint64(1)
+
+
+_stop_words: Optional[frozenset] = None
+
+
+def stop_words() -> frozenset:
+    """scikit-learn's English stop words, imported on first use (sklearn is slow to import)."""
+    global _stop_words
+    if _stop_words is None:
+        from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+        _stop_words = frozenset(ENGLISH_STOP_WORDS)
+    return _stop_words
+
+
+def extract_ngrams(text: str) -> List[str]:
+    """Lowercased unigrams + bigrams with stop words removed (bigrams span removed words)."""
+    stop = stop_words()
+    tokens = [t for t in TOKEN_RE.findall(text.lower()) if t not in stop]
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def gram_hash(gram: str) -> int:
+    data = gram.encode("utf-8")
+    return zlib.crc32(data) | (zlib.adler32(data) << 32)
+
+
+class KeywordIndex:
+    """Decayed TF / DF count-min sketches plus a bounded top-keyword candidate set."""
+
+    def __init__(self, width: int = SKETCH_WIDTH, depth: int = SKETCH_DEPTH,
+                 capacity: int = CANDIDATE_CAPACITY, half_life_seconds: float = HALF_LIFE_SECONDS):
+        self.width_bits = max(1, int(math.log2(width)))
+        self.width = 1 << self.width_bits
+        self.depth = min(depth, _SEEDS.shape[1])
+        self.capacity = capacity
+        self.decay_rate = math.log(2) / half_life_seconds if half_life_seconds > 0 else 0.0
+        self.tf = np.zeros((self.depth, self.width), dtype=np.float64)
+        self.df = np.zeros((self.depth, self.width), dtype=np.float64)
+        self.docs = 0.0
+        self.landmark = time.time()
+        self.mentions_seen = 0
+        self.candidates: Dict[str, int] = {}
+        self.ranked: List[Tuple[str, float]] = []  # (gram, score at landmark scale), best first
+        self._lock = threading.Lock()
+
+    # ---------- sketch primitives ----------
+    def _buckets(self, hashes: np.ndarray) -> np.ndarray:
+        """Multiply-shift hashing: (depth, n) bucket indices."""
+        a = _SEEDS[0, :self.depth, None]
+        b = _SEEDS[1, :self.depth, None]
+        with np.errstate(over="ignore"):
+            return ((a * hashes[None, :] + b) >> np.uint64(64 - self.width_bits)).astype(np.int64)
+
+    def _estimate(self, table: np.ndarray, buckets: np.ndarray) -> np.ndarray:
+        return table[np.arange(self.depth)[:, None], buckets].min(axis=0)
+
+    def _weight(self, now: float) -> float:
+        return math.exp(self.decay_rate * (now - self.landmark))
+
+    def _rescale(self, now: float) -> None:
+        factor = self._weight(now)
+        self.tf /= factor
+        self.df /= factor
+        self.docs /= factor
+        self.ranked = [(g, s / factor) for g, s in self.ranked]
+        self.landmark = now
+
+    def _scores(self, hashes: np.ndarray, now: float) -> np.ndarray:
+        buckets = self._buckets(hashes)
+        tf = self._estimate(self.tf, buckets)
+        df = self._estimate(self.df, buckets)
+        w = self._weight(now)
+        idf = np.log((w + self.docs) / (w + df)) + 1.0  # smooth idf in decayed units
+        return tf * idf
+
+    # ---------- public API ----------
+    def update(self, texts: Sequence[str], now: Optional[float] = None) -> None:
+        """Fold a batch of texts into the index."""
+        if not texts:
+            return
+        now = time.time() if now is None else now
+        doc_grams = [extract_ngrams(text) for text in texts]
+        tf_counts = Counter(chain.from_iterable(doc_grams))
+        df_counts = Counter(chain.from_iterable(map(set, doc_grams)))
+
+        with self._lock:
+            if self.decay_rate * (now - self.landmark) > _RESCALE_EXPONENT:
+                self._rescale(now)
+            w = self._weight(now)
+            self.docs += len(texts) * w
+            self.mentions_seen += len(texts)
+            if not tf_counts:
+                return
+
+            grams = list(tf_counts)
+            hashes = np.fromiter((gram_hash(g) for g in grams), dtype=np.uint64, count=len(grams))
+            buckets = self._buckets(hashes)
+            tf_w = np.fromiter((tf_counts[g] for g in grams), dtype=np.float64, count=len(grams)) * w
+            df_w = np.fromiter((df_counts[g] for g in grams), dtype=np.float64, count=len(grams)) * w
+            for row in range(self.depth):
+                np.add.at(self.tf[row], buckets[row], tf_w)
+                np.add.at(self.df[row], buckets[row], df_w)
+
+            # Re-rank old candidates + this batch's grams; keep the best `capacity`.
+            pool = dict(self.candidates)
+            pool.update(zip(grams, hashes.tolist()))
+            names = list(pool)
+            scores = self._scores(np.fromiter(pool.values(), dtype=np.uint64, count=len(pool)), now)
+            keep = min(self.capacity, len(names))
+            top = np.argpartition(-scores, keep - 1)[:keep]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            self.candidates = {names[i]: pool[names[i]] for i in top}
+            self.ranked = [(names[i], float(scores[i])) for i in top]
+
+    def top_k(self, k: int, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Top-k keywords as [{"keyword", "score"}], scores decayed to `now`. O(k)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            scale = 1.0 / self._weight(now)
+            return [{"keyword": g, "score": s * scale} for g, s in self.ranked[:k] if s > 0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mentions_seen": self.mentions_seen,
+            "candidates": len(self.candidates),
+            "sketch_bytes": int(self.tf.nbytes + self.df.nbytes),
+            "half_life_seconds": math.log(2) / self.decay_rate if self.decay_rate else None,
+        }
+
+
+def batch_keywords(texts: Sequence[str], k: int) -> List[Dict[str, Any]]:
+    """Top-k keywords of `texts` alone, scored as a fresh KeywordIndex would score them."""
+    doc_grams = [extract_ngrams(text) for text in texts]
+    tf_counts = Counter(chain.from_iterable(doc_grams))
+    df_counts = Counter(chain.from_iterable(map(set, doc_grams)))
+    docs = len(texts)
+    scored = ((g, tf * (math.log((1 + docs) / (1 + df_counts[g])) + 1.0)) for g, tf in tf_counts.items())
+    return [{"keyword": g, "score": s} for g, s in heapq.nlargest(k, scored, key=lambda item: item[1])]
+
+
+class KeywordIndexRegistry:
+    """One KeywordIndex per brand, LRU-bounded so memory stays fixed."""
+
+    def __init__(self, max_brands: int = MAX_BRANDS):
+        self.max_brands = max(1, max_brands)
+        self._indexes: "OrderedDict[str, KeywordIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, brand: Optional[str]) -> KeywordIndex:
+        """The brand's shared index; without a brand a new index nobody else sees."""
+        key = (brand or "").strip().lower()
+        if not key:
+            return KeywordIndex()
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is None:
+                index = self._indexes[key] = KeywordIndex()
+                while len(self._indexes) > self.max_brands:
+                    self._indexes.popitem(last=False)
+            self._indexes.move_to_end(key)
+            return index
+
+
+_registry: Optional[KeywordIndexRegistry] = None
+
+
+def get_keyword_index(brand: Optional[str]) -> KeywordIndex:
+    global _registry
+    if _registry is None:
+        _registry = KeywordIndexRegistry()
+    return _registry.get(brand)
@@ -0,0 +1,89 @@
+"""
+Prebuilt VADER Lexicon Artifact
+- The lexicon serialized into one flat binary file: a small header, int32 word offsets,
+  float64 valences and the UTF-8 word bytes back to back.
+- Loading reads the file in one call and views the arrays straight out of those bytes
+  (np.frombuffer), so startup does no text parsing and never imports nltk. The result is
+  a plain dict (what the engine looks tokens up in), so each process holds its own copy.
+Build: python lexicon_artifact.py build [--out PATH]
+"""
+
+import os
+import struct
+from typing import Dict, Optional
+
+import numpy as np
+
+ARTIFACT_PATH = os.getenv(
+    "VADER_LEXICON_ARTIFACT",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "artifacts", "vader_lexicon.bin"),
+)
+
+_MAGIC = b"VADERLX1"
+_HEADER = struct.Struct("<8sII")  # magic, n_words, n_text_bytes
+
+
+def write_artifact(lexicon: Dict[str, float], path: str = ARTIFACT_PATH) -> str:
+    words = list(lexicon)
+    encoded = [w.encode("utf-8") for w in words]
+    offsets = np.zeros(len(words) + 1, dtype=np.int32)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    valences = np.asarray([lexicon[w] for w in words], dtype=np.float64)
+    text = b"".join(encoded)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, len(words), len(text)))
+        f.write(offsets.tobytes())
+        f.write(valences.tobytes())
+        f.write(text)
+    os.replace(tmp, path)
+    return path
+
+
+def load_artifact(path: str = ARTIFACT_PATH) -> Optional[Dict[str, float]]:
+    """{token: valence} from the artifact, or None if it does not exist / is not valid."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < _HEADER.size:
+        return None
+    magic, n, n_text = _HEADER.unpack_from(data, 0)
+    pos = _HEADER.size
+    if magic != _MAGIC or len(data) != pos + 4 * (n + 1) + 8 * n + n_text:
+        return None
+    offsets = np.frombuffer(data, dtype=np.int32, count=n + 1, offset=pos)
+    pos += 4 * (n + 1)
+    valences = np.frombuffer(data, dtype=np.float64, count=n, offset=pos)
+    pos += 8 * n
+    text = data[pos:pos + n_text].decode("utf-8")
+    # offsets are byte offsets; the lexicon is ASCII in practice, but stay correct otherwise
+    if len(text) == n_text:
+        words = [text[a:b] for a, b in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+    else:
+        raw = data[pos:pos + n_text]
+        words = [raw[a:b].decode("utf-8") for a, b in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+    return dict(zip(words, valences.tolist()))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="VADER lexicon artifact")
+    sub = parser.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("build", help="serialize the lexicon from nltk / vaderSentiment data")
+    b.add_argument("--out", default=ARTIFACT_PATH)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        from batch_sentiment import load_vader_lexicon
+
+        lexicon = load_vader_lexicon(use_artifact=False)
+        path = write_artifact(lexicon, args.out)
+        assert load_artifact(path) == lexicon
+        print(f"[Lexicon] Wrote {len(lexicon)} entries to {path}")
@@ -0,0 +1,394 @@
+"""
+Mention Archive (SQLite + FTS5)
+- Local, searchable history of every mention run_monitor stores and /process_batch or
+  /process_stream scores: one `mentions` row per (brand, item) - url, else id, else text
+  hash - so re-collected or re-posted mentions are archived once.
+- B-tree indexes on (brand, date), (brand, platform, date) and (brand, sentiment, date)
+  serve the filters and the newest-first order; brands match case-insensitively (NOCASE),
+  like the dedup key. An external-content FTS5 table over the text serves full-text
+  queries without a second copy of the text.
+- Bulk inserts: executemany in transactions of MENTION_ARCHIVE_BATCH rows (WAL,
+  synchronous=NORMAL); the new rows' text goes into FTS with one INSERT ... SELECT in the
+  same transaction (a per-row insert trigger is several times slower).
+- The agent endpoints hand batches to one background writer thread (bounded queue, so a
+  slow disk pushes back instead of growing memory); responses do not wait for the insert.
+- search() pages with a keyset cursor (date, id) instead of OFFSET, so page 1000 costs
+  the same as page 1 over millions of rows.
+Run: python mention_archive.py search battery --brand Tesla --sentiment negative --days 30
+     python mention_archive.py import outputs/monitoring_*.csv
+"""
+
+import hashlib
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from mention_batch import LABELS
+
+logger = logging.getLogger("mention_archive")
+
+ARCHIVE_DB_PATH = os.getenv("MENTION_ARCHIVE_DB", os.path.join("outputs", "mention_archive.db")) or None
+ARCHIVE_BATCH = int(os.getenv("MENTION_ARCHIVE_BATCH", 5000))  # rows per insert transaction
+ARCHIVE_PAGE_SIZE = int(os.getenv("MENTION_ARCHIVE_PAGE_SIZE", 50))
+ARCHIVE_MAX_PAGE_SIZE = 1000
+ARCHIVE_QUEUE_SIZE = int(os.getenv("MENTION_ARCHIVE_QUEUE", 16))  # batches waiting for the writer thread
+
+COLUMNS = ("brand", "platform", "author", "text", "url", "date", "engagement", "sentiment", "sentiment_score",
+           "cluster_size", "source", "run_id")
+
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS mentions (
+        id INTEGER PRIMARY KEY,
+        key TEXT NOT NULL UNIQUE,
+        brand TEXT NOT NULL,
+        platform TEXT,
+        author TEXT,
+        text TEXT NOT NULL,
+        url TEXT,
+        date TEXT NOT NULL DEFAULT '',  -- '' when unknown (sorts last)
+        engagement REAL,
+        sentiment TEXT,
+        sentiment_score REAL,
+        cluster_size INTEGER,
+        source TEXT,
+        run_id TEXT,
+        archived_at REAL
+    )""",
+    "CREATE INDEX IF NOT EXISTS mentions_date ON mentions (date, id)",
+    # brand filters compare case-insensitively ("tesla" finds "Tesla"), so the indexes do too
+    "DROP INDEX IF EXISTS mentions_brand_date",
+    "DROP INDEX IF EXISTS mentions_brand_platform_date",
+    "DROP INDEX IF EXISTS mentions_brand_sentiment_date",
+    "CREATE INDEX IF NOT EXISTS mentions_brand_nocase_date ON mentions (brand COLLATE NOCASE, date, id)",
+    "CREATE INDEX IF NOT EXISTS mentions_brand_nocase_platform_date "
+    "ON mentions (brand COLLATE NOCASE, platform, date, id)",
+    "CREATE INDEX IF NOT EXISTS mentions_brand_nocase_sentiment_date "
+    "ON mentions (brand COLLATE NOCASE, sentiment, date, id)",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS mentions_fts USING fts5(
+        text, content='mentions', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    "DROP TRIGGER IF EXISTS mentions_ad",  # rows are never deleted; FTS rows are added by _insert
+]
+
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2})?)?")
+
+
+def normalize_date(value: Any) -> Optional[str]:
+    """'YYYY-MM-DD HH:MM:SS' (sorts as text) from ISO-like strings / datetimes; None otherwise."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    text = str(value)
+    match = _DATE_RE.match(text)
+    if not match:
+        return None
+    text = match.group(0).replace("T", " ")
+    return text + " 00:00:00"[len(text) - 10:] if len(text) < 19 else text
+
+
+def mention_key(brand: str, url: Optional[str], mention_id: Optional[str], text: str,
+                platform: Optional[str] = None) -> str:
+    # ids are only unique within their source, so the platform is part of an id-based key
+    ident = url or (f"id:{platform or ''}:{mention_id}" if mention_id else None)
+    if ident is None:
+        ident = "text:" + hashlib.blake2b(" ".join(text.split()).encode("utf-8"), digest_size=12).hexdigest()
+    return f"{brand.strip().lower()}\0{ident}"
+
+
+def fts_query(text: str) -> str:
+    """
+    FTS5 expression matching every word of `text` (as a prefix for a trailing '*'),
+    with FTS syntax characters neutralized; 'battery drain' -> '"battery" "drain"'.
+    """
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+class MentionArchive:
+    def __init__(self, path: str, batch_size: int = ARCHIVE_BATCH):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._db:
+            for statement in _SCHEMA:
+                self._db.execute(statement)
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, ARCHIVE_QUEUE_SIZE))
+        self._writer: Optional[threading.Thread] = None
+
+    # ---------- background writes ----------
+    def submit(self, fn, *args) -> None:
+        """
+        Run the write fn(*args) (e.g. self.add_batch) on the writer thread. Blocks only while
+        the queue is full; failures are logged there.
+        """
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name="mention-archive", daemon=True)
+                self._writer.start()
+        self._queue.put((fn, args))
+
+    def _write_loop(self) -> None:
+        while True:
+            fn, args = self._queue.get()
+            try:
+                archive_quietly(fn, *args)
+            finally:
+                self._queue.task_done()
+
+    def flush(self) -> None:
+        """Wait until every submitted write has finished."""
+        self._queue.join()
+
+    # ---------- writes ----------
+    def add_rows(self, rows: Iterable[Dict[str, Any]], source: str) -> int:
+        """
+        Archive mention dicts (keys as in COLUMNS, plain Python values; "id" is used for
+        the dedup key only). Rows already archived for the brand are skipped. Returns the
+        number inserted.
+        """
+        now = time.time()
+        inserted = 0
+        batch: List[Tuple] = []
+        date_at, source_at = COLUMNS.index("date"), COLUMNS.index("source")
+        for row in rows:
+            text = row.get("text")
+            brand = row.get("brand")
+            if not text or not brand:
+                continue
+            values = [row.get(c) for c in COLUMNS]
+            values[date_at] = normalize_date(values[date_at]) or ""
+            values[source_at] = source
+            key = mention_key(str(brand), row.get("url"), row.get("id"), str(text), row.get("platform"))
+            batch.append((key, *values, now))
+            if len(batch) >= self.batch_size:
+                inserted += self._insert(batch)
+                batch = []
+        if batch:
+            inserted += self._insert(batch)
+        return inserted
+
+    def _insert(self, batch: List[Tuple]) -> int:
+        sql = (f"INSERT OR IGNORE INTO mentions (key, {', '.join(COLUMNS)}, archived_at) "
+               f"VALUES ({', '.join('?' * (len(COLUMNS) + 2))})")
+        with self._lock, self._db:
+            # BEGIN IMMEDIATE takes the write lock first, so every id above `last` is ours
+            self._db.execute("BEGIN IMMEDIATE")
+            last = self._db.execute("SELECT COALESCE(MAX(id), 0) FROM mentions").fetchone()[0]
+            inserted = self._db.executemany(sql, batch).rowcount
+            self._db.execute("INSERT INTO mentions_fts (rowid, text) SELECT id, text FROM mentions WHERE id > ?",
+                             (last,))
+            return inserted
+
+    def add_frame(self, df, brand: Optional[str] = None, run_id: Optional[str] = None,
+                  source: str = "monitor") -> int:
+        """Archive a scored run_monitor DataFrame (one brand, or a "brand" column)."""
+        if df is None or df.empty:
+            return 0
+        # object dtype turns NumPy scalars into Python ones and lets NaN become None
+        frame = df.astype(object).where(df.notna(), None)
+        records = frame.to_dict(orient="records")
+        for record in records:
+            if brand is not None:
+                record["brand"] = brand
+            if run_id is not None:
+                record["run_id"] = run_id
+        return self.add_rows(records, source)
+
+    def add_batch(self, brand: Optional[str], batch, source: str = "agent") -> int:
+        """Archive a scored MentionBatch (see mention_batch) for `brand`."""
+        if not brand or not len(batch):
+            return 0
+        labels = [LABELS[c] if c >= 0 else None for c in batch.label.tolist()]
+        platforms = [batch.platforms[c] for c in batch.platform_codes.tolist()]
+        authors = [batch.authors[c] for c in batch.author_codes.tolist()]
+        compound = [None if c != c else round(c, 4) for c in batch.compound.tolist()]
+        rows = ({"brand": brand, "id": i, "platform": p, "author": a, "text": t, "url": u, "date": d,
+                 "engagement": e, "sentiment": s, "sentiment_score": c, "cluster_size": n}
+                for i, p, a, t, u, d, e, s, c, n in zip(
+                    batch.ids.to_list(), platforms, authors, batch.text.to_list(), batch.urls.to_list(),
+                    batch.created_at.to_list(), batch.engagement.tolist(), labels, compound,
+                    batch.cluster_size.tolist()))
+        return self.add_rows(rows, source)
+
+    # ---------- reads ----------
+    def search(self, brand: Optional[str] = None, query: Optional[str] = None, platforms: Sequence[str] = (),
+               sentiment: Optional[str] = None, start: Any = None, end: Any = None,
+               limit: int = ARCHIVE_PAGE_SIZE, cursor: Optional[str] = None, raw_query: bool = False
+               ) -> Dict[str, Any]:
+        """
+        Newest-first page of mentions matching every given filter. `query` is full text
+        (words ANDed; raw_query=True passes FTS5 syntax through); start / end bound the
+        mention date (inclusive, dates or datetimes). Returns {"items", "next_cursor"}; pass
+        next_cursor back for the following page (None on the last page).
+        """
+        limit = max(1, min(int(limit), ARCHIVE_MAX_PAGE_SIZE))
+        where, params = [], []
+        match = (query if raw_query else fts_query(query)) if query else None
+        if match:
+            with self._lock:
+                probe = self._common_match(match, limit)
+            if probe:
+                # common terms: walk the date index and test each row against the FTS index
+                where.append("EXISTS (SELECT 1 FROM mentions_fts WHERE mentions_fts MATCH ? AND rowid = m.id)")
+            else:
+                # rare terms: collect the (few) matching rowids once
+                where.append("m.id IN (SELECT rowid FROM mentions_fts WHERE mentions_fts MATCH ?)")
+            params.append(match)
+        if brand:
+            where.append("m.brand = ? COLLATE NOCASE")
+            params.append(brand)
+        if platforms:
+            where.append(f"m.platform IN ({', '.join('?' * len(platforms))})")
+            params.extend(platforms)
+        if sentiment:
+            where.append("m.sentiment = ?")
+            params.append(sentiment)
+        if start is not None:
+            where.append("m.date >= ?")
+            params.append(normalize_date(start))
+        if end is not None:
+            end_text = normalize_date(end)
+            if not isinstance(end, datetime) and len(str(end)) <= 10:
+                end_text = end_text[:10] + " 23:59:59"
+            where.append("m.date <= ?")
+            params.append(end_text)
+        if cursor:
+            date, _, last_id = cursor.rpartition("|")
+            where.append("(m.date, m.id) < (?, ?)")
+            params.extend([date, int(last_id)])
+
+        sql = (f"SELECT m.id, {', '.join('m.' + c for c in COLUMNS)} FROM mentions m"
+               + (f" WHERE {' AND '.join(where)}" if where else "")
+               + " ORDER BY m.date DESC, m.id DESC LIMIT ?")
+        with self._lock:
+            rows = self._db.execute(sql, [*params, limit + 1]).fetchall()
+        items = [dict(zip(("archive_id",) + COLUMNS, row)) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = f"{items[-1]['date']}|{items[-1]['archive_id']}"
+        for item in items:
+            item["date"] = item["date"] or None
+        return {"items": items, "next_cursor": next_cursor}
+
+    def _common_match(self, match: str, limit: int) -> bool:
+        """
+        True when walking rows newest first and probing the FTS index is cheaper than
+        listing every match: a page needs about limit * rows / matches probes, which beats
+        materializing `matches` rowids once matches exceed sqrt(limit * rows). Counting
+        stops at that threshold, so the check is cheap for common terms too.
+        """
+        rows = self._db.execute("SELECT COALESCE(MAX(id), 0) FROM mentions").fetchone()[0]
+        threshold = int((limit * rows) ** 0.5) + 1
+        found = self._db.execute("SELECT COUNT(*) FROM (SELECT rowid FROM mentions_fts WHERE mentions_fts MATCH ? "
+                                 "LIMIT ?)", (match, threshold)).fetchone()[0]
+        return found >= threshold
+
+    def count(self, brand: Optional[str] = None) -> int:
+        with self._lock:
+            if brand:
+                return self._db.execute("SELECT COUNT(*) FROM mentions WHERE brand = ? COLLATE NOCASE",
+                                        (brand,)).fetchone()[0]
+            return self._db.execute("SELECT COUNT(*) FROM mentions").fetchone()[0]
+
+    def brands(self) -> List[str]:
+        """One spelling per brand (brands that differ only by case are the same brand)."""
+        with self._lock:
+            return [r[0] for r in self._db.execute("SELECT MIN(brand) FROM mentions GROUP BY brand COLLATE NOCASE "
+                                                   "ORDER BY 1 COLLATE NOCASE")]
+
+    def optimize(self) -> None:
+        """Merge FTS segments and refresh planner statistics (after large imports)."""
+        with self._lock, self._db:
+            self._db.execute("INSERT INTO mentions_fts (mentions_fts) VALUES ('optimize')")
+            self._db.execute("PRAGMA optimize")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_archive: Optional[MentionArchive] = None
+_archive_lock = threading.Lock()
+
+
+def get_archive() -> Optional[MentionArchive]:
+    """Process-wide archive at MENTION_ARCHIVE_DB, or None when archiving is off (empty path)."""
+    global _archive
+    if ARCHIVE_DB_PATH is None:
+        return None
+    with _archive_lock:
+        if _archive is None:
+            _archive = MentionArchive(ARCHIVE_DB_PATH)
+        return _archive
+
+
+def archive_quietly(fn, *args, **kwargs) -> int:
+    """Run an archive write; failures are logged, never raised into the pipeline that called it."""
+    try:
+        return fn(*args, **kwargs)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning("Mention archive write failed: %s", e)
+        return 0
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+
+    parser = argparse.ArgumentParser(description="Mention archive")
+    sub = parser.add_subparsers(dest="command", required=True)
+    s = sub.add_parser("search", help="full-text / filtered search, newest first")
+    s.add_argument("query", nargs="?", default=None)
+    s.add_argument("--brand", default=None)
+    s.add_argument("--platform", action="append", default=[])
+    s.add_argument("--sentiment", choices=["positive", "neutral", "negative"], default=None)
+    s.add_argument("--days", type=int, default=None, help="only mentions dated in the last N days")
+    s.add_argument("--limit", type=int, default=20)
+    s.add_argument("--cursor", default=None)
+    i = sub.add_parser("import", help="archive monitoring CSV files (brand from the brand column / file name)")
+    i.add_argument("paths", nargs="+")
+    args = parser.parse_args()
+
+    archive = get_archive()
+    if archive is None:
+        raise SystemExit("MENTION_ARCHIVE_DB is empty; the archive is disabled.")
+    if args.command == "search":
+        start = datetime.utcnow() - timedelta(days=args.days) if args.days else None
+        t0 = time.perf_counter()
+        page = archive.search(args.brand, args.query, args.platform, args.sentiment, start=start, limit=args.limit,
+                              cursor=args.cursor)
+        for item in page["items"]:
+            print(f"{item['date'] or '-':19}  {item['brand']:<12} {item['platform'] or '-':<8} "
+                  f"{item['sentiment'] or '-':<8}  {item['text'][:100]}")
+        print(f"{len(page['items'])} result(s) in {(time.perf_counter() - t0) * 1000:.1f} ms; "
+              f"next cursor: {page['next_cursor']}")
+    elif args.command == "import":
+        import pandas as pd
+
+        total = 0
+        for path in sorted({p for pattern in args.paths for p in glob.glob(pattern)}):
+            df = pd.read_csv(path)
+            brand = None
+            if "brand" not in df.columns:
+                # monitoring_<brand>_<run id>.csv
+                brand = os.path.basename(path)[len("monitoring_"):].split("_")[0]
+            total += archive.add_frame(df, brand=brand, source="import")
+        archive.optimize()
+        print(f"Archived {total} new mention(s); {archive.count()} in total")
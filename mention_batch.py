@@ -0,0 +1,256 @@
+"""
+Columnar Mention Batch
+- Struct-of-arrays for one batch of mentions: platform and author as categorical codes
+  into small category lists, float32 score / engagement columns, int8 label codes, and every free-text
+  field (text, id, url, created_at) as one UTF-8 buffer addressed by an offsets array.
+  N mentions cost a few dozen arrays instead of N model objects + N dicts + a DataFrame.
+- Built once from the validated request (texts stripped, empty ones dropped); dedup,
+  scoring, counting, alerting and draft selection all work on it, and take(idx) keeps the
+  representatives without creating per-row objects.
+- Strings are decoded on demand: to_list() for whole-column passes, [i] for the few rows
+  that end up in the response.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+LABELS = ("negative", "neutral", "positive")
+LABEL_CODES = {label: code for code, label in enumerate(LABELS)}
+NEGATIVE, NEUTRAL, POSITIVE = range(3)
+UNSCORED = -1
+
+_LABEL_ARRAY = np.array(LABELS + ("",), dtype=object)  # index -1 -> "" (unscored)
+
+
+def encode_categories(values: Sequence[Optional[str]]) -> Tuple[np.ndarray, List[Optional[str]]]:
+    """(codes, categories) with categories in first-seen order; None is a category too."""
+    categories = list(dict.fromkeys(values))
+    lookup = {v: i for i, v in enumerate(categories)}
+    dtype = np.int8 if len(categories) <= 127 else np.int16 if len(categories) <= 32767 else np.int32
+    return np.fromiter(map(lookup.__getitem__, values), dtype=dtype, count=len(values)), categories
+
+
+def label_codes(labels: Sequence[Optional[str]]) -> np.ndarray:
+    """int8 codes for label strings (anything unknown -> UNSCORED)."""
+    labels = np.asarray(labels, dtype=object)
+    codes = np.full(len(labels), UNSCORED, dtype=np.int8)
+    for code, label in enumerate(LABELS):
+        codes[labels == label] = code
+    return codes
+
+
+def _cluster_size(value: Any) -> int:
+    try:
+        return max(1, int(value or 1))
+    except (TypeError, ValueError):
+        return 1
+
+
+def _engagement(metadata: Optional[Dict[str, Any]]) -> float:
+    if not metadata:
+        return 0.0
+    try:
+        return max(0.0, float(metadata.get("engagement") or 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class StringColumn:
+    """Optional strings packed into one UTF-8 buffer; row i is buffer[offsets[i]:offsets[i + 1]]."""
+
+    __slots__ = ("buffer", "offsets", "valid")
+
+    def __init__(self, buffer: bytearray, offsets: np.ndarray, valid: Optional[np.ndarray] = None):
+        self.buffer = buffer
+        self.offsets = offsets
+        self.valid = valid  # None -> no missing values
+
+    @classmethod
+    def from_values(cls, values: Sequence[Optional[str]], chunk: int = 4096) -> "StringColumn":
+        # encoded in chunks so only one chunk of bytes objects exists next to the buffer
+        buffer = bytearray()
+        lengths = np.zeros(len(values), dtype=np.int64)
+        for start in range(0, len(values), chunk):
+            encoded = [b"" if v is None else str(v).encode("utf-8") for v in values[start:start + chunk]]
+            lengths[start:start + len(encoded)] = list(map(len, encoded))
+            buffer += b"".join(encoded)
+        offsets = np.zeros(len(values) + 1, dtype=np.int32 if len(buffer) < 2 ** 31 else np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        valid = None
+        if any(v is None for v in values):
+            valid = np.fromiter((v is not None for v in values), dtype=bool, count=len(values))
+        return cls(buffer, offsets, valid)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        if self.valid is not None and not self.valid[i]:
+            return None
+        return self.buffer[self.offsets[i]:self.offsets[i + 1]].decode("utf-8")
+
+    def to_list(self) -> List[Optional[str]]:
+        """All values decoded (new str objects)."""
+        buf, bounds = self.buffer, self.offsets.tolist()
+        out = [buf[a:b].decode("utf-8") for a, b in zip(bounds, bounds[1:])]
+        if self.valid is not None:
+            for i in np.flatnonzero(~self.valid).tolist():
+                out[i] = None
+        return out
+
+    def take(self, idx: np.ndarray) -> "StringColumn":
+        starts, ends = self.offsets[idx], self.offsets[idx + 1]
+        view = memoryview(self.buffer)
+        buffer = bytearray().join([view[a:b] for a, b in zip(starts.tolist(), ends.tolist())])
+        offsets = np.zeros(len(idx) + 1, dtype=self.offsets.dtype)
+        np.cumsum(ends - starts, out=offsets[1:])
+        return StringColumn(buffer, offsets, None if self.valid is None else self.valid[idx])
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.buffer) + self.offsets.nbytes + (0 if self.valid is None else self.valid.nbytes)
+
+
+class MentionBatch:
+    __slots__ = ("text", "ids", "urls", "created_at", "platform_codes", "platforms", "author_codes", "authors",
+                 "neg", "neu", "pos", "compound", "label", "cluster_size", "engagement")
+
+    def __init__(self, text: StringColumn, ids: StringColumn, urls: StringColumn, created_at: StringColumn,
+                 platform_codes: np.ndarray, platforms: List[Optional[str]],
+                 author_codes: np.ndarray, authors: List[Optional[str]], compound: Optional[np.ndarray] = None,
+                 label: Optional[np.ndarray] = None, cluster_size: Optional[np.ndarray] = None,
+                 engagement: Optional[np.ndarray] = None):
+        n = len(text)
+        self.text = text
+        self.ids = ids
+        self.urls = urls
+        self.created_at = created_at
+        self.platform_codes = platform_codes
+        self.platforms = platforms
+        self.author_codes = author_codes
+        self.authors = authors
+        self.neg = np.full(n, np.nan, dtype=np.float32)
+        self.neu = np.full(n, np.nan, dtype=np.float32)
+        self.pos = np.full(n, np.nan, dtype=np.float32)
+        self.compound = compound if compound is not None else np.full(n, np.nan, dtype=np.float32)
+        self.label = label if label is not None else np.full(n, UNSCORED, dtype=np.int8)
+        self.cluster_size = cluster_size if cluster_size is not None else np.ones(n, dtype=np.int32)
+        self.engagement = engagement if engagement is not None else np.zeros(n, dtype=np.float32)
+
+    @classmethod
+    def from_mentions(cls, mentions: Iterable[Any]) -> Tuple["MentionBatch", List[str]]:
+        """
+        Batch from Mention-like objects (attributes id / platform / author / text /
+        created_at / metadata / compound / label / cluster_size). Texts are stripped and
+        empty ones dropped; upstream compound / label are kept (NaN / UNSCORED when absent),
+        an upstream cluster_size defaults to 1, and metadata["engagement"] (likes + shares +
+        replies, score, ...) defaults to 0.
+        Also returns the stripped texts themselves (no decoded copies) for the current
+        request's scoring / keyword passes.
+        """
+        mentions = mentions if isinstance(mentions, list) else list(mentions)
+        texts = [(m.text or "").strip() for m in mentions]
+        if not all(texts):
+            mentions = [m for m, t in zip(mentions, texts) if t]
+            texts = list(filter(None, texts))
+        platform_codes, platforms = encode_categories([m.platform for m in mentions])
+        author_codes, authors = encode_categories([m.author for m in mentions])
+        batch = cls(
+            text=StringColumn.from_values(texts),
+            ids=StringColumn.from_values([m.id for m in mentions]),
+            urls=StringColumn.from_values([m.metadata.get("url") if m.metadata else None for m in mentions]),
+            created_at=StringColumn.from_values([m.created_at for m in mentions]),
+            platform_codes=platform_codes, platforms=platforms,
+            author_codes=author_codes, authors=authors,
+            compound=np.array([m.compound for m in mentions], dtype=np.float32),  # None -> NaN
+            label=label_codes([m.label for m in mentions]),
+            cluster_size=np.array([_cluster_size(getattr(m, "cluster_size", None)) for m in mentions],
+                                  dtype=np.int32),
+            engagement=np.array([_engagement(m.metadata) for m in mentions], dtype=np.float32),
+        )
+        return batch, texts
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def take(self, idx: Sequence[int], cluster_size: Optional[Sequence[int]] = None,
+             engagement: Optional[Sequence[float]] = None) -> "MentionBatch":
+        """Rows `idx` (in that order) as a new batch; cluster_size / engagement replace the taken values."""
+        idx = np.asarray(idx, dtype=np.int64)
+        out = MentionBatch(
+            text=self.text.take(idx), ids=self.ids.take(idx), urls=self.urls.take(idx),
+            created_at=self.created_at.take(idx),
+            platform_codes=self.platform_codes[idx], platforms=self.platforms,
+            author_codes=self.author_codes[idx], authors=self.authors,
+            compound=self.compound[idx], label=self.label[idx],
+            cluster_size=(np.asarray(cluster_size, dtype=np.int32) if cluster_size is not None
+                          else self.cluster_size[idx]),
+            engagement=(np.asarray(engagement, dtype=np.float32) if engagement is not None
+                        else self.engagement[idx]),
+        )
+        out.neg, out.neu, out.pos = self.neg[idx], self.neu[idx], self.pos[idx]
+        return out
+
+    # ---------- scores ----------
+    def has_scores(self) -> np.ndarray:
+        """Rows carrying a usable upstream score (compound set and a known label)."""
+        return (self.label != UNSCORED) & ~np.isnan(self.compound)
+
+    def set_scores(self, sent: Dict[str, np.ndarray], idx: Optional[np.ndarray] = None) -> None:
+        """Store engine output (neg / neu / pos / compound + label strings) for all rows or rows `idx`."""
+        rows = slice(None) if idx is None else idx
+        for col in ("neg", "neu", "pos", "compound"):
+            getattr(self, col)[rows] = sent[col]
+        self.label[rows] = label_codes(sent["label"])
+
+    # ---------- aggregates / output ----------
+    def label_counts(self) -> Dict[str, int]:
+        counts = np.bincount(self.label[self.label >= 0], minlength=len(LABELS))
+        return {label: int(counts[code]) for code, label in enumerate(LABELS)}
+
+    def row(self, i: int) -> Dict[str, Any]:
+        return {
+            "id": self.ids[i],
+            "platform": self.platforms[self.platform_codes[i]],
+            "author": self.authors[self.author_codes[i]],
+            "created_at": self.created_at[i],
+            "text": self.text[i],
+            "compound": float(self.compound[i]),
+            "label": _LABEL_ARRAY[self.label[i]],
+            "cluster_size": int(self.cluster_size[i]),
+        }
+
+    def score_rows(self) -> List[Dict[str, Any]]:
+        """
+        id / platform / label / cluster_size / scores for every row, built column-wise
+        (one tolist() per column). Scores are rounded to 4 places; rows that kept an
+        upstream score have None for neg / neu / pos.
+        """
+        def column(values: np.ndarray) -> List[Optional[float]]:
+            out = np.round(values.astype(np.float64), 4).tolist()
+            if np.isnan(values).any():
+                out = [None if v != v else v for v in out]
+            return out
+
+        platforms = np.array(self.platforms, dtype=object)[self.platform_codes].tolist()
+        neg, neu, pos, compound = (column(c) for c in (self.neg, self.neu, self.pos, self.compound))
+        return [
+            {"id": i, "platform": p, "label": lab, "compound": c, "cluster_size": size,
+             "scores": {"neg": n, "neu": u, "pos": o, "compound": c}}
+            for i, p, lab, c, size, n, u, o in zip(self.ids.to_list(), platforms,
+                                                   _LABEL_ARRAY[self.label].tolist(), compound,
+                                                   self.cluster_size.tolist(), neg, neu, pos)
+        ]
+
+    def rows_with_label(self, label: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """First `limit` rows with that label as dicts (only these rows are materialized)."""
+        return [self.row(i) for i in np.flatnonzero(self.label == LABEL_CODES[label])[:limit].tolist()]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the columns (category lists excluded)."""
+        arrays = (self.platform_codes, self.author_codes, self.neg, self.neu, self.pos, self.compound,
+                  self.label, self.cluster_size, self.engagement)
+        strings = (self.text, self.ids, self.urls, self.created_at)
+        return sum(a.nbytes for a in arrays) + sum(s.nbytes for s in strings)
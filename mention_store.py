@@ -0,0 +1,253 @@
+"""
+Mention Store (Parquet, partitioned)
+- Append-only, zstd-compressed Parquet files under <root>/brand=<brand>/day=<YYYY-MM-DD>/.
+  Every write is a new part file tagged with a run_id, so writers never rewrite data.
+- Reads go through pyarrow.dataset: column projection and predicate pushdown (brand/day
+  prune whole directories; other filters use Parquet row-group statistics).
+- compact() merges the small part files of each partition into one.
+Run: python mention_store.py compact [--brand Tesla]
+"""
+
+import os
+import glob
+import hashlib
+import uuid
+from datetime import datetime, date
+from typing import Any, List, Optional, Sequence, Union
+from urllib.parse import quote
+
+import pandas as pd
+
+# Optional dependency (safe import); callers fall back to CSV when unavailable
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except Exception:
+    pa = ds = pq = None
+    PYARROW_AVAILABLE = False
+
+# Every part file is written with this schema (missing columns as nulls, unknown columns
+# dropped) so the dataset can be scanned without unifying per-file schemas.
+STORE_COLUMNS = [
+    ("platform", "string"), ("author", "string"), ("text", "string"), ("date", "string"),
+    ("url", "string"), ("engagement", "int64"), ("collected_at", "timestamp"),
+    ("sentiment_score", "float64"), ("sentiment", "string"), ("cluster_size", "int64"),
+    ("cluster_engagement", "float64"), ("run_id", "string"),
+]
+
+STORE_ROOT = os.getenv("MENTION_STORE_DIR", os.path.join("outputs", "store"))
+STORE_COMPRESSION = os.getenv("MENTION_STORE_COMPRESSION", "zstd")
+PARTITION_KEYS = ("brand", "day")
+
+DateLike = Union[str, date, datetime]
+
+
+def _day(value: DateLike) -> str:
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)[:10]
+
+
+def _arrow_type(name: str):
+    return pa.timestamp("us") if name == "timestamp" else pa.type_for_alias(name)
+
+
+def store_schema():
+    return pa.schema([(col, _arrow_type(kind)) for col, kind in STORE_COLUMNS])
+
+
+def _conform(frame: pd.DataFrame) -> "pa.Table":
+    arrays = []
+    for col, kind in STORE_COLUMNS:
+        typ = _arrow_type(kind)
+        if col not in frame.columns:
+            arrays.append(pa.nulls(len(frame), typ))
+        elif kind == "string":
+            values = frame[col].astype(object).where(frame[col].notna(), None)
+            arrays.append(pa.array([None if v is None else str(v) for v in values], type=typ))
+        elif kind == "int64":
+            arrays.append(pa.array(pd.to_numeric(frame[col], errors="coerce").fillna(0).astype("int64"), type=typ))
+        else:
+            arrays.append(pa.array(frame[col], type=typ, from_pandas=True))
+    return pa.Table.from_arrays(arrays, schema=store_schema())
+
+
+class MentionStore:
+    def __init__(self, root: str = STORE_ROOT, compression: str = STORE_COMPRESSION):
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("pyarrow is not installed; the Parquet mention store is unavailable.")
+        self.root = root
+        self.compression = compression
+        os.makedirs(root, exist_ok=True)
+
+    # ---------- writes ----------
+    def _partition_dir(self, brand: str, day: str) -> str:
+        return os.path.join(self.root, f"brand={quote(brand, safe='')}", f"day={day}")
+
+    def append(self, df: pd.DataFrame, brand: str, run_id: Optional[str] = None) -> List[str]:
+        """
+        Append scored rows for `brand`. Rows are split by collection day; each partition
+        gets one new part file. Returns the written paths.
+        """
+        if df.empty:
+            return []
+        run_id = run_id or datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        frame = df.drop(columns=[c for c in PARTITION_KEYS if c in df.columns]).copy()
+        if "collected_at" in frame.columns:
+            # collectors stamp rows with now_str(); a fixed format skips per-row format inference
+            collected = pd.to_datetime(frame["collected_at"], format="%Y-%m-%d %H:%M:%S", errors="coerce")
+        else:
+            collected = pd.Series(pd.NaT, index=frame.index)
+        frame["collected_at"] = collected.fillna(pd.Timestamp(datetime.utcnow()))
+        frame["run_id"] = run_id
+        days = frame["collected_at"].dt.strftime("%Y-%m-%d")
+
+        paths = []
+        for day, part in frame.groupby(days, sort=True):
+            directory = self._partition_dir(brand, day)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"part-{run_id}-{uuid.uuid4().hex[:8]}.parquet")
+            tmp = os.path.join(directory, f".{os.path.basename(path)}.tmp")
+            pq.write_table(_conform(part), tmp, compression=self.compression)
+            os.replace(tmp, path)  # readers never see half-written files
+            paths.append(path)
+        return paths
+
+    def append_brands(self, df: pd.DataFrame, run_id: Optional[str] = None) -> List[str]:
+        """Append rows of several brands (a "brand" column) under one run id."""
+        run_id = run_id or datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        paths = []
+        for brand, part in df.groupby("brand", sort=True):
+            paths.extend(self.append(part, str(brand), run_id=run_id))
+        return paths
+
+    # ---------- reads ----------
+    def dataset(self):
+        partitioning = ds.partitioning(pa.schema([("brand", pa.string()), ("day", pa.string())]), flavor="hive")
+        return ds.dataset(self.root, format="parquet", partitioning=partitioning, schema=store_schema().append(
+            pa.field("brand", pa.string())).append(pa.field("day", pa.string())))
+
+    def _filter(self, brand: Optional[str], start: Optional[DateLike], end: Optional[DateLike],
+                platforms: Optional[Sequence[str]], sentiment: Optional[str], run_id: Optional[str], extra: Any):
+        expr = None
+
+        def add(e):
+            nonlocal expr
+            expr = e if expr is None else expr & e
+
+        if brand is not None:
+            add(ds.field("brand") == brand)
+        if start is not None:
+            add(ds.field("day") >= _day(start))
+        if end is not None:
+            add(ds.field("day") <= _day(end))
+        if platforms:
+            add(ds.field("platform").isin(list(platforms)))
+        if sentiment is not None:
+            add(ds.field("sentiment") == sentiment)
+        if run_id is not None:
+            add(ds.field("run_id") == run_id)
+        if extra is not None:
+            add(extra)
+        return expr
+
+    def read(self, brand: Optional[str] = None, start: Optional[DateLike] = None, end: Optional[DateLike] = None,
+             columns: Optional[Sequence[str]] = None, platforms: Optional[Sequence[str]] = None,
+             sentiment: Optional[str] = None, run_id: Optional[str] = None, filter: Any = None) -> pd.DataFrame:
+        """
+        Query the store. brand/start/end prune partitions; platforms/sentiment/run_id and any
+        extra pyarrow `filter` expression are pushed down to the Parquet scan.
+        Partitions are by collection day (collected_at), so start / end select rows by when
+        they were collected, not by the mention's own `date`; filter on "date" for that.
+        """
+        if not glob.glob(os.path.join(self.root, "brand=*")):
+            return pd.DataFrame(columns=list(columns) if columns else None)
+        expr = self._filter(brand, start, end, platforms, sentiment, run_id, filter)
+        table = self.dataset().to_table(columns=list(columns) if columns else None, filter=expr)
+        return table.to_pandas()
+
+    def version(self, brand: Optional[str] = None) -> str:
+        """
+        Cheap fingerprint of the stored data (part file names, sizes, mtimes); changes
+        whenever a run is appended or partitions are compacted. Only stats files.
+        """
+        pattern = os.path.join(self.root, f"brand={quote(brand, safe='')}" if brand else "brand=*",
+                               "day=*", "part-*.parquet")
+        h = hashlib.blake2b(digest_size=12)
+        for path in sorted(glob.glob(pattern)):
+            st = os.stat(path)
+            h.update(f"{path}\0{st.st_size}\0{st.st_mtime_ns}\n".encode("utf-8"))
+        return h.hexdigest()
+
+    def read_new_runs(self, brand: str, known_runs: Sequence[str], since: Optional[DateLike] = None,
+                      columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Rows of runs not in `known_runs`, for incremental refresh. `since` (the last day
+        already loaded) prunes older partitions; the run_id filter is pushed down.
+        """
+        extra = ~ds.field("run_id").isin(list(known_runs)) if known_runs else None
+        return self.read(brand=brand, start=since, columns=columns, filter=extra)
+
+    def latest_run_id(self, brand: str) -> Optional[str]:
+        runs = self.read(brand=brand, columns=["run_id"])
+        return None if runs.empty else str(runs["run_id"].max())
+
+    def latest_run(self, brand: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Rows written by the brand's most recent monitoring run."""
+        run_id = self.latest_run_id(brand)
+        if run_id is None:
+            return pd.DataFrame(columns=list(columns) if columns else None)
+        return self.read(brand=brand, run_id=run_id, columns=columns)
+
+    # ---------- maintenance ----------
+    def compact(self, brand: Optional[str] = None, min_files: int = 2) -> int:
+        """
+        Merge the part files of every partition that has at least `min_files` into one
+        file (sorted by collected_at). Returns the number of partitions compacted.
+        """
+        pattern = os.path.join(self.root, f"brand={quote(brand, safe='')}" if brand else "brand=*", "day=*")
+        compacted = 0
+        for directory in sorted(glob.glob(pattern)):
+            parts = sorted(glob.glob(os.path.join(directory, "part-*.parquet")))
+            if len(parts) < min_files:
+                continue
+            table = pa.concat_tables([pq.read_table(p, schema=store_schema()) for p in parts])
+            table = table.sort_by("collected_at")
+            name = f"part-compacted-{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+            tmp = os.path.join(directory, f".{name}.tmp")
+            pq.write_table(table, tmp, compression=self.compression)
+            os.replace(tmp, os.path.join(directory, name))
+            for p in parts:
+                os.remove(p)
+            compacted += 1
+        return compacted
+
+
+_store: Optional[MentionStore] = None
+
+
+def get_store() -> Optional[MentionStore]:
+    """Shared store, or None when pyarrow is not installed."""
+    global _store
+    if _store is None and PYARROW_AVAILABLE:
+        _store = MentionStore()
+    return _store
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mention store maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    c = sub.add_parser("compact", help="merge small part files per partition")
+    c.add_argument("--brand", default=None)
+    c.add_argument("--min-files", type=int, default=2)
+    args = parser.parse_args()
+
+    if args.command == "compact":
+        n = MentionStore().compact(brand=args.brand, min_files=args.min_files)
+        print(f"[Store] Compacted {n} partition(s) under {STORE_ROOT}")
@@ -0,0 +1,192 @@
+"""
+Incremental Collection Cursors
+- One high-water mark per (brand, source, query keywords): the newest item date seen plus a
+  bounded set of recently seen item keys (url, else id, else text hash). An item is new
+  when its key was not seen and it is not older than the mark minus a small overlap (feeds
+  index some items late, so the overlap catches them while the key set drops repeats).
+- run_monitor narrows each fetch to the window since the oldest cursor, drops items that
+  are not new before dedup / scoring, and advances the cursors only after the rows were
+  written, so a failed run is collected again next time.
+- Cursors are kept in a JSON file (tmp + rename) so polling stays incremental across
+  restarts; runs for the same brand are serialized from filtering to the cursor update.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("monitor_cursors")
+
+MONITOR_INCREMENTAL = os.getenv("MONITOR_INCREMENTAL", "true").lower() in ("1", "true", "yes")
+MONITOR_CURSOR_PATH = os.getenv("MONITOR_CURSOR_PATH", os.path.join("outputs", "monitor_cursors.json"))
+MONITOR_CURSOR_OVERLAP = float(os.getenv("MONITOR_CURSOR_OVERLAP", 3600))  # seconds re-checked below the mark
+MONITOR_CURSOR_KEYS = int(os.getenv("MONITOR_CURSOR_KEYS", 5000))          # recent item keys kept per cursor
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"  # safe_date_str output; sorts lexicographically
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$")
+
+CursorKey = Tuple[str, str, Tuple[str, ...]]
+
+
+def cursor_key(brand: str, source: str, keywords: Sequence[str]) -> CursorKey:
+    return (brand.strip().lower(), source, tuple(sorted({k.strip().lower() for k in keywords if k and k.strip()})))
+
+
+def item_key(item: Dict[str, Any]) -> str:
+    for field in ("url", "id"):
+        value = item.get(field)
+        if value:
+            return str(value)
+    return "text:" + hashlib.blake2b(str(item.get("text") or "").encode("utf-8"), digest_size=12).hexdigest()
+
+
+def item_date(item: Dict[str, Any]) -> Optional[str]:
+    value = item.get("date")
+    return value if isinstance(value, str) and _DATE_RE.match(value) else None
+
+
+class Cursor:
+    def __init__(self, mark: Optional[str] = None, keys: Optional[List[str]] = None):
+        self.mark = mark                  # newest item date seen (DATE_FORMAT)
+        self.keys: Dict[str, None] = dict.fromkeys(keys or [])  # insertion-ordered, oldest first
+
+    def floor(self, overlap: float) -> Optional[str]:
+        if self.mark is None:
+            return None
+        return (datetime.strptime(self.mark, DATE_FORMAT) - timedelta(seconds=overlap)).strftime(DATE_FORMAT)
+
+    def is_new(self, item: Dict[str, Any], floor: Optional[str]) -> bool:
+        if item_key(item) in self.keys:
+            return False
+        date = item_date(item)
+        return floor is None or date is None or date >= floor
+
+    def advance(self, items: Sequence[Dict[str, Any]], max_keys: int) -> None:
+        for item in items:
+            key = item_key(item)
+            self.keys.pop(key, None)
+            self.keys[key] = None
+            date = item_date(item)
+            if date is not None and (self.mark is None or date > self.mark):
+                self.mark = date
+        while len(self.keys) > max_keys:
+            del self.keys[next(iter(self.keys))]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"mark": self.mark, "keys": list(self.keys)}
+
+
+class CursorStore:
+    def __init__(self, path: Optional[str] = MONITOR_CURSOR_PATH, overlap: float = MONITOR_CURSOR_OVERLAP,
+                 max_keys: int = MONITOR_CURSOR_KEYS):
+        self.path = path
+        self.overlap = overlap
+        self.max_keys = max_keys
+        self.cursors: Dict[CursorKey, Cursor] = {}
+        self._lock = threading.Lock()
+        self._brand_locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+        if self.path:
+            self.load()
+
+    def brand_lock(self, brand: str) -> threading.Lock:
+        """Held by run_monitor from filtering until the cursors are saved."""
+        with self._lock:
+            return self._brand_locks[brand.strip().lower()]
+
+    def get(self, brand: str, source: str, keywords: Sequence[str]) -> Optional[Cursor]:
+        return self.cursors.get(cursor_key(brand, source, keywords))
+
+    def fetch_days(self, brand: str, sources: Sequence[str], keywords: Sequence[str], days: int,
+                   now: Optional[datetime] = None) -> int:
+        """
+        Days window that still covers every source's cursor (never more than `days`); one
+        extra day absorbs feeds that report local rather than UTC times.
+        """
+        floors = []
+        for source in sources:
+            cursor = self.get(brand, source, keywords)
+            floor = cursor.floor(self.overlap) if cursor is not None else None
+            if floor is None:
+                return days
+            floors.append(datetime.strptime(floor, DATE_FORMAT))
+        if not floors:
+            return days
+        age = ((now or datetime.utcnow()) - min(floors)).total_seconds() / 86400
+        return max(1, min(days, math.ceil(age) + 1))
+
+    def filter_new(self, brand: str, keywords: Sequence[str], items: List[Dict[str, Any]]
+                   ) -> List[Dict[str, Any]]:
+        """Items not seen by their source's cursor (source = the item's platform)."""
+        floors: Dict[str, Tuple[Optional[Cursor], Optional[str]]] = {}
+        out = []
+        for item in items:
+            source = item.get("platform") or ""
+            if source not in floors:
+                cursor = self.get(brand, source, keywords)
+                floors[source] = (cursor, cursor.floor(self.overlap) if cursor is not None else None)
+            cursor, floor = floors[source]
+            if cursor is None or cursor.is_new(item, floor):
+                out.append(item)
+        return out
+
+    def advance(self, brand: str, keywords: Sequence[str], items: Sequence[Dict[str, Any]]) -> None:
+        per_source: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for item in items:
+            per_source[item.get("platform") or ""].append(item)
+        with self._lock:
+            for source, source_items in per_source.items():
+                key = cursor_key(brand, source, keywords)
+                self.cursors.setdefault(key, Cursor()).advance(source_items, self.max_keys)
+
+    # ---------- persistence ----------
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            state = {"cursors": [{"brand": k[0], "source": k[1], "keywords": list(k[2]), **c.to_dict()}
+                                 for k, c in self.cursors.items()]}
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning("Could not save monitor cursors to %s: %s", self.path, e)
+
+    def load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable monitor cursors %s: %s", self.path, e)
+            return
+        with self._lock:
+            self.cursors = {
+                (c["brand"], c["source"], tuple(c.get("keywords") or ())): Cursor(c.get("mark"), c.get("keys"))
+                for c in state.get("cursors", [])
+            }
+
+
+_store: Optional[CursorStore] = None
+_store_lock = threading.Lock()
+
+
+def get_cursor_store() -> CursorStore:
+    """Process-wide cursor store configured from the MONITOR_CURSOR_* environment variables."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CursorStore()
+        return _store
@@ -0,0 +1,169 @@
+"""
+Monitoring Job Queue
+- Runs run_monitor in-process on a bounded thread pool with the parameters the user
+  actually asked for (brand, platforms, keywords, days, limit).
+- Submitting a job identical to one that is still queued or running returns the existing
+  job id instead of collecting the same data twice.
+- Callers poll status(job_id) and read the rows with load_result(job_id) once it is done;
+  finished jobs are kept in a bounded history.
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+MONITOR_JOB_WORKERS = int(os.getenv("MONITOR_JOB_WORKERS", 2))
+MONITOR_JOB_HISTORY = int(os.getenv("MONITOR_JOB_HISTORY", 200))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+TERMINAL = (DONE, FAILED)
+
+JobKey = Tuple[str, Tuple[str, ...], Tuple[str, ...], int, int]
+
+
+def job_key(brand: str, platforms: Sequence[str], keywords: Sequence[str], days: int, limit: int) -> JobKey:
+    """Order / case / whitespace-insensitive identity of a monitoring request."""
+    return (
+        brand.strip().lower(),
+        tuple(sorted({p.strip().lower() for p in platforms if p and p.strip()})),
+        tuple(sorted({k.strip().lower() for k in keywords if k and k.strip()})),
+        int(days),
+        int(limit),
+    )
+
+
+class MonitorJob:
+    def __init__(self, brand: str, platforms: List[str], keywords: List[str], days: int, limit: int):
+        self.id = uuid.uuid4().hex[:12]
+        self.brand = brand
+        self.platforms = platforms
+        self.keywords = keywords
+        self.days = days
+        self.limit = limit
+        self.status = QUEUED
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[str] = None  # run id (mention store) or CSV path
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "brand": self.brand,
+            "platforms": list(self.platforms),
+            "keywords": list(self.keywords),
+            "days": self.days,
+            "limit": self.limit,
+            "result": self.result,
+            "error": self.error,
+            "queued_seconds": round((self.started_at or end) - self.submitted_at, 3),
+            "run_seconds": round(end - self.started_at, 3) if self.started_at else None,
+        }
+
+
+class MonitorJobQueue:
+    def __init__(self, workers: int = MONITOR_JOB_WORKERS, history: int = MONITOR_JOB_HISTORY):
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="monitor-job")
+        self.history = history
+        self.jobs: "OrderedDict[str, MonitorJob]" = OrderedDict()
+        self.in_flight: Dict[JobKey, str] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, brand: str, platforms: Sequence[str], keywords: Sequence[str], days: int = 7,
+               limit: int = 10) -> str:
+        """Queue a run (or join an identical queued/running one); returns the job id."""
+        key = job_key(brand, platforms, keywords, days, limit)
+        with self._lock:
+            existing = self.in_flight.get(key)
+            if existing is not None:
+                return existing
+            job = MonitorJob(brand.strip(), list(key[1]), [k.strip() for k in keywords if k and k.strip()],
+                             key[3], key[4])
+            self.jobs[job.id] = job
+            self.in_flight[key] = job.id
+            self._trim()
+        self.executor.submit(self._run, job, key)
+        return job.id
+
+    def _run(self, job: MonitorJob, key: JobKey) -> None:
+        from monitoring_agent_v3 import run_monitor
+
+        with self._lock:
+            job.status, job.started_at = RUNNING, time.time()
+        result, error = None, None
+        try:
+            result = run_monitor(job.brand, job.platforms, job.keywords, job.days, job.limit)
+        except Exception as e:
+            error = str(e)
+        finally:
+            # job fields change under the lock, so status() / list() never see a half-finished job
+            with self._lock:
+                job.result, job.error = result, error
+                job.status = FAILED if error is not None else DONE
+                job.finished_at = time.time()
+                self.in_flight.pop(key, None)
+
+    def _trim(self) -> None:
+        while len(self.jobs) > self.history:
+            oldest_id, oldest = next(iter(self.jobs.items()))
+            if oldest.status not in TERMINAL:
+                break
+            self.jobs.pop(oldest_id)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Snapshot (a new dict) of the job, or None for an unknown / trimmed id."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [job.to_dict() for job in reversed(self.jobs.values())]
+
+    def wait(self, job_id: str, timeout: Optional[float] = None, poll: float = 0.1) -> Optional[Dict[str, Any]]:
+        """Block until the job finishes (or timeout); returns its status."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            status = self.status(job_id)
+            if status is None or status["status"] in TERMINAL:
+                return status
+            if deadline is not None and time.monotonic() >= deadline:
+                return status
+            time.sleep(poll)
+
+    def load_result(self, job_id: str) -> Optional[pd.DataFrame]:
+        """Rows written by a finished job (None if it failed or found nothing)."""
+        job = self.status(job_id)
+        if job is None or job["status"] != DONE or not job["result"]:
+            return None
+        if job["result"].endswith(".csv"):
+            return pd.read_csv(job["result"])
+        from mention_store import get_store
+
+        store = get_store()
+        return store.read(brand=job["brand"], run_id=job["result"]) if store is not None else None
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_queue: Optional[MonitorJobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> MonitorJobQueue:
+    """Process-wide queue (survives Streamlit script reruns, since modules stay imported)."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = MonitorJobQueue()
+        return _queue
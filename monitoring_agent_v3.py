@@ -1,22 +1,18 @@
 import os
-import requests
-import xml.etree.ElementTree as ET
-from urllib.parse import quote_plus
-from datetime import datetime, timedelta
-import time
+from datetime import datetime
+import asyncio
+import functools
+import uuid
 import pandas as pd
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-
-# Optional modules
-try:
-    import snscrape.modules.twitter as sntwitter
-except Exception:
-    sntwitter = None
-
-try:
-    import praw
-except Exception:
-    praw = None
+from batch_sentiment import get_engine
+from sentiment_cache import get_cache
+from dedup import dedup_items
+from mention_store import get_store
+from mention_archive import archive_quietly, get_archive
+from monitor_cursors import MONITOR_INCREMENTAL, get_cursor_store
+from collectors import collect, fetch_items, mergeable_sources
+from collectors import brand_query, safe_date_str  # noqa: F401  (moved to collectors; kept importable here)
+from metrics import REGISTRY, write_textfile
 
 try:
     from dotenv import load_dotenv
@@ -25,198 +21,145 @@ except Exception:
     pass
 
 OUTPUT_DIR = "outputs"
+SOURCE_TIMEOUT = float(os.getenv("SOURCE_TIMEOUT", 20))      # seconds per source
+COLLECT_DEADLINE = float(os.getenv("COLLECT_DEADLINE", 30))  # seconds for the whole collection
+OUTPUT_FORMAT = os.getenv("OUTPUT_FORMAT", "parquet").lower()  # "parquet" (mention store) or "csv"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
-analyzer = SentimentIntensityAnalyzer()
-
-# Convert date safely
-def safe_date_str(value):
-    try:
-        if isinstance(value, datetime):
-            return value.strftime("%Y-%m-%d %H:%M:%S")
-        if isinstance(value, time.struct_time):
-            return datetime(*value[:6]).strftime("%Y-%m-%d %H:%M:%S")
-        if isinstance(value, (int, float)):
-            return datetime.fromtimestamp(value).strftime("%Y-%m-%d %H:%M:%S")
-        if isinstance(value, str):
-            try:
-                return datetime.fromisoformat(value.replace("Z", "+00:00")).strftime("%Y-%m-%d %H:%M:%S")
-            except Exception:
-                return value
-    except Exception:
-        return ""
-    return ""
-
-# ---------- Google News ----------
-def scrape_google_news(brand, keywords, days, limit):
-    results = []
-    try:
-        q = quote_plus(f"{brand} {' '.join(keywords)}")
-        since = (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%d")
-        rss_url = f"https://news.google.com/rss/search?q={q}+after:{since}&hl=en-US&gl=US&ceid=US:en"
-        resp = requests.get(rss_url, timeout=10)
-        resp.raise_for_status()
-
-        xml_text = resp.text.replace("xmlns=", "ns=")
-        root = ET.fromstring(xml_text)
-        for item in root.findall(".//item")[:limit]:
-            results.append({
-                "platform": "news",
-                "author": (item.findtext("source") or "Unknown").strip(),
-                "text": (item.findtext("title") or "") + " " + (item.findtext("description") or ""),
-                "date": safe_date_str(item.findtext("pubDate")),
-                "url": item.findtext("link") or "",
-                "engagement": 0,
-                "brand": brand,
-                "collected_at": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
-            })
-    except Exception as e:
-        print("[News] Error:", e)
-    return results
-
-# ---------- Twitter (robust) ----------
-def scrape_twitter(brand, keywords, days, limit):
-    results = []
-    if sntwitter is None:
-        print("[Twitter] snscrape not available.")
-        return results
-
-    try:
-        since = (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%d")
-        # build query safely (avoid extra spaces when keywords empty)
-        kw_part = " ".join(k.strip() for k in keywords if k and k.strip())
-        if kw_part:
-            query = f'"{brand}" {kw_part} since:{since}'
-        else:
-            query = f'"{brand}" since:{since}'
-
-        print(f"[Twitter] Query: {query}")
-        scraper = sntwitter.TwitterSearchScraper(query)
-        for i, tweet in enumerate(scraper.get_items()):
-            if i >= limit:
-                break
-
-            # author
-            author = ""
-            try:
-                author = getattr(getattr(tweet, "user", None), "username", "") or getattr(getattr(tweet, "user", None), "displayname", "") or ""
-            except Exception:
-                author = ""
-
-            # text/content
-            content = ""
-            try:
-                content = getattr(tweet, "content", "") or getattr(tweet, "renderedContent", "") or ""
-            except Exception:
-                content = ""
-
-            # date
-            date_str = ""
-            try:
-                date_str = safe_date_str(getattr(tweet, "date", None))
-            except Exception:
-                date_str = ""
-
-            # url / tweet id
-            try:
-                tweet_id = getattr(tweet, "id", None) or getattr(tweet, "tweetId", None)
-                if tweet_id and author:
-                    url = f"https://twitter.com/{author}/status/{tweet_id}"
-                else:
-                    url = getattr(tweet, "url", "") or ""
-            except Exception:
-                url = ""
-
-            # engagement counts (robustly handle missing fields / different names)
-            try:
-                like_count = int(getattr(tweet, "likeCount", None) or getattr(tweet, "likes", 0) or 0)
-            except Exception:
-                like_count = 0
-            try:
-                retweet_count = int(getattr(tweet, "retweetCount", None) or getattr(tweet, "retweets", 0) or 0)
-            except Exception:
-                retweet_count = 0
-            try:
-                reply_count = int(getattr(tweet, "replyCount", None) or getattr(tweet, "replies", 0) or 0)
-            except Exception:
-                reply_count = 0
-
-            engagement = like_count + retweet_count + reply_count
-
-            # skip empty content
-            if not content:
-                continue
-
-            results.append({
-                "platform": "twitter",
-                "author": author or "unknown",
-                "text": content[:400],
-                "date": date_str or datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
-                "url": url,
-                "engagement": engagement,
-                "brand": brand,
-                "collected_at": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
-            })
-
-    except Exception as e:
-        print("[Twitter] Error:", e)
-
-    return results
-
-
-# ---------- Reddit ----------
-def scrape_reddit(brand, keywords, limit):
-    results = []
-    if not praw or not os.getenv("REDDIT_CLIENT_ID"):
-        print("[Reddit] Skipping — missing credentials.")
-        return results
-
-    try:
-        reddit = praw.Reddit(
-            client_id=os.getenv("REDDIT_CLIENT_ID"),
-            client_secret=os.getenv("REDDIT_CLIENT_SECRET"),
-            user_agent=os.getenv("REDDIT_USER_AGENT", "monitoring-agent")
-        )
-        query = f"{brand} {' OR '.join(keywords)}"
-        for post in reddit.subreddit("all").search(query, limit=limit):
-            results.append({
-                "platform": "reddit",
-                "author": str(post.author),
-                "text": (post.title or "") + " " + (post.selftext[:300] or ""),
-                "date": datetime.fromtimestamp(post.created_utc).strftime("%Y-%m-%d %H:%M:%S"),
-                "url": f"https://www.reddit.com{post.permalink}",
-                "engagement": int(post.score),
-                "brand": brand,
-                "collected_at": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
-            })
-    except Exception as e:
-        print("[Reddit] Error:", e)
-    return results
+sentiment_cache = get_cache()
+
+MONITOR_STAGE_SECONDS = REGISTRY.histogram("monitor_stage_seconds", "Time per run_monitor stage", ["stage"])
+METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE", "")  # dump metrics here after a CLI run
+
+# ---------- Concurrent collection ----------
+# Sources are the collectors registered in collectors.py (news, twitter, reddit, ...); each
+# entry here is a blocking fn(brand, keywords, days, limit) -> list over one of them, for
+# thread-pool callers. brand may be a list for sources in MERGEABLE_SOURCES (one OR query).
+SOURCES = {name: functools.partial(fetch_items, name) for name in ("news", "twitter", "reddit")}
+MERGEABLE_SOURCES = mergeable_sources()
+
+
+def collect_sources(brand, platforms, keywords, days, limit, sources=None,
+                    per_source_timeout=SOURCE_TIMEOUT, total_deadline=COLLECT_DEADLINE, on_chunk=None):
+    """
+    Run every requested source at the same time (collectors.collect on a private loop).
+    A source that misses its timeout (or the overall deadline) keeps what it delivered and
+    the others' results are still returned. on_chunk(items) is called as items arrive.
+    Returns (items, timings) where timings maps
+    source -> {"status": ok|timeout|error|skipped, "seconds", "items"}.
+    """
+    return asyncio.run(collect(brand, platforms, keywords, days, limit, sources=sources,
+                               per_source_timeout=per_source_timeout, total_deadline=total_deadline,
+                               on_chunk=on_chunk))
+
+
+def prescore(items):
+    """Score texts into the sentiment cache while collection continues (score_and_store then hits)."""
+    sentiment_cache.score([item.get("text") or "" for item in items], get_engine().score_texts, inclusive=False)
+
 
 # ---------- Orchestrator ----------
-def run_monitor(brand, platforms, keywords, days=7, limit_per_platform=10):
-    all_items = []
-    if "news" in platforms:
-        all_items += scrape_google_news(brand, keywords, days, limit_per_platform)
-    if "twitter" in platforms:
-        all_items += scrape_twitter(brand, keywords, days, limit_per_platform)
-    if "reddit" in platforms:
-        all_items += scrape_reddit(brand, keywords, limit_per_platform)
+def run_monitor(brand, platforms, keywords, days=7, limit_per_platform=10,
+                per_source_timeout=SOURCE_TIMEOUT, total_deadline=COLLECT_DEADLINE, sources=None,
+                incremental=None):
+    """
+    Collect, dedup, score and store mentions for `brand`. Returns the run id (mention store),
+    the CSV path, or None when nothing (new) was found.
+    Incremental (default MONITOR_INCREMENTAL): the fetch window shrinks to what the brand's
+    per-source cursors have not covered yet, only items newer than the cursors are scored
+    and written, and the cursors advance once the rows are stored.
+    """
+    incremental = MONITOR_INCREMENTAL if incremental is None else incremental
+    cursors = get_cursor_store() if incremental else None
+    fetch_days = days
+    if cursors is not None:
+        fetch_days = cursors.fetch_days(brand, platforms, keywords, days)
+        if fetch_days < days:
+            print(f"[Monitor] Incremental: fetching the last {fetch_days} day(s) instead of {days}")
+
+    unseen = set()  # id() of collected items that were new when they arrived (incremental)
+
+    def on_chunk(items):
+        # sentiment runs alongside collection; in incremental runs only on items it will keep
+        if cursors is not None:
+            items = cursors.filter_new(brand, keywords, items)
+            unseen.update(map(id, items))
+        prescore(items)
+
+    with MONITOR_STAGE_SECONDS.time(stage="collect"):
+        all_items, timings = collect_sources(brand, platforms, keywords, fetch_days, limit_per_platform,
+                                             sources=sources, per_source_timeout=per_source_timeout,
+                                             total_deadline=total_deadline, on_chunk=on_chunk)
+    for name, t in timings.items():
+        print(f"[Monitor] {name}: {t['status']} — {t['items']} items in {t['seconds']:.2f}s")
 
     if not all_items:
         print("[Monitor] No data found.")
         return None
-
-    # Sentiment
-    for item in all_items:
-        s = analyzer.polarity_scores(item["text"])
-        item["sentiment_score"] = s["compound"]
-        item["sentiment"] = "positive" if s["compound"] > 0.05 else "negative" if s["compound"] < -0.05 else "neutral"
-
-    df = pd.DataFrame(all_items)
-    filename = os.path.join(OUTPUT_DIR, f"monitoring_{brand}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv")
-    df.to_csv(filename, index=False, encoding="utf-8")
+    if cursors is None:
+        return score_and_store(brand, all_items)
+
+    with cursors.brand_lock(brand):
+        collected = len(all_items)
+        # cursors only move forward, so re-checking the early survivors under the lock suffices
+        new_items = cursors.filter_new(brand, keywords, [item for item in all_items if id(item) in unseen])
+        print(f"[Monitor] Incremental: {len(new_items)} new of {collected} collected")
+        if not new_items:
+            return None
+        result = score_and_store(brand, new_items)
+        cursors.advance(brand, keywords, new_items)
+        cursors.save()
+        return result
+
+
+def new_run_id():
+    # microsecond timestamp first so run ids sort by time; suffix keeps concurrent runs apart
+    return f"{datetime.utcnow().strftime('%Y%m%d_%H%M%S_%f')}_{uuid.uuid4().hex[:4]}"
+
+
+def archive_run(df, brand, run_id):
+    """Add the scored rows to the searchable mention archive (brand=None: df has a brand column)."""
+    archive = get_archive()
+    if archive is None:
+        return
+    with MONITOR_STAGE_SECONDS.time(stage="archive"):
+        added = archive_quietly(archive.add_frame, df, brand, run_id)
+    print(f"[Monitor] Archived {added} new mention(s)")
+
+
+def score_and_store(brand, all_items):
+    """Dedup + score the items and append them to the mention store (or a CSV file)."""
+    # Collapse the same story / retweet / cross-post into one row with a cluster_size weight
+    collected = len(all_items)
+    with MONITOR_STAGE_SECONDS.time(stage="dedup"):
+        all_items = dedup_items(all_items)
+    if len(all_items) < collected:
+        print(f"[Monitor] Dedup: {collected} items -> {len(all_items)} unique")
+
+    # Sentiment (one vectorized pass; texts seen on earlier runs come from the cache)
+    with MONITOR_STAGE_SECONDS.time(stage="sentiment"):
+        df = pd.DataFrame(all_items)
+        scored = sentiment_cache.score(df["text"].tolist(), get_engine().score_texts, inclusive=False)
+    df["sentiment_score"] = scored["compound"]
+    df["sentiment"] = scored["label"]
+    stats = sentiment_cache.stats()
+    print(f"[Monitor] Sentiment cache: {stats['hits']} hits / {stats['misses']} misses")
+    run_id = new_run_id()
+    archive_run(df, brand, run_id)
+    store = get_store() if OUTPUT_FORMAT == "parquet" else None
+    if store is not None:
+        # Append to the brand/day-partitioned Parquet store; returns the run id
+        with MONITOR_STAGE_SECONDS.time(stage="write"):
+            paths = store.append(df, brand, run_id=run_id)
+        print(f"[Monitor] Appended {len(df)} rows to {store.root} ({len(paths)} part file(s), run {run_id})")
+        return run_id
+
+    filename = os.path.join(OUTPUT_DIR, f"monitoring_{brand}_{run_id}.csv")
+    with MONITOR_STAGE_SECONDS.time(stage="write"):
+        df.to_csv(filename, index=False, encoding="utf-8")
     print(f"[Monitor] Saved {len(df)} rows to {filename}")
     return filename
 
 if __name__ == "__main__":
     run_monitor("Tesla", ["news", "twitter"], ["autopilot", "battery"], 7, 10)
+    if METRICS_TEXTFILE:
+        write_textfile(METRICS_TEXTFILE)
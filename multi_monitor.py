@@ -0,0 +1,353 @@
+"""
+Multi-Brand Monitoring
+- One run for a list of brand configs ({"brand", "keywords", "platforms"}). Brands that
+  ask the same source for the same keywords share fetches: sources in MERGEABLE_SOURCES
+  get one OR query for up to MULTI_QUERY_MAX_BRANDS brands, the others one query per brand.
+- Fetches run concurrently as the collectors' async streams (MULTI_WORKERS at a time)
+  behind the process-wide per-source rate limits (rate_limit.get_limiter), so N brands
+  cost N / MULTI_QUERY_MAX_BRANDS requests per source instead of N, and never more than
+  each source tolerates. At the deadline unfinished fetches are cancelled and give their
+  rate-limit slots back.
+- Items of a merged query are routed back to every brand whose name appears in the text
+  or url (whole word, case-insensitive); items matching none are dropped and counted.
+- Dedup stays per brand; all brands' texts are then scored in one batched pass through the
+  sentiment cache, and every brand's rows go to the mention store under one run_id
+  (or one CSV with a brand column).
+- Incremental cursors work as in run_monitor: per (brand, source, keywords), advanced after
+  the write, with the brands' locks held in a fixed order.
+- Configs naming the same brand (compared case- and whitespace-insensitively, as the cursor
+  locks are) are merged into one: first spelling wins, keywords / platforms are unioned.
+Run: python multi_monitor.py brands.json [--days 7] [--limit 10]
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from batch_sentiment import get_engine
+from collectors import COLLECTORS, FETCH_ERRORS, FETCH_ITEMS, FETCH_SECONDS, CollectorQuery, as_collector
+from dedup import dedup_items
+from mention_store import get_store
+from monitor_cursors import MONITOR_INCREMENTAL, get_cursor_store
+from monitoring_agent_v3 import (COLLECT_DEADLINE, MERGEABLE_SOURCES, MONITOR_STAGE_SECONDS, OUTPUT_DIR, OUTPUT_FORMAT,
+                                 SOURCE_TIMEOUT, archive_run, new_run_id, sentiment_cache)
+from rate_limit import get_limiter
+from metrics import REGISTRY
+
+MULTI_QUERY_MAX_BRANDS = int(os.getenv("MULTI_QUERY_MAX_BRANDS", 5))  # brands per merged query
+MULTI_WORKERS = int(os.getenv("MULTI_WORKERS", 8))                    # concurrent fetches (all sources)
+
+UNROUTED_ITEMS = REGISTRY.counter("monitor_unrouted_items_total",
+                                  "Items of merged queries that matched no brand", ["source"])
+
+BrandConfig = Dict[str, Any]
+
+
+class FetchTask:
+    """One request to one source, on behalf of one or more brands."""
+
+    __slots__ = ("source", "brands", "keywords", "days", "limit")
+
+    def __init__(self, source: str, brands: List[str], keywords: List[str], days: int, limit: int):
+        self.source = source
+        self.brands = brands
+        self.keywords = keywords
+        self.days = days
+        self.limit = limit
+
+    @property
+    def query_brand(self):
+        return self.brands[0] if len(self.brands) == 1 else self.brands
+
+
+def merge_brand_configs(configs: Sequence[BrandConfig]) -> List[BrandConfig]:
+    """
+    One config per distinct brand.strip().lower(), in first-seen order: the first spelling
+    is kept and duplicates' keywords / platforms are added to it.
+    """
+    merged: Dict[str, BrandConfig] = {}
+    for c in configs:
+        brand = c["brand"].strip()
+        key = brand.lower()
+        if not key:
+            raise ValueError("brand config without a brand name")
+        target = merged.get(key)
+        if target is None:
+            merged[key] = {"brand": brand, "keywords": list(c.get("keywords") or []),
+                           "platforms": list(c.get("platforms") or [])}
+            continue
+        print(f"[Multi] Merging duplicate brand config {c['brand']!r} into {target['brand']!r}")
+        target["keywords"] = list(dict.fromkeys(target["keywords"] + list(c.get("keywords") or [])))
+        target["platforms"] = list(dict.fromkeys(target["platforms"] + list(c.get("platforms") or [])))
+    return list(merged.values())
+
+
+def load_brand_configs(path: str) -> List[BrandConfig]:
+    """Brand configs from a JSON list (or {"brands": [...]}), duplicates merged."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    configs = data.get("brands", []) if isinstance(data, dict) else data
+    return merge_brand_configs(configs)
+
+
+def brand_pattern(brand: str) -> "re.Pattern":
+    return re.compile(r"(?<!\w)" + re.escape(brand.strip()) + r"(?!\w)", re.IGNORECASE)
+
+
+def plan_fetches(configs: Sequence[BrandConfig], days: int, limit_per_brand: int,
+                 sources: Dict[str, Callable], mergeable: Sequence[str] = MERGEABLE_SOURCES,
+                 max_brands: int = MULTI_QUERY_MAX_BRANDS, cursors=None) -> List[FetchTask]:
+    """
+    Fetch tasks covering every (brand, platform): brands sharing a mergeable source and the
+    same keywords are chunked into OR queries. A merged task asks for limit_per_brand per
+    brand and for the widest window any of its brands' cursors still needs.
+    """
+    groups: Dict[Tuple[str, Tuple[str, ...]], List[BrandConfig]] = defaultdict(list)
+    for config in configs:
+        keywords = tuple(sorted({k.strip().lower() for k in config["keywords"] if k and k.strip()}))
+        for platform in dict.fromkeys(config["platforms"]):
+            if platform in sources:
+                groups[(platform, keywords)].append(config)
+
+    tasks = []
+    for (source, _), members in groups.items():
+        step = max(1, max_brands) if source in mergeable else 1
+        for start in range(0, len(members), step):
+            chunk = members[start:start + step]
+            fetch_days = days
+            if cursors is not None:
+                fetch_days = max(cursors.fetch_days(c["brand"], [source], c["keywords"], days) for c in chunk)
+            tasks.append(FetchTask(source, [c["brand"] for c in chunk], list(chunk[0]["keywords"]),
+                                   fetch_days, limit_per_brand * len(chunk)))
+    return tasks
+
+
+def run_fetches(tasks: Sequence[FetchTask], sources: Optional[Dict[str, Any]] = None,
+                per_source_timeout: float = SOURCE_TIMEOUT, total_deadline: float = COLLECT_DEADLINE,
+                workers: int = MULTI_WORKERS
+                ) -> Tuple[List[Tuple[FetchTask, List[Dict[str, Any]]]], Dict[str, Dict[str, Any]]]:
+    """
+    Run the tasks as async collectors (see collectors.collect) on a private loop, at most
+    `workers` at a time, behind the per-source limiters. `sources` overrides the registry
+    (name -> Collector or fn(brand, keywords, days, limit)). Each fetch may spend
+    per_source_timeout from its start and keeps the items it delivered when it runs out;
+    at total_deadline whatever is still waiting or running is cancelled, which releases its
+    limiter slot and stops a registered collector's reader (a plain function keeps its
+    worker thread until it returns). Returns ([(task, items)], timings) with timings
+    aggregated per source.
+    """
+    results: List[Tuple[FetchTask, List[Dict[str, Any]]]] = []
+    timings: Dict[str, Dict[str, Any]] = {}
+    if not tasks:
+        return results, timings
+
+    def record(source, status, seconds, items=0):
+        t = timings.setdefault(source, {"requests": 0, "ok": 0, "timeout": 0, "error": 0, "seconds": 0.0,
+                                        "items": 0})
+        t["requests"] += 1
+        t[status] += 1
+        t["seconds"] = round(max(t["seconds"], seconds), 3)
+        t["items"] += items
+        FETCH_SECONDS.observe(seconds, source=source, status=status)
+
+    async def fetch_all():
+        deadline = time.monotonic() + total_deadline
+        gate = asyncio.Semaphore(max(1, workers))
+
+        def remaining() -> float:
+            return max(0.0, deadline - time.monotonic())
+
+        async def fetch(task: FetchTask) -> None:
+            items: List[Dict[str, Any]] = []
+            fetch_start = None
+            status = "ok"
+
+            async def read(stream):
+                async for entry in stream:
+                    items.extend(entry if isinstance(entry, list) else [entry])
+                    if len(items) >= task.limit:
+                        break
+
+            async def run():
+                nonlocal fetch_start
+                async with gate, get_limiter(task.source).async_slot(timeout=remaining()):
+                    fetch_start = time.monotonic()
+                    stream = collector.stream(CollectorQuery(task.query_brand, task.keywords, task.days, task.limit))
+                    try:
+                        await asyncio.wait_for(read(stream), min(per_source_timeout, remaining()))
+                    finally:
+                        await stream.aclose()
+
+            try:
+                collector = as_collector(task.source, None if sources is None else sources[task.source])
+                reason = collector.unavailable()
+                if reason:
+                    print(f"[{task.source}] Skipping — {reason}.")
+                    return
+                await asyncio.wait_for(run(), remaining())
+            except asyncio.TimeoutError:
+                status = "timeout"
+                print(f"[Multi] {task.source} {task.brands} timed out — keeping {len(items)} item(s).")
+            except Exception as e:
+                status = "error"
+                print(f"[Multi] {task.source} {task.brands}: {e}")
+            finally:
+                kept = items[:task.limit] if status != "error" else []
+                record(task.source, status, time.monotonic() - fetch_start if fetch_start is not None else 0.0,
+                       len(kept))
+                if status != "ok":
+                    FETCH_ERRORS.inc(source=task.source, kind=status)
+                if kept:
+                    results.append((task, kept))
+                    FETCH_ITEMS.inc(len(kept), source=task.source)
+
+        await asyncio.gather(*(fetch(task) for task in tasks))
+
+    asyncio.run(fetch_all())
+    # task order, not completion order, so routing (and the limit cap) is deterministic
+    order = {id(task): i for i, task in enumerate(tasks)}
+    results.sort(key=lambda r: order[id(r[0])])
+    return results, timings
+
+
+def route_items(results: Sequence[Tuple[FetchTask, List[Dict[str, Any]]]], limit_per_brand: int
+                ) -> Tuple[Dict[str, List[Dict[str, Any]]], int]:
+    """
+    Items per brand. A single-brand task's items all belong to it; a merged task's items go
+    to each brand named in the text or url (an item can belong to several brands). At most
+    limit_per_brand items per (brand, source). Returns (per_brand, unrouted count).
+    """
+    per_brand: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    taken: Dict[Tuple[str, str], int] = defaultdict(int)
+    patterns: Dict[str, "re.Pattern"] = {}
+    unrouted = 0
+    for task, items in results:
+        for item in items:
+            if len(task.brands) == 1:
+                targets = task.brands
+            else:
+                haystack = f"{item.get('text') or ''}\n{item.get('url') or ''}"
+                targets = [b for b in task.brands
+                           if (patterns.get(b) or patterns.setdefault(b, brand_pattern(b))).search(haystack)]
+                if not targets:
+                    unrouted += 1
+                    UNROUTED_ITEMS.inc(source=task.source)
+                    continue
+            for brand in targets:
+                if taken[(brand, task.source)] >= limit_per_brand:
+                    continue
+                taken[(brand, task.source)] += 1
+                per_brand[brand].append({**item, "brand": brand})
+    return per_brand, unrouted
+
+
+def score_and_store_brands(per_brand: Dict[str, List[Dict[str, Any]]]) -> Tuple[Optional[str], Dict[str, int]]:
+    """
+    Per-brand dedup, one scoring pass over all brands' texts, one write. Returns
+    (run id or CSV path, rows per brand).
+    """
+    frames, rows = [], {}
+    with MONITOR_STAGE_SECONDS.time(stage="dedup"):
+        for brand, items in per_brand.items():
+            unique = dedup_items(items)
+            rows[brand] = len(unique)
+            frames.append(pd.DataFrame(unique))
+    if not frames:
+        return None, rows
+    df = pd.concat(frames, ignore_index=True)
+
+    with MONITOR_STAGE_SECONDS.time(stage="sentiment"):
+        scored = sentiment_cache.score(df["text"].tolist(), get_engine().score_texts, inclusive=False)
+    df["sentiment_score"] = scored["compound"]
+    df["sentiment"] = scored["label"]
+    stats = sentiment_cache.stats()
+    print(f"[Multi] Scored {len(df)} rows for {len(rows)} brand(s); "
+          f"cache {stats['hits']} hits / {stats['misses']} misses")
+
+    run_id = new_run_id()
+    archive_run(df, None, run_id)
+    store = get_store() if OUTPUT_FORMAT == "parquet" else None
+    if store is not None:
+        with MONITOR_STAGE_SECONDS.time(stage="write"):
+            paths = store.append_brands(df, run_id=run_id)
+        print(f"[Multi] Appended {len(df)} rows to {store.root} ({len(paths)} part file(s), run {run_id})")
+        return run_id, rows
+
+    filename = os.path.join(OUTPUT_DIR, f"monitoring_multi_{run_id}.csv")
+    with MONITOR_STAGE_SECONDS.time(stage="write"):
+        df.to_csv(filename, index=False, encoding="utf-8")
+    print(f"[Multi] Saved {len(df)} rows to {filename}")
+    return filename, rows
+
+
+def run_multi_monitor(configs: Sequence[BrandConfig], days: int = 7, limit_per_brand: int = 10,
+                      per_source_timeout: float = SOURCE_TIMEOUT, total_deadline: float = COLLECT_DEADLINE,
+                      sources: Optional[Dict[str, Any]] = None, mergeable: Sequence[str] = MERGEABLE_SOURCES,
+                      incremental: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Collect, dedup, score and store mentions for several brands in one run. Returns
+    {"run_id" (run id / CSV path / None), "brands": {brand: {"collected", "new", "rows"}},
+    "requests", "unrouted", "timings"}. `sources` overrides the collector registry (see run_fetches).
+    """
+    configs = merge_brand_configs(configs)  # one lock / cursor set / summary entry per brand
+    incremental = MONITOR_INCREMENTAL if incremental is None else incremental
+    cursors = get_cursor_store() if incremental else None
+    keywords = {c["brand"]: c["keywords"] for c in configs}
+
+    tasks = plan_fetches(configs, days, limit_per_brand, COLLECTORS if sources is None else sources, mergeable,
+                         cursors=cursors)
+    print(f"[Multi] {len(configs)} brand(s) -> {len(tasks)} fetch(es)")
+    with MONITOR_STAGE_SECONDS.time(stage="collect"):
+        results, timings = run_fetches(tasks, sources, per_source_timeout, total_deadline)
+    for name, t in timings.items():
+        print(f"[Multi] {name}: {t['ok']}/{t['requests']} ok, {t['items']} items, slowest {t['seconds']:.2f}s")
+    per_brand, unrouted = route_items(results, limit_per_brand)
+    if unrouted:
+        print(f"[Multi] {unrouted} item(s) matched no brand")
+
+    summary = {c["brand"]: {"collected": len(per_brand.get(c["brand"], [])), "new": 0, "rows": 0} for c in configs}
+    out = {"run_id": None, "brands": summary, "requests": len(tasks), "unrouted": unrouted, "timings": timings}
+    if not per_brand:
+        print("[Multi] No data found.")
+        return out
+
+    with ExitStack() as stack:
+        if cursors is not None:
+            for brand in sorted(per_brand, key=lambda b: b.strip().lower()):
+                stack.enter_context(cursors.brand_lock(brand))
+            per_brand = {b: cursors.filter_new(b, keywords[b], items) for b, items in per_brand.items()}
+            per_brand = {b: items for b, items in per_brand.items() if items}
+        for brand, items in per_brand.items():
+            summary[brand]["new"] = len(items)
+        if not per_brand:
+            print("[Multi] Incremental: nothing new")
+            return out
+        out["run_id"], rows = score_and_store_brands(per_brand)
+        for brand, n in rows.items():
+            summary[brand]["rows"] = n
+        if cursors is not None:
+            for brand, items in per_brand.items():
+                cursors.advance(brand, keywords[brand], items)
+            cursors.save()
+    return out
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Monitor several brands in one run")
+    parser.add_argument("config", help='JSON list of {"brand", "keywords", "platforms"}')
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--limit", type=int, default=10, help="items per brand and source")
+    args = parser.parse_args()
+
+    result = run_multi_monitor(load_brand_configs(args.config), days=args.days, limit_per_brand=args.limit)
+    for brand, s in result["brands"].items():
+        print(f"{brand}: {s['collected']} collected, {s['new']} new, {s['rows']} rows")
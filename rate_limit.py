@@ -0,0 +1,128 @@
+"""
+Per-Source Rate Limits
+- One token bucket (requests/second + burst) and one concurrency cap per source, shared
+  by every collector thread in the process, so single-brand runs, multi-brand runs and
+  concurrent jobs together stay within what each source tolerates.
+- Waiting for a slot counts against the caller's timeout; a source that cannot be reached
+  in time raises RateLimited instead of blocking the run. slot() is for threads,
+  async_slot() for coroutines (same bucket and cap, waits without blocking the loop).
+- Limits come from SOURCE_RATE_LIMITS ("news=2,twitter=1,reddit=1"); sources not listed
+  are only bounded by SOURCE_MAX_CONCURRENCY.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+from metrics import REGISTRY
+
+SOURCE_RATE_LIMITS = os.getenv("SOURCE_RATE_LIMITS", "news=2,twitter=1,reddit=1")  # requests per second
+SOURCE_RATE_BURST = float(os.getenv("SOURCE_RATE_BURST", 2))
+SOURCE_MAX_CONCURRENCY = int(os.getenv("SOURCE_MAX_CONCURRENCY", 4))
+
+RATE_LIMIT_WAIT = REGISTRY.histogram("monitor_rate_limit_wait_seconds", "Time spent waiting for a source slot",
+                                     ["source"])
+
+
+class RateLimited(TimeoutError):
+    pass
+
+
+def parse_limits(spec: str) -> Dict[str, float]:
+    limits = {}
+    for part in spec.split(","):
+        name, _, rate = part.partition("=")
+        if name.strip() and rate.strip():
+            limits[name.strip()] = float(rate)
+    return limits
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float = SOURCE_RATE_BURST):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        Take one token, possibly ahead of time; returns how long to wait before using it,
+        or None (nothing taken) when that would exceed max_wait.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+            if max_wait is not None and wait > max_wait:
+                return None
+            self.tokens -= 1
+            return wait
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        wait = self.reserve(timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+
+class SourceLimiter:
+    def __init__(self, name: str, rate: Optional[float], concurrency: int = SOURCE_MAX_CONCURRENCY):
+        self.name = name
+        self.bucket = TokenBucket(rate) if rate else None
+        self.slots = threading.BoundedSemaphore(max(1, concurrency))
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None) -> Iterator[None]:
+        """Hold one of the source's concurrent slots, after its rate allows another request."""
+        t0 = time.monotonic()
+        if not self.slots.acquire(timeout=timeout):
+            raise RateLimited(f"{self.name}: no free slot within {timeout:.2f}s")
+        try:
+            left = None if timeout is None else max(0.0, timeout - (time.monotonic() - t0))
+            if self.bucket is not None and not self.bucket.acquire(left):
+                raise RateLimited(f"{self.name}: rate limit not reached within {timeout:.2f}s")
+            RATE_LIMIT_WAIT.observe(time.monotonic() - t0, source=self.name)
+            yield
+        finally:
+            self.slots.release()
+
+    @asynccontextmanager
+    async def async_slot(self, timeout: Optional[float] = None, poll: float = 0.05) -> AsyncIterator[None]:
+        """slot() for coroutines; polls the semaphore so a cancelled waiter never leaks a slot."""
+        t0 = time.monotonic()
+        while not self.slots.acquire(blocking=False):
+            if timeout is not None and time.monotonic() - t0 >= timeout:
+                raise RateLimited(f"{self.name}: no free slot within {timeout:.2f}s")
+            await asyncio.sleep(poll)
+        try:
+            left = None if timeout is None else max(0.0, timeout - (time.monotonic() - t0))
+            wait = self.bucket.reserve(left) if self.bucket is not None else 0.0
+            if wait is None:
+                raise RateLimited(f"{self.name}: rate limit not reached within {timeout:.2f}s")
+            if wait > 0:
+                await asyncio.sleep(wait)
+            RATE_LIMIT_WAIT.observe(time.monotonic() - t0, source=self.name)
+            yield
+        finally:
+            self.slots.release()
+
+
+_limiters: Dict[str, SourceLimiter] = {}
+_limiters_lock = threading.Lock()
+_rates = parse_limits(SOURCE_RATE_LIMITS)
+
+
+def get_limiter(source: str) -> SourceLimiter:
+    """Process-wide limiter for `source`."""
+    with _limiters_lock:
+        limiter = _limiters.get(source)
+        if limiter is None:
+            limiter = _limiters[source] = SourceLimiter(source, _rates.get(source))
+        return limiter
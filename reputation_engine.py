@@ -0,0 +1,264 @@
+"""
+Weighted Reputation Engine
+- Every mention pulls the score by its compound sentiment (so intensity counts, not just
+  the label), weighted by reach and age:
+      weight = (1 + REPUTATION_ENGAGEMENT_WEIGHT * log1p(engagement)) * 0.5 ** (age / half-life)
+      score  = 50 + 50 * sum(weight * compound) / sum(weight)       (clipped to 0..100)
+  A viral complaint moves the score more than an unseen one; week-old mentions fade.
+- A batch is reduced in one NumPy pass (weights, then bincount per platform) to a few
+  running sums; per brand those sums are kept decayed to their last update, so folding in a
+  batch and querying the score cost O(platforms) whatever the history - nothing is rescanned.
+- Totals are checkpointed to a JSON file (tmp + rename) and reloaded on start.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from mention_batch import MentionBatch
+
+logger = logging.getLogger("reputation_engine")
+
+REPUTATION_HALF_LIFE_HOURS = float(os.getenv("REPUTATION_HALF_LIFE_HOURS", 72))
+REPUTATION_ENGAGEMENT_WEIGHT = float(os.getenv("REPUTATION_ENGAGEMENT_WEIGHT", 1.0))
+REPUTATION_STATE_PATH = os.getenv("REPUTATION_STATE_PATH", os.path.join("outputs", "reputation_state.json"))
+REPUTATION_CHECKPOINT_SECONDS = float(os.getenv("REPUTATION_CHECKPOINT_SECONDS", 60))
+
+NUM, DEN, COUNT = 0, 1, 2  # columns of the running sums: sum(w * compound), sum(w), mentions
+
+
+def weighted_score(num: float, den: float) -> float:
+    if den <= 0:
+        return 50.0
+    return round(max(0.0, min(100.0, 50 + 50 * float(num) / float(den))), 2)
+
+
+def parse_timestamps(values: Sequence[Optional[str]]) -> np.ndarray:
+    """
+    Epoch seconds (float64, NaN when missing / unparseable) for ISO-like date strings.
+    RFC 822 dates (raw RSS pubDate) are accepted too and read as UTC.
+    """
+    out = np.full(len(values), np.nan)
+    cleaned = [v[:19] if isinstance(v, str) and len(v) >= 10 else "NaT" for v in values]
+    try:
+        parsed = np.array(cleaned, dtype="datetime64[s]")
+    except ValueError:
+        parsed = np.array([_parse_one(v) for v in values], dtype="datetime64[s]")
+    ok = ~np.isnat(parsed)
+    out[ok] = parsed[ok].astype(np.int64)
+    return out
+
+
+def _parse_one(value: Optional[str]) -> str:
+    if not isinstance(value, str) or len(value) < 10:
+        return "NaT"
+    try:
+        return datetime.fromisoformat(value[:19]).strftime("%Y-%m-%dT%H:%M:%S")
+    except ValueError:
+        pass
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return "NaT"
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def mention_weights(engagement: np.ndarray, timestamps: np.ndarray, now: float,
+                    half_life: float = REPUTATION_HALF_LIFE_HOURS * 3600,
+                    engagement_weight: float = REPUTATION_ENGAGEMENT_WEIGHT) -> np.ndarray:
+    """Reach x recency weight per mention; undated mentions count as current."""
+    age = np.where(np.isnan(timestamps), 0.0, now - timestamps)
+    recency = np.exp2(-np.clip(age, 0.0, None) / half_life)
+    return (1.0 + engagement_weight * np.log1p(np.clip(engagement, 0.0, None))) * recency
+
+
+class ReputationTotals:
+    """Running weighted sums (overall and per platform), decayed to `ref` (epoch seconds)."""
+
+    def __init__(self, ref: Optional[float] = None):
+        self.ref = ref
+        self.sums = np.zeros(3)
+        self.platforms: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_batch(cls, batch: MentionBatch, now: float, half_life: float = REPUTATION_HALF_LIFE_HOURS * 3600,
+                   engagement_weight: float = REPUTATION_ENGAGEMENT_WEIGHT) -> "ReputationTotals":
+        """
+        Sums over the scored rows of `batch` in one pass. Deduplicated rows weigh as their
+        whole cluster (cluster_size copies, summed engagement).
+        """
+        totals = cls(now)
+        scored = ~np.isnan(batch.compound)
+        if not scored.any():
+            return totals
+        w = mention_weights(batch.engagement[scored].astype(np.float64),
+                            parse_timestamps(batch.created_at.to_list())[scored], now, half_life,
+                            engagement_weight) * batch.cluster_size[scored]
+        compound = batch.compound[scored].astype(np.float64)
+        codes = batch.platform_codes[scored].astype(np.int64)
+        n = len(batch.platforms)
+        per_code = np.stack([np.bincount(codes, weights=w * compound, minlength=n),
+                             np.bincount(codes, weights=w, minlength=n),
+                             np.bincount(codes, weights=batch.cluster_size[scored], minlength=n)], axis=1)
+        for name, sums in zip(batch.platforms, per_code):
+            if sums[COUNT]:
+                name = name or "unknown"
+                totals.platforms[name] = totals.platforms[name] + sums if name in totals.platforms else sums
+        totals.sums = per_code.sum(axis=0)
+        return totals
+
+    def decay_to(self, ref: float, half_life: float) -> None:
+        if self.ref is not None and ref > self.ref:
+            factor = 2.0 ** (-(ref - self.ref) / half_life)
+            self.sums[:COUNT] *= factor
+            for sums in self.platforms.values():
+                sums[:COUNT] *= factor
+        if self.ref is None or ref > self.ref:
+            self.ref = ref
+
+    def merge(self, other: "ReputationTotals", half_life: float = REPUTATION_HALF_LIFE_HOURS * 3600) -> None:
+        """Add `other` (both are first decayed to the later of the two reference times)."""
+        if other.ref is None:
+            return
+        ref = other.ref if self.ref is None else max(self.ref, other.ref)
+        self.decay_to(ref, half_life)
+        if other.ref < ref:
+            other = other.copy()
+            other.decay_to(ref, half_life)
+        self.sums += other.sums
+        for name, sums in other.platforms.items():
+            self.platforms[name] = self.platforms[name] + sums if name in self.platforms else sums.copy()
+
+    def copy(self) -> "ReputationTotals":
+        out = ReputationTotals(self.ref)
+        out.sums = self.sums.copy()
+        out.platforms = {k: v.copy() for k, v in self.platforms.items()}
+        return out
+
+    def summary(self, factor: float = 1.0) -> Dict[str, Any]:
+        """
+        Score, decayed weight (x factor) and mention count, overall and per platform.
+        The count is "represented_mentions": deduplicated rows count as their whole cluster,
+        so it includes the collapsed copies (total_mentions + duplicates_collapsed).
+        """
+        def one(sums):
+            return {"score": weighted_score(sums[NUM], sums[DEN]), "weight": round(float(sums[DEN]) * factor, 3),
+                    "represented_mentions": int(sums[COUNT])}
+        return {**one(self.sums), "by_platform": {p: one(s) for p, s in sorted(self.platforms.items())}}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"ref": self.ref, "sums": self.sums.tolist(),
+                "platforms": {p: s.tolist() for p, s in self.platforms.items()}}
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "ReputationTotals":
+        totals = cls(d.get("ref"))
+        totals.sums = np.asarray(d.get("sums") or [0.0, 0.0, 0.0], dtype=np.float64)
+        totals.platforms = {p: np.asarray(s, dtype=np.float64) for p, s in (d.get("platforms") or {}).items()}
+        return totals
+
+
+class ReputationEngine:
+    def __init__(self, half_life_hours: float = REPUTATION_HALF_LIFE_HOURS,
+                 engagement_weight: float = REPUTATION_ENGAGEMENT_WEIGHT,
+                 state_path: Optional[str] = REPUTATION_STATE_PATH,
+                 checkpoint_seconds: float = REPUTATION_CHECKPOINT_SECONDS):
+        self.half_life = half_life_hours * 3600
+        self.engagement_weight = engagement_weight
+        self.state_path = state_path
+        self.checkpoint_seconds = checkpoint_seconds
+        self.brands: Dict[str, ReputationTotals] = {}
+        self._lock = threading.Lock()
+        self._last_checkpoint = time.time()
+        self._dirty = False
+        if state_path:
+            self.load()
+
+    def measure(self, batch: MentionBatch, now: Optional[float] = None) -> ReputationTotals:
+        """Weighted sums of one scored batch (not added to any brand)."""
+        return ReputationTotals.from_batch(batch, time.time() if now is None else now, self.half_life,
+                                           self.engagement_weight)
+
+    def update(self, brand: Optional[str], batch: MentionBatch, now: Optional[float] = None) -> ReputationTotals:
+        """Fold a scored batch into the brand's running totals; returns the batch's own sums."""
+        totals = self.measure(batch, now)
+        if totals.sums[COUNT] == 0:
+            return totals
+        with self._lock:
+            self.brands.setdefault(brand or "", ReputationTotals()).merge(totals, self.half_life)
+            self._dirty = True
+        self.maybe_checkpoint()
+        return totals
+
+    def score(self, brand: Optional[str], now: Optional[float] = None) -> Dict[str, Any]:
+        """Current weighted reputation of the brand; O(platforms), nothing is rescanned."""
+        now = time.time() if now is None else now
+        with self._lock:
+            totals = self.brands.get(brand or "")
+            if totals is None:
+                return ReputationTotals().summary()
+            factor = 2.0 ** (-max(0.0, now - totals.ref) / self.half_life)
+            out = totals.summary(factor)
+        out["updated_at"] = datetime.utcfromtimestamp(totals.ref).strftime("%Y-%m-%d %H:%M:%S")
+        return out
+
+    # ---------- persistence ----------
+    def maybe_checkpoint(self) -> None:
+        if self.state_path and self._dirty and time.time() - self._last_checkpoint >= self.checkpoint_seconds:
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        if not self.state_path:
+            return
+        with self._lock:
+            state = {"half_life": self.half_life, "engagement_weight": self.engagement_weight,
+                     "brands": {b: t.to_dict() for b, t in self.brands.items()}}
+            self._dirty = False
+            self._last_checkpoint = time.time()
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.state_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp, self.state_path)
+        except OSError as e:
+            logger.warning("Could not checkpoint reputation state to %s: %s", self.state_path, e)
+
+    def load(self) -> None:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable reputation state %s: %s", self.state_path, e)
+            return
+        if state.get("half_life") != self.half_life or state.get("engagement_weight") != self.engagement_weight:
+            logger.warning("Reputation weighting changed; starting with fresh totals.")
+            return
+        with self._lock:
+            self.brands = {b: ReputationTotals.from_dict(d) for b, d in (state.get("brands") or {}).items()}
+
+
+_engine: Optional[ReputationEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_reputation_engine() -> ReputationEngine:
+    """Process-wide engine configured from the REPUTATION_* environment variables."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = ReputationEngine()
+        return _engine
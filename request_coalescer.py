@@ -0,0 +1,122 @@
+"""
+Request Micro-Batching
+- Many concurrent small requests are cheaper handled as one group: a MicroBatcher holds
+  submitted items for at most `window` seconds after the first one arrives (or until
+  `max_size` units are pending), then hands the whole group to a blocking handler in one
+  worker-thread call and resolves each caller with its own result.
+- Groups run one at a time, in arrival order; what arrives while a group is running forms
+  the next one (so batches grow with load instead of queueing thread hops).
+- The handler returns one result per item, in order; an exception object in that list
+  fails only that item's caller. An exception raised by the handler fails the whole group.
+- Callers that were cancelled while queued are dropped before their group runs; if the
+  worker itself stops (cancelled at shutdown), every caller still waiting gets an error.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Callable, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+from metrics import REGISTRY, SIZE_BUCKETS
+
+COALESCE_WINDOW_MS = float(os.getenv("COALESCE_WINDOW_MS", 5))
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+GROUP_SIZE = REGISTRY.histogram("coalescer_group_requests", "Requests handled per coalesced group", ["name"],
+                                buckets=SIZE_BUCKETS)
+GROUP_WAIT = REGISTRY.histogram("coalescer_wait_seconds", "Time a request waited for its group to start", ["name"])
+
+
+class MicroBatcher(Generic[T, R]):
+    def __init__(self, name: str, handler: Callable[[List[T]], Sequence[Any]], max_size: int,
+                 window: float = COALESCE_WINDOW_MS / 1000):
+        self.name = name
+        self.handler = handler
+        self.max_size = max(1, max_size)
+        self.window = max(0.0, window)
+        self._pending: List[Tuple[T, asyncio.Future, float, int]] = []
+        self._pending_size = 0
+        self._full: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.groups = 0
+        self.items = 0
+
+    async def submit(self, item: T, size: int = 1) -> R:
+        """Queue `item` (weighing `size` units toward max_size) and wait for its result."""
+        loop = asyncio.get_running_loop()
+        if self._full is None:
+            self._full = asyncio.Event()
+        fut = loop.create_future()
+        self._pending.append((item, fut, time.monotonic(), size))
+        self._pending_size += size
+        if self._pending_size >= self.max_size:
+            self._full.set()
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._drain())
+        return await fut
+
+    async def _drain(self) -> None:
+        group: list = []
+        try:
+            while self._pending:
+                wait = self._pending[0][2] + self.window - time.monotonic()
+                if wait > 0 and not self._full.is_set():
+                    try:
+                        await asyncio.wait_for(self._full.wait(), wait)
+                    except asyncio.TimeoutError:
+                        pass
+                group = self._take_group()
+                if not group:
+                    continue
+                started = time.monotonic()
+                for _, _, queued, _ in group:
+                    GROUP_WAIT.observe(started - queued, name=self.name)
+                GROUP_SIZE.observe(len(group), name=self.name)
+                self.groups += 1
+                self.items += len(group)
+                try:
+                    results = await asyncio.to_thread(self.handler, [item for item, _, _, _ in group])
+                except Exception as e:
+                    results = [e] * len(group)
+                if len(results) != len(group):
+                    error = RuntimeError(f"{self.name}: handler returned {len(results)} results for {len(group)} items")
+                    results = [error] * len(group)
+                for (_, fut, _, _), result in zip(group, results):
+                    if fut.done():  # caller went away
+                        continue
+                    if isinstance(result, BaseException):
+                        fut.set_exception(result)
+                    else:
+                        fut.set_result(result)
+                group = []
+        finally:
+            # worker cancelled (e.g. at shutdown) or broken: nobody would resolve these callers
+            leftover, self._pending, self._pending_size = group + self._pending, [], 0
+            self._full.clear()
+            for _, fut, _, _ in leftover:
+                if not fut.done():
+                    fut.set_exception(RuntimeError(f"{self.name}: batcher stopped before handling this request"))
+
+    def _take_group(self) -> list:
+        """Oldest pending items up to max_size units (always at least one); cancelled callers are dropped."""
+        if any(fut.done() for _, fut, _, _ in self._pending):
+            self._pending = [p for p in self._pending if not p[1].done()]
+            self._pending_size = sum(size for _, _, _, size in self._pending)
+        total, n = 0, 0
+        for _, _, _, size in self._pending:
+            if n and total + size > self.max_size:
+                break
+            total += size
+            n += 1
+        group, self._pending = self._pending[:n], self._pending[n:]
+        self._pending_size -= total
+        if self._pending_size < self.max_size:
+            self._full.clear()
+        return group
+
+    def stats(self) -> dict:
+        return {"groups": self.groups, "requests": self.items, "pending": len(self._pending),
+                "avg_group": round(self.items / self.groups, 2) if self.groups else 0.0,
+                "window_ms": self.window * 1000, "max_size": self.max_size}
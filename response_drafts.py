@@ -0,0 +1,120 @@
+"""
+Response Draft Generator
+- Async subsystem for suggested replies: drafts run concurrently up to a limit, the
+  blocking LLM SDK call runs on a bounded thread pool (never on the event loop), and every
+  draft has a deadline after which the template reply is used instead.
+- Drafts are cached by brand + normalized-text hash, and identical complaints in flight at
+  the same time share one LLM call.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("response_drafts")
+
+DRAFT_CONCURRENCY = int(os.getenv("DRAFT_CONCURRENCY", 5))
+DRAFT_TIMEOUT = float(os.getenv("DRAFT_TIMEOUT", 8))  # seconds per draft, incl. queueing
+DRAFT_CACHE_SIZE = int(os.getenv("DRAFT_CACHE_SIZE", 2000))
+
+# (brand, mention_text, author) -> draft text, or None to fall back
+LLMFn = Callable[[Optional[str], str, Optional[str]], Optional[str]]
+TemplateFn = Callable[[str], str]
+
+
+def draft_key(brand: Optional[str], text: str) -> str:
+    normalized = " ".join(text.lower().split())
+    return hashlib.blake2b(f"{brand or ''}\n{normalized}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+class DraftGenerator:
+    def __init__(self, llm: Optional[LLMFn], template: TemplateFn, concurrency: int = DRAFT_CONCURRENCY,
+                 timeout: float = DRAFT_TIMEOUT, cache_size: int = DRAFT_CACHE_SIZE):
+        self.llm = llm
+        self.template = template
+        self.timeout = timeout
+        self.cache_size = max(1, cache_size)
+        self.executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="draft")
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.counters = {"llm": 0, "cached": 0, "fallback": 0, "timeouts": 0, "errors": 0}
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            draft = self._cache.get(key)
+            if draft is not None:
+                self._cache.move_to_end(key)
+            return draft
+
+    def _cache_put(self, key: str, draft: str) -> None:
+        with self._lock:
+            self._cache[key] = draft
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    async def _call_llm(self, brand: Optional[str], text: str, author: Optional[str]) -> Optional[str]:
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(self.executor, self.llm, brand, text, author), self.timeout)
+        except asyncio.TimeoutError:
+            self.counters["timeouts"] += 1
+            logger.warning("Draft generation exceeded %.1fs, using template.", self.timeout)
+        except Exception as e:
+            self.counters["errors"] += 1
+            logger.exception("Draft generation failed, using template. Error: %s", e)
+        return None
+
+    async def generate(self, brand: Optional[str], text: str, author: Optional[str] = None) -> str:
+        if self.llm is None:
+            self.counters["fallback"] += 1
+            return self.template(text)
+
+        key = draft_key(brand, text)
+        cached = self._cache_get(key)
+        if cached is not None:
+            self.counters["cached"] += 1
+            return cached
+
+        # share one call between identical complaints that arrive together
+        pending = self._inflight.get(key)
+        if pending is not None:
+            draft = await asyncio.shield(pending)
+            self.counters["cached"] += 1
+            return draft if draft is not None else self.template(text)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            draft = await self._call_llm(brand, text, author)
+            if draft:
+                self.counters["llm"] += 1
+                self._cache_put(key, draft)
+            future.set_result(draft or None)
+        finally:
+            if not future.done():
+                future.set_result(None)
+            self._inflight.pop(key, None)
+
+        if not draft:
+            self.counters["fallback"] += 1
+            return self.template(text)
+        return draft
+
+    async def generate_many(self, brand: Optional[str], mentions: Sequence[Tuple[str, Optional[str]]]) -> List[str]:
+        """Drafts for (text, author) pairs, in order; runs concurrently up to the pool size."""
+        return list(await asyncio.gather(*(self.generate(brand, text, author) for text, author in mentions)))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters, cache_entries=len(self._cache))
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,46 @@
+"""
+Streaming RSS parsing
+- iterparse over the response stream: items are yielded as soon as their closing tag is
+  read, reading stops once `limit` items are collected, and each finished <item> is
+  detached from the tree so memory stays flat however large the feed is.
+- Namespaces are handled by stripping "{uri}" from tag names, so the payload never has
+  to be decoded and rewritten as text.
+"""
+
+import xml.etree.ElementTree as ET
+from typing import BinaryIO, Dict, Iterator, Optional
+
+
+def local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1] if tag[:1] == "{" else tag
+
+
+def iter_rss_items(stream: BinaryIO, limit: Optional[int] = None) -> Iterator[Dict[str, str]]:
+    """
+    Yield each <item> as {child_tag: text} (first occurrence wins, like findtext), with
+    namespace prefixes removed from tag names. Stops reading after `limit` items.
+    """
+    if limit is not None and limit <= 0:
+        return
+    parents = []
+    count = 0
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            parents.append(elem)
+            continue
+        parents.pop()
+        if local_name(elem.tag) != "item":
+            continue
+
+        fields: Dict[str, str] = {}
+        for child in elem:
+            fields.setdefault(local_name(child.tag), child.text or "")
+        # detach the finished item so the tree never grows
+        elem.clear()
+        if parents:
+            parents[-1].remove(elem)
+
+        yield fields
+        count += 1
+        if limit is not None and count >= limit:
+            return
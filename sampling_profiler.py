@@ -0,0 +1,93 @@
+"""
+Sampling Profiler
+- A background thread snapshots the Python stacks of the process (sys._current_frames)
+  every `interval` seconds while active; nothing is traced, so the profiled code runs at
+  normal speed and the overhead is one stack walk per sample.
+- Results are aggregated as collapsed stacks ("outer;inner;leaf count", the flamegraph.pl /
+  speedscope input format) plus the hottest leaf functions.
+- Meant to be switched on for a single request (see sentiment_agent's X-Profile header);
+  stacks of other threads busy at the same time are included.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", 0.002))
+PROFILE_MAX_DEPTH = 64
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = PROFILE_INTERVAL, max_depth: int = PROFILE_MAX_DEPTH):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SamplingProfiler":
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.started_at is not None:
+            self.elapsed = time.perf_counter() - self.started_at
+        return self
+
+    def __enter__(self) -> "SamplingProfiler":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                # skip idle threads (parked in a wait / queue get / selector)
+                if stack and stack[0].split(":")[-1] in ("wait", "select", "_worker", "get", "accept", "poll"):
+                    continue
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self, limit: Optional[int] = None) -> List[str]:
+        return [f"{stack} {n}" for stack, n in self.stacks.most_common(limit)]
+
+    def top_functions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Leaf frames by sample share (where time was actually spent)."""
+        leaves: Counter = Counter()
+        for stack, n in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += n
+        total = sum(leaves.values()) or 1
+        return [{"function": f, "samples": n, "share": round(n / total, 4)} for f, n in leaves.most_common(limit)]
+
+    def report(self, limit: int = 50) -> Dict[str, Any]:
+        return {
+            "interval": self.interval,
+            "samples": self.samples,
+            "seconds": round(self.elapsed, 4),
+            "top_functions": self.top_functions(20),
+            "collapsed": self.collapsed(limit),
+        }
@@ -2,63 +2,147 @@
 Sentiment / Analysis Agent (fixed)
 - FastAPI app accepts batches of mentions and returns sentiment, summary, reputation,
   trending keywords, alerts, and suggested responses (optional OpenAI).
+- Heavy dependencies (scikit-learn, openai) and the VADER lexicon load on first
+  use; a background warm-up at startup loads them and /ready reports when it is done.
 Run: python sentiment_agent.py
 """
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
-import pandas as pd
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, ValidationError
+from typing import List, Optional, Dict, Any, Tuple
+import importlib.util
 import os
 import math
+import asyncio
 import logging
-import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
-from sklearn.feature_extraction.text import TfidfVectorizer
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 import numpy as np
-
-# Optional OpenAI usage (safe import)
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-except Exception:
-    openai = None
-    OPENAI_AVAILABLE = False
-
-# Ensure NLTK data (download if missing)
-nltk_packages = ["vader_lexicon", "punkt", "stopwords"]
-for pkg in nltk_packages:
+from batch_sentiment import get_engine, ParallelScorer
+from sentiment_cache import get_cache
+from keyword_index import KeywordIndex, batch_keywords, get_keyword_index, stop_words
+from dedup import dedup_groups
+from mention_batch import MentionBatch
+from response_drafts import DraftGenerator
+from alert_engine import get_alert_engine
+from reputation_engine import ReputationTotals, get_reputation_engine
+from mention_archive import get_archive
+from request_coalescer import MicroBatcher
+from fast_json import json_response
+from stream_ingest import StreamAggregator, iter_ndjson, STREAM_CHUNK_SIZE
+from metrics import REGISTRY, CONTENT_TYPE, SIZE_BUCKETS
+from sampling_profiler import SamplingProfiler
+
+_IMPORT_STARTED = time.perf_counter()
+
+# Optional OpenAI usage (imported on first draft; the SDK is slow to import)
+OPENAI_AVAILABLE = importlib.util.find_spec("openai") is not None
+_openai_module = None
+_openai_lock = threading.Lock()
+
+# Content-hash score cache (LRU/TTL, optional SQLite store via SENTIMENT_CACHE_DB)
+sentiment_cache = get_cache()
+# Per-brand rolling windows + EWMA baselines for alerts (checkpointed to ALERT_STATE_PATH)
+alert_engine = get_alert_engine()
+# Per-brand engagement / recency-weighted reputation sums (checkpointed to REPUTATION_STATE_PATH)
+reputation_engine = get_reputation_engine()
+# Searchable SQLite/FTS5 history of scored mentions (MENTION_ARCHIVE_DB; empty disables)
+mention_archive = get_archive()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the scorer pool and the warm-up; on shutdown stop them and checkpoint state."""
+    start_parallel_scorer()
+    start_warm_up()
     try:
-        if pkg == "vader_lexicon":
-            nltk.data.find("sentiment/vader_lexicon")
-        else:
-            nltk.data.find(pkg)
-    except Exception:
-        nltk.download(pkg)
+        yield
+    finally:
+        stop_parallel_scorer()
 
-sia = SentimentIntensityAnalyzer()
 
-app = FastAPI(title="Sentiment Agent", version="1.0")
+app = FastAPI(title="Sentiment Agent", version="1.0", lifespan=lifespan)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("sentiment_agent")
 
+# ---------------------------
+# Metrics (served by /metrics)
+# ---------------------------
+REQUEST_SECONDS = REGISTRY.histogram("sentiment_agent_request_seconds", "HTTP request latency", ["endpoint"])
+REQUESTS_TOTAL = REGISTRY.counter("sentiment_agent_requests_total", "HTTP requests by status", ["endpoint", "status"])
+STAGE_SECONDS = REGISTRY.histogram("sentiment_agent_stage_seconds", "Time spent per processing stage",
+                                   ["endpoint", "stage"])
+BATCH_SIZE = REGISTRY.histogram("sentiment_agent_batch_size", "Mentions per request", ["endpoint"],
+                                buckets=SIZE_BUCKETS)
+MENTIONS_TOTAL = REGISTRY.counter("sentiment_agent_mentions_total", "Mentions received / scored",
+                                  ["endpoint", "stage"])
+MENTIONS_PER_SECOND = REGISTRY.gauge("sentiment_agent_mentions_per_second",
+                                     "Throughput of the last completed request", ["endpoint"])
+
 # ---------------------------
 # Configuration
 # ---------------------------
 NEGATIVE_ALERT_RATIO = float(os.getenv("NEG_ALERT_RATIO", 0.30))
 NEGATIVE_ALERT_MIN_MENTIONS = int(os.getenv("NEG_ALERT_MIN_MENTIONS", 10))
 TOP_K_KEYWORDS = int(os.getenv("TOP_K_KEYWORDS", 10))
+SENTIMENT_LABELS = ("positive", "neutral", "negative")
+# "index": incremental per-brand keyword index; "tfidf": refit TfidfVectorizer per request
+KEYWORD_MODE = os.getenv("KEYWORD_MODE", "index").lower()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", None)
 OPENAI_DEFAULT_MODEL = os.getenv("OPENAI_MODEL", "gpt-4")
-
-if OPENAI_API_KEY and OPENAI_AVAILABLE and openai is not None:
-    try:
-        openai.api_key = OPENAI_API_KEY
-    except Exception:
-        logger.warning("Could not set OpenAI API key on the openai module.")
-elif OPENAI_API_KEY and not OPENAI_AVAILABLE:
-    logger.warning("OPENAI_API_KEY provided, but openai package is not installed or failed to import.")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", None)  # e.g. a local OpenAI-compatible server
+MAX_SUGGESTED_RESPONSES = int(os.getenv("MAX_SUGGESTED_RESPONSES", 10))
+
+# Opt-in process-pool scoring for large batches
+PARALLEL_SCORING = os.getenv("PARALLEL_SCORING", "false").lower() in ("1", "true", "yes")
+SCORING_WORKERS = int(os.getenv("SCORING_WORKERS", os.cpu_count() or 1))
+SCORING_SHARD_SIZE = int(os.getenv("SCORING_SHARD_SIZE", 5000))
+PARALLEL_MIN_MENTIONS = int(os.getenv("PARALLEL_MIN_MENTIONS", 20000))
+parallel_scorer: Optional[ParallelScorer] = None
+
+# Collapse exact (id/url) and near-duplicate mentions before scoring and counting. Opt-in
+# (here or per request with "dedup": true): it lowers summary.total_mentions, and the
+# collapsed copies are reported as summary.duplicates_collapsed.
+DEDUP_MENTIONS = os.getenv("DEDUP_MENTIONS", "false").lower() in ("1", "true", "yes")
+
+# Opt-in micro-batching: concurrent small /process_batch requests (<= COALESCE_MAX_REQUEST_MENTIONS)
+# are grouped for COALESCE_WINDOW_MS (or COALESCE_MAX_MENTIONS pending) and scored in one pass
+COALESCE_REQUESTS = os.getenv("COALESCE_REQUESTS", "false").lower() in ("1", "true", "yes")
+COALESCE_MAX_REQUEST_MENTIONS = int(os.getenv("COALESCE_MAX_REQUEST_MENTIONS", 50))
+COALESCE_MAX_MENTIONS = int(os.getenv("COALESCE_MAX_MENTIONS", 2000))
+
+# Per-request sampling profiler, switched on with an "X-Profile: 1" header (opt-in)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", 20))
+recent_profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+if OPENAI_API_KEY and not OPENAI_AVAILABLE:
+    logger.warning("OPENAI_API_KEY provided, but openai package is not installed.")
+
+
+def get_openai():
+    """Import and configure the openai module on first use."""
+    global _openai_module
+    with _openai_lock:
+        if _openai_module is None:
+            import openai
+            try:
+                openai.api_key = OPENAI_API_KEY
+                if OPENAI_BASE_URL:
+                    if hasattr(openai, "base_url"):
+                        openai.base_url = OPENAI_BASE_URL
+                    else:
+                        openai.api_base = OPENAI_BASE_URL
+            except Exception:
+                logger.warning("Could not set OpenAI API key on the openai module.")
+            _openai_module = openai
+        return _openai_module
 
 
 # ---------------------------
@@ -71,28 +155,119 @@ class Mention(BaseModel):
     text: str
     created_at: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
+    # Scores computed upstream (e.g. by run_monitor); used when the request sets prescored
+    compound: Optional[float] = None
+    label: Optional[str] = None
+    # Copies an upstream dedup collapsed into this mention (weighs the reputation like them)
+    cluster_size: Optional[int] = None
 
 
 class ProcessRequest(BaseModel):
     brand: Optional[str] = None
     mentions: List[Mention]
+    # Optional override; by default spikes are judged against the server-side baseline
     historical_negative_ratio: Optional[float] = None
     historical_window_size: Optional[int] = None
+    dedup: Optional[bool] = None  # None -> DEDUP_MENTIONS
+    prescored: bool = False  # trust mentions' compound/label instead of re-scoring them
+    include_mentions: bool = False  # add every (deduplicated) mention's scores under data.mentions
 
 
 # ---------------------------
 # Helper functions
 # ---------------------------
+def run_stage(endpoint: str, stage: str, fn, *args):
+    """Call fn(*args) and record its duration (usable inside asyncio.to_thread)."""
+    with STAGE_SECONDS.time(endpoint=endpoint, stage=stage):
+        return fn(*args)
+
+
 def analyze_sentiment(text: str) -> Dict[str, Any]:
-    scores = sia.polarity_scores(text)
-    compound = scores["compound"]
-    if compound >= 0.05:
-        label = "positive"
-    elif compound <= -0.05:
-        label = "negative"
-    else:
-        label = "neutral"
-    return {"scores": scores, "label": label, "compound": compound}
+    res = analyze_sentiment_batch([text])
+    scores = {k: float(res[k][0]) for k in ("neg", "neu", "pos", "compound")}
+    return {"scores": scores, "label": res["label"][0], "compound": scores["compound"]}
+
+
+def analyze_sentiment_batch(texts: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Score all texts in one vectorized pass; texts already in the cache are not rescored.
+    Returns aligned arrays: neg / neu / pos / compound (float) and label (str).
+    """
+    return sentiment_cache.score(texts, get_engine().score_texts)
+
+
+def score_mentions(batch: MentionBatch, texts: List[str], prescored: bool = False, score_fn=None) -> None:
+    """
+    Score the batch in place. With prescored=True, rows that carry a valid compound +
+    label keep them (neg/neu/pos stay NaN) and only the rest are scored.
+    """
+    score_mentions_many([(batch, texts, prescored)], score_fn)
+
+
+def score_mentions_many(jobs: List[Tuple[MentionBatch, List[str], bool]], score_fn=None) -> None:
+    """score_mentions for several (batch, texts, prescored) jobs with a single score_fn call."""
+    score_fn = score_fn or analyze_sentiment_batch
+    parts, pending = [], []
+    for batch, texts, prescored in jobs:
+        rows = np.flatnonzero(~batch.has_scores()) if prescored else None
+        if rows is not None and len(rows) == len(batch):
+            rows = None
+        todo = texts if rows is None else [texts[i] for i in rows.tolist()]
+        parts.append((batch, rows, len(pending), len(todo)))
+        pending.extend(todo)
+    if not pending:
+        return
+    scores = score_fn(pending)
+    for batch, rows, start, n in parts:
+        if n:
+            batch.set_scores({k: v[start:start + n] for k, v in scores.items()}, rows)
+
+
+def dedup_mentions(batch: MentionBatch, texts: List[str]) -> Tuple[MentionBatch, List[str]]:
+    """
+    Keep one representative per exact (id / metadata url) or near-duplicate cluster.
+    Returns (batch, texts) for the representatives, in input order, with cluster_size and
+    the cluster's summed engagement set.
+    """
+    reps, group = dedup_groups(texts, [batch.urls.to_list(), batch.ids.to_list()])
+    if len(reps) == len(batch):
+        return batch, texts
+    sizes = np.bincount(group, weights=batch.cluster_size, minlength=len(reps))  # upstream clusters add up
+    engagement = np.bincount(group, weights=batch.engagement, minlength=len(reps))
+    return batch.take(reps, sizes, engagement), [texts[i] for i in reps.tolist()]
+
+
+def reputation_report(brand: Optional[str], totals: ReputationTotals, unweighted: float) -> Dict[str, Any]:
+    """
+    Weighted score + per-platform breakdown of this request, its count-only score, and the
+    brand's running score over everything it has seen.
+    """
+    return {**totals.summary(), "unweighted_score": unweighted, "brand": reputation_engine.score(brand)}
+
+
+def observe_alerts(brand: Optional[str], batch: MentionBatch) -> None:
+    alert_engine.observe_codes(brand, batch.platform_codes, batch.platforms, batch.label)
+
+
+def score_stream_chunk(brand: Optional[str], mentions: List[Mention], dedup: bool,
+                       agg: StreamAggregator, keywords: KeywordIndex, prescored: bool = False) -> None:
+    """
+    Dedup (within the chunk), score and fold one chunk of a streamed upload into `agg` and
+    the keyword index (the brand's, or the upload's own one without a brand). Nothing from
+    the chunk is kept beyond the negative sample.
+    """
+    batch, texts = MentionBatch.from_mentions(mentions)
+    received = len(batch)
+    if dedup and received > 1:
+        batch, texts = run_stage("process_stream", "dedup", dedup_mentions, batch, texts)
+    run_stage("process_stream", "sentiment", score_mentions, batch, texts, prescored)
+    run_stage("process_stream", "keywords", keywords.update, texts)
+    run_stage("process_stream", "alerts", observe_alerts, brand, batch)
+    reputation = run_stage("process_stream", "reputation", reputation_engine.update, brand, batch)
+    if mention_archive is not None:
+        mention_archive.submit(mention_archive.add_batch, brand, batch)
+    agg.add_chunk(batch, received, reputation)
+    MENTIONS_TOTAL.inc(len(batch), endpoint="process_stream", stage="scored")
 
 
 def extract_trending_keywords(texts: List[str], top_k: int = TOP_K_KEYWORDS) -> List[Dict[str, Any]]:
@@ -102,6 +277,7 @@ def extract_trending_keywords(texts: List[str], top_k: int = TOP_K_KEYWORDS) ->
     """
     if not texts:
         return []
+    from sklearn.feature_extraction.text import TfidfVectorizer
 
     docs = [t.lower() for t in texts]
     vect = TfidfVectorizer(stop_words="english", ngram_range=(1, 2), max_features=2000)
@@ -121,7 +297,23 @@ def extract_trending_keywords(texts: List[str], top_k: int = TOP_K_KEYWORDS) ->
     return keywords
 
 
+def trending_keywords(brand: Optional[str], texts: List[str], top_k: int = TOP_K_KEYWORDS) -> List[Dict[str, Any]]:
+    """
+    Fold the batch into the brand's streaming keyword index and return its current top-k
+    (without a brand: the keywords of this batch alone, nothing shared is updated).
+    KEYWORD_MODE=tfidf keeps the old per-request TF-IDF refit.
+    """
+    if KEYWORD_MODE == "tfidf":
+        return extract_trending_keywords(texts, top_k=top_k)
+    if not (brand or "").strip():
+        return batch_keywords(texts, top_k)
+    index = get_keyword_index(brand)
+    index.update(texts)
+    return index.top_k(top_k)
+
+
 def compute_reputation_score(positive_count: int, neutral_count: int, negative_count: int) -> float:
+    """Unweighted score from label counts alone (reported next to the weighted one)."""
     total = positive_count + neutral_count + negative_count
     if total == 0:
         return 50.0
@@ -168,143 +360,349 @@ def detect_critical_alerts(
     return alerts
 
 
-async def generate_response_draft_openai(brand: Optional[str], mention_text: str, author: Optional[str]) -> str:
+def combine_alerts(request_alerts: List[Dict[str, Any]], rolling_alerts: List[Dict[str, Any]]
+                   ) -> List[Dict[str, Any]]:
     """
-    Generates a reply draft. Uses OpenAI only if available and model/method exist.
-    Otherwise falls back to a templated reply.
+    Request-level alerts plus the alert engine's. A negative-ratio spike is reported once:
+    the rolling-window alert (which already counts this request) replaces the request's own
+    high_negative_ratio when both fire.
     """
+    if any(a["type"] == "rolling_negative_ratio" for a in rolling_alerts):
+        request_alerts = [a for a in request_alerts if a["type"] != "high_negative_ratio"]
+    return request_alerts + rolling_alerts
+
+
+def build_draft_prompt(brand: Optional[str], mention_text: str) -> str:
     prompt_brand = (brand + " ") if brand else ""
-    prompt = (
+    return (
         f"You are a polite brand social media manager for {prompt_brand}. "
         f"A user wrote: \"{mention_text}\". Write a short, professional, empathetic public reply (1-3 sentences) "
         f"that acknowledges the concern, offers help/next steps, and invites the user to DM or a support link if needed."
     )
 
-    # Only call OpenAI if imported and api key present
-    if OPENAI_API_KEY and OPENAI_AVAILABLE and openai is not None:
+
+def call_openai_draft(brand: Optional[str], mention_text: str, author: Optional[str]) -> Optional[str]:
+    """
+    Blocking OpenAI call (run off the event loop by the draft generator).
+    Returns None when the SDK shape is unexpected so the caller falls back to the template.
+    """
+    messages = [
+        {"role": "system", "content": "You write concise, helpful public support responses for brand social media."},
+        {"role": "user", "content": build_draft_prompt(brand, mention_text)}
+    ]
+    openai = get_openai()
+    # Some openai SDK versions expose ChatCompletion; check first
+    if hasattr(openai, "ChatCompletion"):
         try:
-            # Some openai SDK versions expose ChatCompletion; check first
-            if hasattr(openai, "ChatCompletion"):
-                resp = openai.ChatCompletion.create(
-                    model=OPENAI_DEFAULT_MODEL,
-                    messages=[
-                        {"role": "system", "content": "You write concise, helpful public support responses for brand social media."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=120,
-                    temperature=0.2,
-                )
-                # Extract answer in the usual shape
-                if isinstance(resp, dict) and "choices" in resp and resp["choices"]:
-                    ai_text = resp["choices"][0].get("message", {}).get("content")
-                    if ai_text:
-                        return ai_text.strip()
-            # If ChatCompletion not available or response shape unexpected, try the newer chat API if present:
-            if hasattr(openai, "chat") and hasattr(openai.chat, "completions"):
-                # This path may or may not exist depending on openai version
-                resp2 = openai.chat.completions.create(
-                    model=OPENAI_DEFAULT_MODEL,
-                    messages=[
-                        {"role": "system", "content": "You write concise, helpful public support responses for brand social media."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=120,
-                    temperature=0.2,
-                )
-                # resp2 structure may differ; try to extract text robustly
-                try:
-                    choices = getattr(resp2, "choices", None) or (resp2.get("choices") if isinstance(resp2, dict) else None)
-                    if choices:
-                        first = choices[0]
-                        # multiple possible fields: 'message'->'content' or 'text'
-                        if isinstance(first, dict):
-                            ai_text = (first.get("message") or {}).get("content") or first.get("text")
-                        else:
-                            ai_text = None
-                        if ai_text:
-                            return ai_text.strip()
-                except Exception:
-                    pass
+            resp = openai.ChatCompletion.create(
+                model=OPENAI_DEFAULT_MODEL, messages=messages, max_tokens=120, temperature=0.2,
+            )
+            # Extract answer in the usual shape
+            if isinstance(resp, dict) and "choices" in resp and resp["choices"]:
+                ai_text = resp["choices"][0].get("message", {}).get("content")
+                if ai_text:
+                    return ai_text.strip()
         except Exception as e:
-            logger.exception("OpenAI call failed, falling back to template. Error: %s", e)
-
-    # Fallback templated reply
+            # openai>=1.0 keeps a ChatCompletion stub that raises; try the newer API below
+            logger.debug("Legacy ChatCompletion unavailable: %s", e)
+    # Newer chat API (openai>=1.0); choices are objects, older shapes are dicts
+    if hasattr(openai, "chat") and hasattr(openai.chat, "completions"):
+        resp2 = openai.chat.completions.create(
+            model=OPENAI_DEFAULT_MODEL, messages=messages, max_tokens=120, temperature=0.2,
+        )
+        choices = getattr(resp2, "choices", None) or (resp2.get("choices") if isinstance(resp2, dict) else None)
+        if choices:
+            first = choices[0]
+            if isinstance(first, dict):
+                ai_text = (first.get("message") or {}).get("content") or first.get("text")
+            else:
+                ai_text = getattr(getattr(first, "message", None), "content", None) or getattr(first, "text", None)
+            if ai_text:
+                return ai_text.strip()
+    return None
+
+
+def template_draft(mention_text: str) -> str:
     snippet = (mention_text[:120] + "...") if len(mention_text) > 120 else mention_text
     return (f"Thanks for flagging this. We're sorry to hear about your experience — we'd like to help. "
             f"Can you DM us with details or reach out at support@example.com? (Ref: \"{snippet}\")")
 
 
+# Drafts run concurrently (DRAFT_CONCURRENCY) off the event loop, with a per-draft deadline
+# (DRAFT_TIMEOUT) and a normalized-text cache; OpenAI is only used if imported and keyed.
+draft_generator = DraftGenerator(
+    llm=call_openai_draft if (OPENAI_API_KEY and OPENAI_AVAILABLE) else None,
+    template=template_draft,
+)
+
+
+async def generate_response_draft_openai(brand: Optional[str], mention_text: str, author: Optional[str]) -> str:
+    """
+    Generates a reply draft. Uses OpenAI only if available and model/method exist.
+    Otherwise (or past the deadline) falls back to a templated reply.
+    """
+    return await draft_generator.generate(brand, mention_text, author)
+
+
 # ---------------------------
 # API endpoints
 # ---------------------------
+# Filled in by the background warm-up; /ready answers 503 until it has finished
+readiness: Dict[str, Any] = {"ready": False, "components": {}, "error": None, "ready_after_seconds": None}
+
+
+def warm_up() -> None:
+    """Load everything the first request would otherwise pay for, recording each step's time."""
+    steps = [
+        ("lexicon", get_engine),
+        ("stop_words", stop_words),
+        ("scoring", lambda: get_engine().score_texts(["warm up the scoring path"])),
+    ]
+    if parallel_scorer is not None:
+        steps.append(("process_pool", parallel_scorer.warm_up))
+    if draft_generator.llm is not None:
+        steps.append(("openai", get_openai))
+    try:
+        for name, step in steps:
+            t0 = time.perf_counter()
+            step()
+            readiness["components"][name] = round(time.perf_counter() - t0, 4)
+        readiness["ready_after_seconds"] = round(time.perf_counter() - _IMPORT_STARTED, 4)
+        readiness["ready"] = True
+        logger.info("Sentiment agent ready in %.2fs", readiness["ready_after_seconds"])
+    except Exception as e:
+        readiness["error"] = str(e)
+        logger.exception("Warm-up failed: %s", e)
+
+
+def runtime_metrics():
+    """Scrape-time values that already live in the caches / draft generator / warm-up."""
+    c = sentiment_cache.stats()
+    yield ("sentiment_cache_lookups_total", "counter", "Score cache lookups by result", [
+        ({"result": "memory_hit"}, c["hits"] - c["disk_hits"]),
+        ({"result": "disk_hit"}, c["disk_hits"]),
+        ({"result": "miss"}, c["misses"]),
+    ])
+    yield ("sentiment_cache_hit_rate", "gauge", "Score cache hit rate since start", [({}, c["hit_rate"])])
+    yield ("sentiment_cache_entries", "gauge", "Entries held in the score cache", [({}, c["entries"])])
+    yield ("sentiment_cache_evictions_total", "counter", "LRU evictions", [({}, c["evictions"])])
+    d = draft_generator.stats()
+    yield ("draft_requests_total", "counter", "Reply drafts by outcome",
+           [({"result": k}, d[k]) for k in ("llm", "cached", "fallback", "timeouts", "errors")])
+    yield ("draft_cache_entries", "gauge", "Entries held in the draft cache", [({}, d["cache_entries"])])
+    yield ("sentiment_agent_ready", "gauge", "1 once the warm-up has finished", [({}, int(readiness["ready"]))])
+
+
+REGISTRY.add_collector(runtime_metrics)
+
+
+@app.middleware("http")
+async def instrument_requests(request: Request, call_next):
+    """Latency / status per route; runs the sampling profiler when asked to (X-Profile: 1)."""
+    profiler = None
+    if PROFILING_ENABLED and request.headers.get("x-profile", "").lower() in ("1", "true", "yes"):
+        profiler = SamplingProfiler().start()
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        elapsed = time.perf_counter() - t0
+        route = request.scope.get("route")
+        endpoint = getattr(route, "name", None) or "unmatched"
+        REQUEST_SECONDS.observe(elapsed, endpoint=endpoint)
+        REQUESTS_TOTAL.inc(endpoint=endpoint, status=str(status))
+        if profiler is not None:
+            profiler.stop()
+    if profiler is not None:
+        profile_id = uuid.uuid4().hex[:12]
+        recent_profiles[profile_id] = {"endpoint": endpoint, "status": status, **profiler.report()}
+        while len(recent_profiles) > PROFILE_KEEP:
+            recent_profiles.popitem(last=False)
+        response.headers["X-Profile-Id"] = profile_id
+    return response
+
+
+def start_parallel_scorer():
+    global parallel_scorer
+    if PARALLEL_SCORING:
+        parallel_scorer = ParallelScorer(workers=SCORING_WORKERS, shard_size=SCORING_SHARD_SIZE)
+        logger.info("Parallel scoring enabled: %d workers, shard size %d", SCORING_WORKERS, SCORING_SHARD_SIZE)
+
+
+def start_warm_up():
+    # Serve /health immediately; heavy loading happens off the startup path.
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+
+def stop_parallel_scorer():
+    global parallel_scorer
+    if parallel_scorer is not None:
+        parallel_scorer.shutdown()
+        parallel_scorer = None
+    draft_generator.shutdown()
+    alert_engine.checkpoint()
+    reputation_engine.checkpoint()
+    if mention_archive is not None:
+        mention_archive.flush()
+
+
+def summarize_scored(req: ProcessRequest, batch: MentionBatch, received: int) -> Dict[str, Any]:
+    """
+    Summary, reputation and alerts of a scored request. Folds the batch into the brand's
+    reputation / alert state and queues it for the archive, so requests go through here
+    one at a time.
+    """
+    counts = batch.label_counts()
+    positive_count, neutral_count, negative_count = counts["positive"], counts["neutral"], counts["negative"]
+    total = positive_count + neutral_count + negative_count
+
+    with STAGE_SECONDS.time(endpoint="process_batch", stage="reputation"):
+        reputation = reputation_report(req.brand, reputation_engine.update(req.brand, batch),
+                                       compute_reputation_score(positive_count, neutral_count, negative_count))
+    with STAGE_SECONDS.time(endpoint="process_batch", stage="alerts"):
+        observe_alerts(req.brand, batch)
+        alerts = combine_alerts(detect_critical_alerts(
+            positive_count, neutral_count, negative_count,
+            req.historical_negative_ratio, req.historical_window_size
+        ), alert_engine.evaluate(req.brand))
+    summary = {
+        "total_mentions": total,
+        "positive": positive_count,
+        "neutral": neutral_count,
+        "negative": negative_count,
+        "duplicates_collapsed": received - total,
+    }
+    return {"summary": summary, "reputation": reputation, "alerts": alerts}
+
+
+async def analyze_request(req: ProcessRequest, batch: MentionBatch, texts: List[str]):
+    """Dedup, score and summarize one request on its own. Returns (batch, keywords, outcome)."""
+    received = len(batch)
+    big_batch = parallel_scorer is not None and received >= PARALLEL_MIN_MENTIONS
+    if (DEDUP_MENTIONS if req.dedup is None else req.dedup) and received > 1:
+        if big_batch:
+            batch, texts = await asyncio.to_thread(run_stage, "process_batch", "dedup", dedup_mentions, batch, texts)
+        else:
+            batch, texts = run_stage("process_batch", "dedup", dedup_mentions, batch, texts)
+
+    if big_batch:
+        # Big batch: sentiment shards run on the process pool while keywords run in a
+        # worker thread, so the event loop stays free.
+        _, keywords = await asyncio.gather(
+            asyncio.to_thread(run_stage, "process_batch", "sentiment", score_mentions, batch, texts,
+                              req.prescored, lambda t: sentiment_cache.score(t, parallel_scorer.score)),
+            asyncio.to_thread(run_stage, "process_batch", "keywords",
+                              trending_keywords, req.brand, texts, TOP_K_KEYWORDS),
+        )
+    else:
+        run_stage("process_batch", "sentiment", score_mentions, batch, texts, req.prescored)
+        keywords = run_stage("process_batch", "keywords", trending_keywords, req.brand, texts, TOP_K_KEYWORDS)
+    del texts
+    MENTIONS_TOTAL.inc(len(batch), endpoint="process_batch", stage="scored")
+    outcome = summarize_scored(req, batch, received)
+
+    if mention_archive is not None:
+        # written by the archive's background thread; only waits while its queue is full
+        await asyncio.to_thread(mention_archive.submit, mention_archive.add_batch, req.brand, batch)
+    return batch, keywords, outcome
+
+
+def process_small_requests(group: List[Tuple[ProcessRequest, MentionBatch, List[str]]]) -> List[Any]:
+    """
+    MicroBatcher handler for small requests: dedup each one, score all of them with one
+    engine pass, then run the order-dependent stages (keywords, reputation, alerts) request
+    by request in arrival order, so each result is what the request would get on its own.
+    """
+    jobs, received = [], []
+    for req, batch, texts in group:
+        received.append(len(batch))
+        if (DEDUP_MENTIONS if req.dedup is None else req.dedup) and len(batch) > 1:
+            batch, texts = run_stage("process_batch", "dedup", dedup_mentions, batch, texts)
+        jobs.append((batch, texts, req.prescored))
+    run_stage("process_batch", "sentiment", score_mentions_many, jobs)
+
+    results: List[Any] = []
+    for (req, _, _), (batch, texts, _), n in zip(group, jobs, received):
+        try:
+            keywords = run_stage("process_batch", "keywords", trending_keywords, req.brand, texts, TOP_K_KEYWORDS)
+            MENTIONS_TOTAL.inc(len(batch), endpoint="process_batch", stage="scored")
+            outcome = summarize_scored(req, batch, n)
+            if mention_archive is not None:
+                mention_archive.submit(mention_archive.add_batch, req.brand, batch)
+            results.append((batch, keywords, outcome))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+batch_coalescer: Optional[MicroBatcher] = (
+    MicroBatcher("process_batch", process_small_requests, COALESCE_MAX_MENTIONS) if COALESCE_REQUESTS else None
+)
+
+
 @app.post("/process_batch")
-async def process_batch(req: ProcessRequest):
+async def process_batch(req: ProcessRequest, request: Request = None):
+    """
+    The response is serialized once by fast_json (no jsonable_encoder pass) and compressed
+    when the client's Accept-Encoding allows it.
+    """
+    accept_encoding = request.headers.get("accept-encoding") if request is not None else None
     try:
         mentions = req.mentions or []
         if not mentions:
-            return {"status": "ok", "message": "no mentions provided", "data": {}}
-
-        mention_rows = []
-        texts: List[str] = []
-        for m in mentions:
-            text = (m.text or "").strip()
-            if not text:
-                continue
-            sent = analyze_sentiment(text)
-            mention_rows.append({
-                "id": m.id,
-                "platform": m.platform,
-                "author": m.author,
-                "created_at": m.created_at,
-                "text": text,
-                "compound": sent["compound"],
-                "label": sent["label"],
-                "scores": sent["scores"]
-            })
-            texts.append(text)
+            return json_response({"status": "ok", "message": "no mentions provided", "data": {}}, accept_encoding)
 
-        df = pd.DataFrame(mention_rows)
-        if df.empty:
+        batch, texts = MentionBatch.from_mentions(mentions)
+        if not len(batch):
             raise HTTPException(status_code=400, detail="All mentions were empty after normalization.")
 
-        positive_count = int((df["label"] == "positive").sum())
-        negative_count = int((df["label"] == "negative").sum())
-        neutral_count = int((df["label"] == "neutral").sum())
-        total = positive_count + neutral_count + negative_count
-
-        reputation = compute_reputation_score(positive_count, neutral_count, negative_count)
-        keywords = extract_trending_keywords(texts, top_k=TOP_K_KEYWORDS)
-        alerts = detect_critical_alerts(
-            positive_count, neutral_count, negative_count,
-            req.historical_negative_ratio, req.historical_window_size
-        )
+        received = len(batch)
+        t_start = time.perf_counter()
+        BATCH_SIZE.observe(received, endpoint="process_batch")
+        MENTIONS_TOTAL.inc(received, endpoint="process_batch", stage="received")
+        if batch_coalescer is not None and received <= COALESCE_MAX_REQUEST_MENTIONS:
+            batch, keywords, outcome = await batch_coalescer.submit((req, batch, texts), received)
+        else:
+            batch, keywords, outcome = await analyze_request(req, batch, texts)
 
-        negative_mentions = df[df["label"] == "negative"].to_dict(orient="records")
+        with STAGE_SECONDS.time(endpoint="process_batch", stage="drafts"):
+            negative_mentions = batch.rows_with_label("negative", MAX_SUGGESTED_RESPONSES)
+            drafts = await draft_generator.generate_many(
+                req.brand, [(nm["text"], nm.get("author")) for nm in negative_mentions]
+            )
         suggested_responses = []
-        for nm in negative_mentions[:10]:
-            ai_draft = await generate_response_draft_openai(req.brand, nm["text"], nm.get("author"))
+        for nm, ai_draft in zip(negative_mentions, drafts):
             suggested_responses.append({
                 "mention_id": nm.get("id"),
                 "platform": nm.get("platform"),
                 "text_snippet": (nm["text"][:200] + "...") if len(nm["text"]) > 200 else nm["text"],
                 "draft": ai_draft
             })
+        MENTIONS_PER_SECOND.set(round(received / max(time.perf_counter() - t_start, 1e-9), 2),
+                                endpoint="process_batch")
 
-        return {
+        payload = {
             "status": "ok",
             "data": {
-                "summary": {
-                    "total_mentions": total,
-                    "positive": positive_count,
-                    "neutral": neutral_count,
-                    "negative": negative_count,
-                },
-                "reputation_score": reputation,
+                "summary": outcome["summary"],
+                "reputation_score": outcome["reputation"]["unweighted_score"],
+                "weighted_reputation_score": outcome["reputation"]["score"],
+                "reputation": outcome["reputation"],
                 "trending_keywords": keywords,
-                "alerts": alerts,
+                "alerts": outcome["alerts"],
                 "suggested_responses": suggested_responses
             }
         }
+        if not req.include_mentions:
+            return json_response(payload, accept_encoding)
+
+        def render():
+            # per-mention rows straight from the batch columns; off the event loop (large)
+            payload["data"]["mentions"] = batch.score_rows()
+            return json_response(payload, accept_encoding)
+        return await asyncio.to_thread(run_stage, "process_batch", "serialize", render)
 
     except HTTPException:
         raise
@@ -313,16 +711,172 @@ async def process_batch(req: ProcessRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/process_stream")
+async def process_stream(
+    request: Request,
+    brand: Optional[str] = None,
+    historical_negative_ratio: Optional[float] = None,
+    historical_window_size: Optional[int] = None,
+    dedup: Optional[bool] = None,
+    prescored: bool = False,
+):
+    """
+    Streaming variant of /process_batch for very large uploads.
+    Body: NDJSON (application/x-ndjson), one Mention object per line, optionally sent with
+    chunked transfer encoding; batch-level fields are query parameters.
+    Mentions are validated and scored in chunks of STREAM_CHUNK_SIZE as the body arrives and
+    only running totals are kept, so peak memory is bounded by the chunk size. Dedup applies
+    within each chunk, and keywords always come from the brand's streaming keyword index
+    (the upload's own index when no brand is given).
+    Malformed lines are skipped and reported under "rejected". Like /process_batch, the
+    response is serialized by fast_json and compressed when Accept-Encoding allows it.
+    """
+    accept_encoding = request.headers.get("accept-encoding")
+    use_dedup = DEDUP_MENTIONS if dedup is None else dedup
+    agg = StreamAggregator(max_negative_samples=MAX_SUGGESTED_RESPONSES)
+    keyword_index = get_keyword_index(brand)  # one index for the whole upload
+    chunk: List[Mention] = []
+    record = 0
+    t_start = time.perf_counter()
+    try:
+        async for obj in iter_ndjson(request.stream()):
+            record += 1
+            if isinstance(obj, Exception):
+                agg.reject(record, obj)
+                continue
+            if not isinstance(obj, dict):
+                agg.reject(record, "expected a JSON object per line")
+                continue
+            try:
+                m = Mention(**obj)
+            except ValidationError as e:
+                agg.reject(record, e)
+                continue
+            agg.received += 1
+            if not (m.text or "").strip():
+                agg.empty += 1
+                continue
+            chunk.append(m)
+            if len(chunk) >= STREAM_CHUNK_SIZE:
+                await asyncio.to_thread(score_stream_chunk, brand, chunk, use_dedup, agg, keyword_index, prescored)
+                chunk = []
+        if chunk:
+            await asyncio.to_thread(score_stream_chunk, brand, chunk, use_dedup, agg, keyword_index, prescored)
+            chunk = []
+
+        BATCH_SIZE.observe(agg.received, endpoint="process_stream")
+        MENTIONS_TOTAL.inc(agg.received, endpoint="process_stream", stage="received")
+        if agg.received == 0 and agg.rejected == 0:
+            return json_response({"status": "ok", "message": "no mentions provided", "data": {}}, accept_encoding)
+        if agg.total == 0:
+            raise HTTPException(status_code=400, detail={
+                "message": "No usable mentions in the stream.", "errors": agg.errors,
+            })
+
+        reputation = reputation_report(brand, agg.reputation,
+                                       compute_reputation_score(agg.positive, agg.neutral, agg.negative))
+        alerts = combine_alerts(detect_critical_alerts(
+            agg.positive, agg.neutral, agg.negative, historical_negative_ratio, historical_window_size
+        ), alert_engine.evaluate(brand))
+        keywords = keyword_index.top_k(TOP_K_KEYWORDS)
+        samples = agg.negative_samples
+        with STAGE_SECONDS.time(endpoint="process_stream", stage="drafts"):
+            drafts = await draft_generator.generate_many(brand, [(nm["text"], nm["author"]) for nm in samples])
+        MENTIONS_PER_SECOND.set(round(agg.received / max(time.perf_counter() - t_start, 1e-9), 2),
+                                endpoint="process_stream")
+        suggested_responses = [{
+            "mention_id": nm["id"],
+            "platform": nm["platform"],
+            "text_snippet": (nm["text"][:200] + "...") if len(nm["text"]) > 200 else nm["text"],
+            "draft": draft,
+        } for nm, draft in zip(samples, drafts)]
+
+        payload = {
+            "status": "ok",
+            "data": {
+                "summary": agg.summary(),
+                "reputation_score": reputation["unweighted_score"],
+                "weighted_reputation_score": reputation["score"],
+                "reputation": reputation,
+                "trending_keywords": keywords,
+                "alerts": alerts,
+                "suggested_responses": suggested_responses,
+                "errors": agg.errors,
+            }
+        }
+        return json_response(payload, accept_encoding)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Stream processing failed: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/health")
 def health():
     return {"status": "ok", "component": "sentiment_agent"}
 
 
+@app.get("/ready")
+def ready():
+    """Readiness (models and heavy imports loaded), separate from /health liveness."""
+    body = {"status": "ready" if readiness["ready"] else "starting", **readiness}
+    return JSONResponse(body, status_code=200 if readiness["ready"] else 503)
+
+
+@app.get("/metrics")
+def metrics():
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/profiles/{profile_id}")
+def get_profile(profile_id: str):
+    """Sampling profile of a request sent with X-Profile: 1 (needs PROFILING_ENABLED)."""
+    profile = recent_profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired profile id.")
+    return {"status": "ok", "profile_id": profile_id, **profile}
+
+
+@app.get("/alert_state")
+def alert_state(brand: Optional[str] = None):
+    return {"status": "ok", "brand": brand, "platforms": alert_engine.snapshot(brand)}
+
+
+@app.get("/reputation")
+def get_reputation(brand: Optional[str] = None):
+    """The brand's running weighted reputation (O(1); no mentions are rescanned)."""
+    return {"status": "ok", "brand": brand, "reputation": reputation_engine.score(brand)}
+
+
+@app.get("/mentions/search")
+def search_mentions(brand: Optional[str] = None, q: Optional[str] = None, platform: Optional[List[str]] = Query(None),
+                    sentiment: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None,
+                    limit: int = 50, cursor: Optional[str] = None):
+    """
+    Archived mentions, newest first: full-text `q` (all words), brand / platform /
+    sentiment / date filters. Pass the returned next_cursor to get the following page.
+    """
+    if mention_archive is None:
+        raise HTTPException(status_code=404, detail="The mention archive is disabled (MENTION_ARCHIVE_DB).")
+    try:
+        page = mention_archive.search(brand, q, platform or (), sentiment, start, end, limit, cursor)
+    except (ValueError, sqlite3.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid search: {e}")
+    return {"status": "ok", **page}
+
+
+@app.get("/cache_stats")
+def cache_stats():
+    return {"status": "ok", "sentiment_cache": sentiment_cache.stats(), "drafts": draft_generator.stats()}
+
+
 # ---------------------------
 # Local test + run
 # ---------------------------
 if __name__ == "__main__":
-    import uvicorn, asyncio, json
+    import uvicorn, json
 
     sample = {
         "brand": "TestBrand",
@@ -338,7 +892,7 @@ if __name__ == "__main__":
     async def local_test():
         req = ProcessRequest(**sample)
         res = await process_batch(req)
-        print(json.dumps(res, indent=2))
+        print(json.dumps(json.loads(res.body), indent=2))
 
     print("Starting Sentiment Agent on http://127.0.0.1:8001 ...")
     asyncio.run(local_test())
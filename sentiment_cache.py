@@ -0,0 +1,200 @@
+"""
+Sentiment Cache
+- Bounded cache of VADER scores keyed by a hash of the whitespace-normalized text, so
+  repeated news items / retweets are scored once instead of on every run.
+- LRU eviction in memory, optional TTL, optional SQLite backing store (hits survive
+  restarts and can be shared by the monitoring agent and the sentiment agent).
+- Hit/miss counters are exposed through stats().
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from batch_sentiment import label_compound
+
+SCORE_FIELDS = ("neg", "neu", "pos", "compound")
+
+CACHE_MAX_ENTRIES = int(os.getenv("SENTIMENT_CACHE_SIZE", 100_000))
+CACHE_TTL_SECONDS = float(os.getenv("SENTIMENT_CACHE_TTL", 0)) or None
+CACHE_DB_PATH = os.getenv("SENTIMENT_CACHE_DB", "") or None
+
+_SQL_BATCH = 500
+
+
+def normalize_text(text: str) -> str:
+    # VADER splits on whitespace and is case-sensitive, so collapsing whitespace is the
+    # only normalization that can never change a score.
+    return " ".join(text.split())
+
+
+def text_key(text: str) -> str:
+    return hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class SentimentCache:
+    """
+    LRU (+ optional TTL) cache of (neg, neu, pos, compound) tuples.
+    Thread-safe; the SQLite store, if configured, is written through on every put.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl_seconds: Optional[float] = CACHE_TTL_SECONDS,
+                 db_path: Optional[str] = CACHE_DB_PATH):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self._entries: "OrderedDict[str, Tuple[float, Tuple[float, ...]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._open_db(db_path)
+
+    # ---------- SQLite backing store ----------
+    def _open_db(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sentiment_cache ("
+            "key TEXT PRIMARY KEY, neg REAL, neu REAL, pos REAL, compound REAL, created_at REAL)"
+        )
+        if self.ttl_seconds:
+            self._db.execute("DELETE FROM sentiment_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        self._db.commit()
+
+    def _db_get_many(self, keys: List[str]) -> Dict[str, Tuple[float, Tuple[float, ...]]]:
+        found: Dict[str, Tuple[float, Tuple[float, ...]]] = {}
+        if self._db is None or not keys:
+            return found
+        for i in range(0, len(keys), _SQL_BATCH):
+            chunk = keys[i:i + _SQL_BATCH]
+            rows = self._db.execute(
+                f"SELECT key, neg, neu, pos, compound, created_at FROM sentiment_cache "
+                f"WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            for key, neg, neu, pos, compound, created_at in rows:
+                found[key] = (created_at, (neg, neu, pos, compound))
+        return found
+
+    def _db_put_many(self, items: List[Tuple[str, float, Tuple[float, ...]]]) -> None:
+        if self._db is None or not items:
+            return
+        self._db.executemany(
+            "INSERT OR REPLACE INTO sentiment_cache (key, neg, neu, pos, compound, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            [(key, *scores, created_at) for key, created_at, scores in items],
+        )
+        self._db.commit()
+
+    # ---------- in-memory LRU ----------
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def _remember(self, key: str, created_at: float, scores: Tuple[float, ...]) -> None:
+        self._entries[key] = (created_at, scores)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, Tuple[float, ...]]:
+        """Return {key: scores} for every key that is cached and not expired."""
+        now = time.time()
+        found: Dict[str, Tuple[float, ...]] = {}
+        with self._lock:
+            missing: List[str] = []
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and not self._expired(entry[0], now):
+                    self._entries.move_to_end(key)
+                    found[key] = entry[1]
+                else:
+                    if entry is not None:
+                        del self._entries[key]
+                    missing.append(key)
+            for key, (created_at, scores) in self._db_get_many(missing).items():
+                if not self._expired(created_at, now):
+                    self._remember(key, created_at, scores)
+                    found[key] = scores
+                    self.disk_hits += 1
+        return found
+
+    def put_many(self, items: Dict[str, Tuple[float, ...]]) -> None:
+        now = time.time()
+        with self._lock:
+            for key, scores in items.items():
+                self._remember(key, now, scores)
+            self._db_put_many([(key, now, scores) for key, scores in items.items()])
+
+    def score(self, texts: Sequence[str], score_fn: Callable[[List[str]], Dict[str, np.ndarray]],
+              inclusive: bool = True) -> Dict[str, np.ndarray]:
+        """
+        Score `texts`, calling `score_fn` only for distinct texts that are not cached.
+        Returns the same aligned-array dict as BatchSentimentEngine.score_texts.
+        """
+        keys = [text_key(t) for t in texts]
+        cached = self.get_many(list(dict.fromkeys(keys)))
+
+        miss_texts: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in miss_texts:
+                miss_texts[key] = text
+
+        with self._lock:
+            # in-batch repeats of a missed text are scored once, so they count as hits
+            self.hits += len(keys) - len(miss_texts)
+            self.misses += len(miss_texts)
+
+        if miss_texts:
+            fresh = score_fn(list(miss_texts.values()))
+            columns = [np.asarray(fresh[f], dtype=np.float64).tolist() for f in SCORE_FIELDS]
+            new_items = {key: tuple(col[i] for col in columns) for i, key in enumerate(miss_texts)}
+            self.put_many(new_items)
+            cached.update(new_items)
+
+        table = np.array([cached[k] for k in keys], dtype=np.float64).reshape(len(keys), len(SCORE_FIELDS))
+        result = {field: table[:, i] for i, field in enumerate(SCORE_FIELDS)}
+        result["label"] = label_compound(result["compound"], inclusive=inclusive)
+        return result
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "persistent": self._db is not None,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM sentiment_cache")
+                self._db.commit()
+
+
+_cache: Optional[SentimentCache] = None
+
+
+def get_cache() -> SentimentCache:
+    """Process-wide cache configured from SENTIMENT_CACHE_SIZE / _TTL / _DB."""
+    global _cache
+    if _cache is None:
+        _cache = SentimentCache()
+    return _cache
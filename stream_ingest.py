@@ -0,0 +1,125 @@
+"""
+Streaming Mention Ingestion
+- Splits an NDJSON (one mention object per line) byte stream into lines as it arrives,
+  without buffering the whole body; oversized or malformed lines are counted and skipped.
+- StreamAggregator keeps only running totals for the summary / reputation / alerts (the
+  weighted reputation sums of each chunk are merged into one ReputationTotals) plus a
+  bounded sample of negative mentions for reply drafts, so memory does not grow with the
+  number of mentions in the upload.
+"""
+
+import json
+import os
+from typing import Any, AsyncIterator, Dict, List
+
+import numpy as np
+
+from mention_batch import MentionBatch
+from reputation_engine import ReputationTotals
+
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", 2000))  # mentions scored per chunk
+STREAM_MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", 1 << 20))
+STREAM_MAX_ERRORS = 20  # error details kept for the response
+
+
+class LineTooLong(ValueError):
+    pass
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes], max_line_bytes: int = STREAM_MAX_LINE_BYTES
+                      ) -> AsyncIterator[Any]:
+    """
+    Yield one parsed JSON value per non-blank line of the incoming byte chunks.
+    A line that fails to parse (or exceeds max_line_bytes) yields the exception instead,
+    so the caller can count it and keep reading.
+    """
+    buf = b""
+    skipping = False  # inside an oversized line; drop bytes until its newline
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        lines = (buf + chunk).split(b"\n")
+        buf = lines.pop()  # trailing partial line
+        for line in lines:
+            if skipping:
+                skipping = False
+                continue
+            if len(line) > max_line_bytes:
+                yield LineTooLong(f"line exceeds {max_line_bytes} bytes")
+            elif line.strip():
+                yield _parse_line(line)
+        if len(buf) > max_line_bytes:
+            if not skipping:
+                yield LineTooLong(f"line exceeds {max_line_bytes} bytes")
+            skipping = True
+            buf = b""
+    if buf.strip() and not skipping:
+        yield _parse_line(buf)  # shorter than max_line_bytes (checked above)
+
+
+def _parse_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return e
+
+
+class StreamAggregator:
+    """Running totals over scored chunks; O(1) state apart from the negative sample."""
+
+    def __init__(self, max_negative_samples: int = 10):
+        self.max_negative_samples = max_negative_samples
+        self.received = 0
+        self.empty = 0
+        self.rejected = 0
+        self.duplicates_collapsed = 0
+        self.positive = 0
+        self.neutral = 0
+        self.negative = 0
+        self.compound_sum = 0.0
+        self.chunks = 0
+        self.reputation = ReputationTotals()
+        self.errors: List[Dict[str, Any]] = []
+        self.negative_samples: List[Dict[str, Any]] = []
+
+    def reject(self, record: int, error: Any) -> None:
+        self.rejected += 1
+        if len(self.errors) < STREAM_MAX_ERRORS:
+            self.errors.append({"record": record, "error": str(error)[:200]})
+
+    def add_chunk(self, batch: MentionBatch, received: int, reputation: ReputationTotals) -> None:
+        """
+        Fold one scored MentionBatch (after dedup: `received` rows went in, len(batch) came
+        out) and its weighted reputation sums.
+        """
+        counts = batch.label_counts()
+        self.reputation.merge(reputation)
+        self.chunks += 1
+        self.duplicates_collapsed += received - len(batch)
+        self.positive += counts["positive"]
+        self.neutral += counts["neutral"]
+        self.negative += counts["negative"]
+        self.compound_sum += float(np.sum(batch.compound, dtype=np.float64))
+
+        room = self.max_negative_samples - len(self.negative_samples)
+        if room > 0:
+            for row in batch.rows_with_label("negative", room):
+                self.negative_samples.append({k: row[k] for k in ("id", "platform", "author", "text")})
+
+    @property
+    def total(self) -> int:
+        return self.positive + self.neutral + self.negative
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "total_mentions": self.total,
+            "positive": self.positive,
+            "neutral": self.neutral,
+            "negative": self.negative,
+            "duplicates_collapsed": self.duplicates_collapsed,
+            "received": self.received,
+            "empty": self.empty,
+            "rejected": self.rejected,
+            "mean_compound": round(self.compound_sum / self.total, 4) if self.total else None,
+            "chunks": self.chunks,
+        }
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# the modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# no state files / databases under ./outputs from importing the agents
+for name in ("REPUTATION_STATE_PATH", "ALERT_STATE_PATH", "SENTIMENT_CACHE_DB", "MENTION_ARCHIVE_DB"):
+    os.environ.setdefault(name, "")
@@ -0,0 +1,77 @@
+"""
+BatchSentimentEngine parity with nltk's VADER (the reference sentiment_agent scores with).
+The vaderSentiment package ships a newer lexicon / emoji handling and scores many texts
+differently; run_monitor used to score with it, so the emoji case below pins the switch.
+"""
+
+import pytest
+
+from batch_sentiment import BatchSentimentEngine, load_vader_lexicon
+
+nltk_vader = pytest.importorskip("nltk.sentiment.vader")
+
+CORPUS = [
+    # negation
+    "The new model is not bad at all",
+    "I don't love it",
+    "Never buying from them again",
+    "Not great, not terrible.",
+    # "but" shifts the weight to the second clause
+    "Great car but the service is terrible",
+    "The service was terrible, but the car is GREAT",
+    "I hate the delays but love the design!",
+    # caps emphasis
+    "They are NOT good",
+    "This is AMAZING",
+    # punctuation emphasis
+    "This is amazing",
+    "This is amazing!!!",
+    "Worst support ever!!",
+    "Is it good???",
+    # boosters / dampeners / idioms
+    "Battery life is very good",
+    "The update is kind of okay",
+    "yeah right, best launch ever",
+    # emoji and emoticons
+    "I love it 😍",
+    "Recall again 😡",
+    "Absolutely fantastic launch :)",
+    # edge cases
+    "meh",
+    "",
+    "12345",
+]
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return BatchSentimentEngine(load_vader_lexicon(use_artifact=False))
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+    try:
+        return nltk_vader.SentimentIntensityAnalyzer()
+    except LookupError:
+        pytest.skip("nltk vader_lexicon data not installed")
+
+
+def test_matches_nltk_polarity_scores(engine, analyzer):
+    scores = engine.score_texts(CORPUS)
+    for i, text in enumerate(CORPUS):
+        expected = analyzer.polarity_scores(text)
+        for key in ("neg", "neu", "pos", "compound"):
+            assert float(scores[key][i]) == pytest.approx(expected[key], abs=1e-4), (text, key)
+
+
+def test_reference_is_nltk_not_vadersentiment(engine, analyzer):
+    vs = pytest.importorskip("vaderSentiment.vaderSentiment")
+    text = "I love it 😍"
+    compound = float(engine.score_texts([text])["compound"][0])
+    assert compound == pytest.approx(analyzer.polarity_scores(text)["compound"], abs=1e-4)
+    assert compound != pytest.approx(vs.SentimentIntensityAnalyzer().polarity_scores(text)["compound"], abs=1e-4)
+
+
+def test_labels_follow_compound(engine):
+    scores = engine.score_texts(["This is amazing", "Worst support ever!!", "12345"])
+    assert list(scores["label"]) == ["positive", "negative", "neutral"]
@@ -0,0 +1,70 @@
+"""collectors.collect() time limits and the Collector interface."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+import collectors
+from collectors import Collector, collect
+from rate_limit import SourceLimiter
+
+
+class ListCollector(Collector):
+    """Yields `n` items, `delay` seconds of fetching apart."""
+
+    def __init__(self, name, n, delay=0.0):
+        self.name = name
+        self.n = n
+        self.delay = delay
+
+    async def stream(self, query):
+        for i in range(self.n):
+            await asyncio.sleep(self.delay)
+            yield {"platform": self.name, "text": f"{self.name} item {i}"}
+
+
+def run(sources, **kwargs):
+    kwargs.setdefault("limit", 100)
+    return asyncio.run(collect("Tesla", list(sources), [], 7, sources=sources, **kwargs))
+
+
+def test_collector_requires_stream():
+    with pytest.raises(TypeError):
+        Collector()
+
+
+def test_queue_backpressure_does_not_count_against_source_timeout():
+    # the consumer needs ~0.6s in total, the source itself well under its 0.3s budget
+    items, timings = run({"news": ListCollector("news", 6)}, per_source_timeout=0.3, total_deadline=5,
+                         on_chunk=lambda chunk: time.sleep(0.1), queue_size=1, chunk_size=1)
+    assert timings["news"]["status"] == "ok"
+    assert len(items) == 6
+
+
+def test_slow_source_times_out_with_partial_results():
+    items, timings = run({"news": ListCollector("news", 50, delay=0.05), "reddit": ListCollector("reddit", 3)},
+                         per_source_timeout=0.3, total_deadline=5)
+    assert timings["news"]["status"] == "timeout"
+    assert 0 < timings["news"]["items"] < 50
+    assert timings["reddit"] == dict(timings["reddit"], status="ok", items=3)
+    assert len(items) == timings["news"]["items"] + 3
+
+
+def test_total_deadline_covers_the_whole_call():
+    t0 = time.monotonic()
+    _, timings = run({"news": ListCollector("news", 50, delay=0.05), "reddit": ListCollector("reddit", 50, delay=0.05)},
+                     per_source_timeout=10, total_deadline=0.4)
+    assert time.monotonic() - t0 < 1.0
+    assert {t["status"] for t in timings.values()} == {"timeout"}
+
+
+def test_source_seconds_count_from_its_fetch_start(monkeypatch):
+    limiter = SourceLimiter("news", None, concurrency=1)
+    limiter.slots.acquire()  # another run holds news' only slot for 0.3s
+    threading.Timer(0.3, limiter.slots.release).start()
+    monkeypatch.setattr(collectors, "get_limiter", lambda name: limiter)
+    _, timings = run({"news": ListCollector("news", 3)}, per_source_timeout=5, total_deadline=5)
+    assert timings["news"]["status"] == "ok"
+    assert timings["news"]["seconds"] < 0.2
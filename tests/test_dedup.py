@@ -0,0 +1,32 @@
+"""Near-duplicate clustering: source suffixes, short texts, exact ids."""
+
+from dedup import dedup_items, strip_source_suffix
+
+
+def sizes(items):
+    return [item["cluster_size"] for item in dedup_items(items)]
+
+
+def test_strip_source_suffix():
+    assert strip_source_suffix("Tesla recalls cars over autopilot - BBC News") == "Tesla recalls cars over autopilot"
+    assert strip_source_suffix("Tesla recalls cars | The Verge") == "Tesla recalls cars"
+    assert strip_source_suffix("Recall widens — electrek.co") == "Recall widens"
+    assert strip_source_suffix("Great car - love it") == "Great car - love it"
+
+
+def test_same_story_from_two_outlets_is_one_cluster():
+    story = "Tesla recalls two million cars over autopilot safety concerns"
+    items = [{"text": f"{story} - BBC News", "url": "https://bbc.example/1"},
+             {"text": f"{story} - Reuters", "url": "https://reuters.example/2"},
+             {"text": "Charging network coverage expanded across three new states", "url": "https://x.example/3"}]
+    assert sizes(items) == [2, 1]
+
+
+def test_short_distinct_mentions_are_not_merged():
+    items = [{"text": "Love it!", "id": "1"}, {"text": "Love it?", "id": "2"}, {"text": "love it", "id": "3"}]
+    assert sizes(items) == [1, 1, 1]
+
+
+def test_exact_ids_still_collapse_short_texts():
+    items = [{"text": "Love it!", "id": "1"}, {"text": "Love it!", "id": "1"}]
+    assert sizes(items) == [2]
@@ -0,0 +1,27 @@
+"""fast_json.dumps writes non-finite floats as null with orjson and with the stdlib fallback."""
+
+import json
+
+import numpy as np
+import pytest
+
+import fast_json
+
+PAYLOAD = {"compound": float("nan"), "scores": [0.5, float("inf"), np.float32("nan"), np.array([1.0, np.nan])],
+           "mean": np.float64("-inf"), "label": "neutral"}
+EXPECTED = {"compound": None, "scores": [0.5, None, None, [1.0, None]], "mean": None, "label": "neutral"}
+
+
+def test_stdlib_fallback_writes_null(monkeypatch):
+    monkeypatch.setattr(fast_json, "orjson", None)
+    body = fast_json.dumps(PAYLOAD)
+    assert b"NaN" not in body and b"Infinity" not in body
+    assert json.loads(body) == EXPECTED
+
+
+def test_orjson_and_fallback_agree(monkeypatch):
+    if fast_json.orjson is None:
+        pytest.skip("orjson not installed")
+    fast = fast_json.dumps(PAYLOAD)
+    monkeypatch.setattr(fast_json, "orjson", None)
+    assert fast_json.dumps(PAYLOAD) == fast
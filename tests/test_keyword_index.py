@@ -0,0 +1,38 @@
+"""Per-brand keyword indexes; requests without a brand share nothing."""
+
+import pytest
+
+from keyword_index import KeywordIndex, KeywordIndexRegistry, batch_keywords
+
+
+def keywords(index, k=5):
+    return {row["keyword"] for row in index.top_k(k)}
+
+
+def test_brandless_requests_do_not_share_an_index():
+    registry = KeywordIndexRegistry()
+    first = registry.get(None)
+    first.update(["battery recall announced", "battery recall expands"])
+    second = registry.get("")
+    second.update(["charging station outage"])
+    assert "battery" not in keywords(second)
+    assert registry.get(None).top_k(5) == []
+
+
+def test_brand_index_is_shared_across_requests():
+    registry = KeywordIndexRegistry()
+    registry.get("Tesla").update(["battery recall announced"])
+    assert registry.get(" tesla ") is registry.get("Tesla")
+    assert "battery" in keywords(registry.get("TESLA"))
+
+
+def test_batch_keywords_match_a_fresh_index():
+    texts = ["battery recall announced", "battery recall expands to Europe", "battery fire reported",
+             "charging station outage", "recall notice mailed"]
+    index = KeywordIndex()
+    index.update(texts, now=index.landmark)
+    expected = index.top_k(6, now=index.landmark)
+    got = batch_keywords(texts, 6)
+    assert [row["keyword"] for row in got[:2]] == ["battery", "recall"]
+    assert {row["keyword"] for row in got} == {row["keyword"] for row in expected}
+    assert [row["score"] for row in got] == pytest.approx([row["score"] for row in expected])
@@ -0,0 +1,33 @@
+"""MentionArchive dedup keys and brand filters."""
+
+import pytest
+
+from mention_archive import MentionArchive, mention_key
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return MentionArchive(str(tmp_path / "archive.db"))
+
+
+def row(**kwargs):
+    return dict({"brand": "Tesla", "platform": "twitter", "text": "Battery died again", "date": "2025-01-06"}, **kwargs)
+
+
+def test_same_id_on_different_platforms_is_kept(archive):
+    assert archive.add_rows([row(id="42"), row(id="42", platform="reddit")], "test") == 2
+    assert archive.add_rows([row(id="42")], "test") == 0
+
+
+def test_url_wins_over_id():
+    assert mention_key("Tesla", "https://x/1", "42", "t", "twitter") == mention_key("Tesla", "https://x/1", "7", "u", "reddit")
+    assert mention_key("Tesla", None, "42", "t", "twitter") != mention_key("Tesla", None, "42", "t", "reddit")
+
+
+def test_brand_filter_ignores_case(archive):
+    archive.add_rows([row(id="1"), row(id="2", brand="tesla", date="2025-01-07"), row(id="3", brand="Ford")], "test")
+    assert [m["archive_id"] for m in archive.search("TESLA")["items"]] == [2, 1]
+    assert archive.count("tesla") == 2 and archive.brands() == ["Ford", "Tesla"]
+    plan = archive._db.execute("EXPLAIN QUERY PLAN SELECT id FROM mentions m WHERE m.brand = ? COLLATE NOCASE "
+                               "ORDER BY m.date DESC, m.id DESC", ("tesla",)).fetchall()
+    assert "mentions_brand_nocase_date" in str(plan)
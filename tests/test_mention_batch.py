@@ -0,0 +1,34 @@
+"""MentionBatch.from_mentions with upstream scores and dedup clusters."""
+
+import pandas as pd
+
+from dashboard_cache import prescored_mentions
+from mention_batch import MentionBatch
+from sentiment_agent import Mention, dedup_mentions
+
+
+def test_upstream_cluster_size_is_kept():
+    mentions = [Mention(id="1", text="Recall announced", cluster_size=5, compound=-0.4, label="negative"),
+                Mention(id="2", text="Great launch event"),
+                Mention(id="3", text="   ")]
+    batch, texts = MentionBatch.from_mentions(mentions)
+    assert texts == ["Recall announced", "Great launch event"]
+    assert batch.cluster_size.tolist() == [5, 1]
+
+
+def test_server_dedup_adds_upstream_clusters():
+    mentions = [Mention(id="1", text="Recall announced", cluster_size=3),
+                Mention(id="1", text="Recall announced", cluster_size=2)]
+    batch, texts = dedup_mentions(*MentionBatch.from_mentions(mentions))
+    assert batch.cluster_size.tolist() == [5]
+
+
+def test_dashboard_payload_carries_cluster_size():
+    df = pd.DataFrame({"platform": ["news", "twitter"], "author": ["a", "b"], "text": ["x", "y"],
+                       "date": ["2025-01-06 10:00:00", None], "sentiment_score": [0.5, -0.2],
+                       "sentiment": ["positive", "negative"], "url": ["https://n/1", None],
+                       "engagement": [0, 10], "cluster_engagement": [4.0, 10.0], "cluster_size": [3, 1]})
+    records = prescored_mentions(df)
+    assert [r["cluster_size"] for r in records] == [3, 1]
+    assert [Mention(**r).cluster_size for r in records] == [3, 1]
+    assert records[0]["metadata"] == {"engagement": 4.0, "url": "https://n/1"}
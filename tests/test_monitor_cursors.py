@@ -0,0 +1,53 @@
+"""Incremental cursors: advance, overlap window, filter_new, fetch_days, persistence."""
+
+from datetime import datetime
+
+from collectors import safe_date_str
+from monitor_cursors import CursorStore
+
+
+def news(i, pub_date):
+    return {"platform": "news", "url": f"https://news.example/{i}", "text": f"story {i}",
+            "date": safe_date_str(pub_date)}
+
+
+def test_rss_pub_date_is_normalized():
+    assert safe_date_str("Tue, 14 Oct 2026 10:00:00 GMT") == "2026-10-14 10:00:00"
+    assert safe_date_str("Tue, 14 Oct 2026 12:00:00 +0200") == "2026-10-14 10:00:00"
+    assert safe_date_str("not a date") == "not a date"
+
+
+def test_news_cursor_advances_and_narrows_the_window():
+    store = CursorStore(path=None, overlap=3600)
+    items = [news(1, "Tue, 14 Oct 2026 08:00:00 GMT"), news(2, "Tue, 14 Oct 2026 10:00:00 GMT")]
+    assert store.fetch_days("Tesla", ["news"], [], 7) == 7  # no cursor yet
+    store.advance("Tesla", [], items)
+    assert store.get("Tesla", "news", []).mark == "2026-10-14 10:00:00"
+    now = datetime(2026, 10, 15, 9, 0, 0)
+    assert store.fetch_days("Tesla", ["news"], [], 7, now=now) == 2
+
+
+def test_filter_new_drops_seen_and_old_items_but_keeps_the_overlap():
+    store = CursorStore(path=None, overlap=3600)
+    store.advance("Tesla", ["battery"], [news(1, "Tue, 14 Oct 2026 10:00:00 GMT")])
+    candidates = [
+        news(1, "Tue, 14 Oct 2026 10:00:00 GMT"),   # same key: seen
+        news(2, "Tue, 14 Oct 2026 09:30:00 GMT"),   # late-indexed, inside the 1h overlap
+        news(3, "Tue, 14 Oct 2026 08:00:00 GMT"),   # older than mark - overlap
+        news(4, "Tue, 14 Oct 2026 11:00:00 GMT"),   # newer
+        dict(news(5, ""), date=""),                  # undated: kept
+    ]
+    kept = store.filter_new("tesla ", ["Battery"], candidates)
+    assert [item["url"].rsplit("/", 1)[1] for item in kept] == ["2", "4", "5"]
+    # other keywords / brands have their own cursors
+    assert len(store.filter_new("Tesla", ["recall"], candidates)) == len(candidates)
+
+
+def test_cursors_survive_a_restart(tmp_path):
+    path = str(tmp_path / "cursors.json")
+    store = CursorStore(path=path)
+    store.advance("Tesla", [], [news(1, "Tue, 14 Oct 2026 10:00:00 GMT")])
+    store.save()
+    reloaded = CursorStore(path=path)
+    assert reloaded.get("Tesla", "news", []).mark == "2026-10-14 10:00:00"
+    assert reloaded.filter_new("Tesla", [], [news(1, "Tue, 14 Oct 2026 10:00:00 GMT")]) == []
@@ -0,0 +1,102 @@
+"""run_multi_monitor with stub sources: duplicate brand configs, routing, incremental runs, deadlines."""
+
+import importlib
+import threading
+import time
+
+import pytest
+
+from collectors import Collector, iterate_in_thread
+from monitor_cursors import CursorStore
+from rate_limit import get_limiter
+
+
+def news_source(brand, keywords, days, limit):
+    brands = [brand] if isinstance(brand, str) else brand
+    return [{"platform": "news", "author": "outlet", "url": f"https://news.example/{b.lower()}/{i}",
+             "text": f"{b} story number {i} about the new model launch and its reception",
+             "date": "2026-10-14 10:00:00", "engagement": 0, "collected_at": "2026-10-14 10:05:00"}
+            for b in brands for i in range(3)][:limit]
+
+
+@pytest.fixture
+def multi(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # monitoring_agent_v3 creates ./outputs on import
+    module = importlib.import_module("multi_monitor")
+    cursors = CursorStore(path=None)
+    monkeypatch.setattr(module, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(module, "OUTPUT_FORMAT", "csv")
+    monkeypatch.setattr(module, "archive_run", lambda *args: None)
+    monkeypatch.setattr(module, "get_cursor_store", lambda: cursors)
+    return module
+
+
+def run(multi, configs, **kwargs):
+    out = {}
+
+    def target():
+        out["result"] = multi.run_multi_monitor(configs, sources={"news": news_source}, mergeable=["news"],
+                                                incremental=True, **kwargs)
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout=30)
+    assert not thread.is_alive(), "run_multi_monitor hung"
+    return out["result"]
+
+
+def test_merge_brand_configs(multi):
+    merged = multi.merge_brand_configs([
+        {"brand": "Tesla", "keywords": ["battery"], "platforms": ["news"]},
+        {"brand": " tesla ", "keywords": ["battery", "autopilot"], "platforms": ["reddit"]},
+        {"brand": "Ford", "keywords": [], "platforms": ["news"]},
+    ])
+    assert merged == [{"brand": "Tesla", "keywords": ["battery", "autopilot"], "platforms": ["news", "reddit"]},
+                      {"brand": "Ford", "keywords": [], "platforms": ["news"]}]
+
+
+def test_brands_differing_by_case_do_not_deadlock(multi):
+    configs = [{"brand": "Tesla", "keywords": [], "platforms": ["news"]},
+               {"brand": "tesla", "keywords": [], "platforms": ["news"]},
+               {"brand": "Ford", "keywords": [], "platforms": ["news"]}]
+    result = run(multi, configs)
+    assert set(result["brands"]) == {"Tesla", "Ford"}
+    assert result["brands"]["Tesla"]["new"] == 3 and result["brands"]["Ford"]["new"] == 3
+
+    again = run(multi, configs)  # cursors advanced: nothing new
+    assert again["run_id"] is None
+    assert {s["new"] for s in again["brands"].values()} == {0}
+
+
+class EndlessCollector(Collector):
+    """A blocking reader that never finishes (one item every 20 ms)."""
+
+    def __init__(self):
+        self.produced = 0
+
+    def _read(self):
+        while True:
+            time.sleep(0.02)
+            self.produced += 1
+            yield {"platform": "slowfeed", "text": f"Tesla item {self.produced}"}
+
+    async def stream(self, query):
+        async for item in iterate_in_thread(self._read, buffer=1):
+            yield item
+
+
+def test_deadline_cancels_running_fetches(multi):
+    slow = EndlessCollector()
+    tasks = [multi.FetchTask("slowfeed", ["Tesla"], [], 7, 10 ** 6), multi.FetchTask("fastfeed", ["Ford"], [], 7, 10)]
+    t0 = time.monotonic()
+    results, timings = multi.run_fetches(tasks, {"slowfeed": slow, "fastfeed": news_source},
+                                         per_source_timeout=10, total_deadline=0.3)
+    assert time.monotonic() - t0 < 1.0
+    assert timings["slowfeed"]["timeout"] == 1 and timings["fastfeed"]["ok"] == 1
+    assert [task.source for task, _ in results] == ["slowfeed", "fastfeed"]
+    assert results[0][1] and len(results[1][1]) == 3  # the timed-out fetch keeps what it delivered
+    limiter = get_limiter("slowfeed")
+    assert limiter.slots._value == limiter.slots._initial_value  # slot given back
+    produced = slow.produced
+    time.sleep(0.2)
+    assert slow.produced <= produced + 1  # reader thread stopped
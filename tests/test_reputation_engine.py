@@ -0,0 +1,35 @@
+"""Recency weighting of news mentions (RSS pubDate) in the reputation engine."""
+
+import calendar
+from datetime import datetime
+
+import numpy as np
+
+from collectors import safe_date_str
+from mention_batch import MentionBatch
+from reputation_engine import DEN, ReputationTotals, parse_timestamps
+from sentiment_agent import Mention
+
+NOW = calendar.timegm((2026, 10, 14, 10, 0, 0))
+
+
+def test_rfc822_dates_parse_as_utc():
+    stamps = parse_timestamps(["Tue, 14 Oct 2026 12:00:00 +0200", "2026-10-14 10:00:00", "junk", None])
+    assert stamps[:2].tolist() == [NOW, NOW]
+    assert np.isnan(stamps[2:]).all()
+
+
+def test_old_news_mentions_decay():
+    week_old = "Tue, 07 Oct 2026 10:00:00 GMT"
+    current = "Tue, 14 Oct 2026 10:00:00 GMT"
+
+    def weight(created_at):
+        batch, _ = MentionBatch.from_mentions([Mention(id="1", platform="news", text="Recall announced",
+                                                       created_at=created_at, compound=-0.5)])
+        return ReputationTotals.from_batch(batch, NOW, half_life=72 * 3600).sums[DEN]
+
+    # as collected (normalized by safe_date_str) and as a raw pubDate
+    assert safe_date_str(week_old) == "2026-10-07 10:00:00"
+    for old, new in ((safe_date_str(week_old), safe_date_str(current)), (week_old, current)):
+        assert weight(new) == 1.0
+        assert weight(old) < 0.2
@@ -0,0 +1,128 @@
+"""MicroBatcher grouping, error fan-out and shutdown; coalesced /process_batch work."""
+
+import asyncio
+import threading
+
+import pytest
+
+from mention_batch import MentionBatch
+from request_coalescer import MicroBatcher
+
+
+def double_all(items):
+    return [item * 2 for item in items]
+
+
+def test_concurrent_submits_match_direct_results():
+    groups = []
+
+    def handler(items):
+        groups.append(list(items))
+        return double_all(items)
+
+    async def scenario():
+        batcher = MicroBatcher("test", handler, max_size=100, window=0.05)
+        return await asyncio.gather(*(batcher.submit(i) for i in range(20))), batcher
+
+    results, batcher = asyncio.run(scenario())
+    assert results == double_all(list(range(20)))
+    assert groups == [list(range(20))] and batcher.stats()["groups"] == 1
+
+
+def test_max_size_splits_groups_in_order():
+    groups = []
+
+    def handler(items):
+        groups.append(list(items))
+        return double_all(items)
+
+    async def scenario():
+        batcher = MicroBatcher("test", handler, max_size=5, window=0.05)
+        return await asyncio.gather(*(batcher.submit(i, size=2) for i in range(6)))
+
+    assert asyncio.run(scenario()) == double_all(list(range(6)))
+    assert groups == [[0, 1], [2, 3], [4, 5]]  # 2 + 2 units fit, a third item would be 6 > 5
+
+
+def test_errors_fan_out():
+    def per_item(items):
+        return [ValueError(f"bad {i}") if i % 2 else i for i in items]
+
+    def broken(items):
+        raise RuntimeError("handler failed")
+
+    async def scenario(handler, n):
+        batcher = MicroBatcher("test", handler, max_size=100, window=0.01)
+        return await asyncio.gather(*(batcher.submit(i) for i in range(n)), return_exceptions=True)
+
+    results = asyncio.run(scenario(per_item, 4))
+    assert results[0] == 0 and results[2] == 2
+    assert [str(r) for r in results[1::2]] == ["bad 1", "bad 3"]
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(scenario(broken, 3)))
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(scenario(lambda items: [1], 3)))
+
+
+def test_cancelled_caller_is_dropped():
+    seen = []
+
+    def handler(items):
+        seen.extend(items)
+        return double_all(items)
+
+    async def scenario():
+        batcher = MicroBatcher("test", handler, max_size=100, window=0.05)
+        gone = asyncio.ensure_future(batcher.submit(1))
+        kept = asyncio.ensure_future(batcher.submit(2))
+        await asyncio.sleep(0)
+        gone.cancel()
+        return await kept
+
+    assert asyncio.run(scenario()) == 4
+    assert seen == [2]
+
+
+def test_cancelled_worker_fails_waiting_callers():
+    release = threading.Event()
+
+    def handler(items):
+        release.wait(5)
+        return double_all(items)
+
+    async def scenario():
+        batcher = MicroBatcher("test", handler, max_size=1, window=0)
+        callers = [asyncio.ensure_future(batcher.submit(i)) for i in range(3)]
+        await asyncio.sleep(0.05)  # first group is in the handler, the others are queued
+        batcher._worker.cancel()
+        results = await asyncio.wait_for(asyncio.gather(*callers, return_exceptions=True), 5)
+        release.set()
+        return results, batcher.stats()
+
+    results, stats = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert stats["pending"] == 0
+
+
+def test_coalesced_requests_match_handling_each_alone():
+    sentiment_agent = pytest.importorskip("sentiment_agent")
+    texts = [["I love this car", "Terrible service"], ["Awful battery", "Great launch event", "Meh"],
+             ["Support fixed it quickly"], ["Recall announced", "Recall announced", "Love it"]]
+
+    def request(prefix, i, mentions):
+        req = sentiment_agent.ProcessRequest(
+            brand=f"{prefix}-{i}", dedup=True,
+            mentions=[sentiment_agent.Mention(id=str(j), platform="twitter", text=t) for j, t in enumerate(mentions)])
+        return (req, *MentionBatch.from_mentions(req.mentions))
+
+    def view(result):
+        batch, keywords, outcome = result
+        # keyword scores decay with wall-clock time; their ranking must match
+        return batch.compound.tolist(), batch.cluster_size.tolist(), [k["keyword"] for k in keywords], \
+            outcome["summary"], outcome["reputation"]["score"], outcome["reputation"]["unweighted_score"]
+
+    async def coalesced():
+        batcher = MicroBatcher("test", sentiment_agent.process_small_requests, max_size=100, window=0.05)
+        return await asyncio.gather(*(batcher.submit(request("grouped", i, t), len(t)) for i, t in enumerate(texts)))
+
+    grouped = asyncio.run(coalesced())
+    alone = [sentiment_agent.process_small_requests([request("alone", i, t)])[0] for i, t in enumerate(texts)]
+    assert [view(r) for r in grouped] == [view(r) for r in alone]
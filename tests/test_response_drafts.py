@@ -0,0 +1,96 @@
+"""DraftGenerator with an injected fake LLM: deadline fallback, in-flight sharing, LRU cache."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from response_drafts import DraftGenerator
+
+
+def template(text):
+    return f"template: {text}"
+
+
+class FakeLLM:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, brand, text, author):
+        with self._lock:
+            self.calls.append(text)
+        time.sleep(self.delay)
+        return f"draft: {text}"
+
+
+@pytest.fixture
+def make_generator():
+    generators = []
+
+    def make(llm, **kwargs):
+        generator = DraftGenerator(llm, template, **kwargs)
+        generators.append(generator)
+        return generator
+
+    yield make
+    for generator in generators:
+        generator.shutdown()
+
+
+def test_deadline_returns_template(make_generator):
+    generator = make_generator(FakeLLM(delay=1.0), timeout=0.05)
+    t0 = time.perf_counter()
+    draft = asyncio.run(generator.generate("Tesla", "The car broke down"))
+    assert draft == template("The car broke down")
+    assert time.perf_counter() - t0 < 0.5
+    assert generator.stats()["timeouts"] == 1
+    assert generator.stats()["fallback"] == 1
+
+
+def test_llm_error_returns_template(make_generator):
+    def broken(brand, text, author):
+        raise RuntimeError("rate limited")
+
+    generator = make_generator(broken)
+    assert asyncio.run(generator.generate("Tesla", "Terrible support")) == template("Terrible support")
+    assert generator.stats()["errors"] == 1
+
+
+def test_identical_inflight_prompts_share_one_call(make_generator):
+    llm = FakeLLM(delay=0.2)
+    generator = make_generator(llm, concurrency=4)
+    mentions = [("Battery died  on the highway", None), ("battery died on the highway", "a"),
+                ("Battery died on the highway", "b"), ("Screen froze", None)]
+    drafts = asyncio.run(generator.generate_many("Tesla", mentions))
+    assert sorted(llm.calls) == ["Battery died  on the highway", "Screen froze"]
+    assert drafts[:3] == ["draft: Battery died  on the highway"] * 3
+    assert drafts[3] == "draft: Screen froze"
+    assert generator.stats()["llm"] == 2
+
+
+def test_cache_hit_and_lru_eviction(make_generator):
+    llm = FakeLLM()
+    generator = make_generator(llm, cache_size=2)
+
+    async def scenario():
+        await generator.generate("Tesla", "one")
+        await generator.generate("Tesla", "two")
+        await generator.generate("Tesla", "one")    # hit; "one" becomes most recent
+        await generator.generate("Tesla", "three")  # evicts "two"
+        await generator.generate("Tesla", "one")    # still cached
+        await generator.generate("Tesla", "two")    # evicted, calls the LLM again
+        await generator.generate("Ford", "one")     # brand is part of the key
+
+    asyncio.run(scenario())
+    assert llm.calls == ["one", "two", "three", "two", "one"]
+    assert generator.stats()["cached"] == 2
+    assert generator.stats()["cache_entries"] == 2
+
+
+def test_no_llm_uses_template(make_generator):
+    generator = make_generator(None)
+    assert asyncio.run(generator.generate("Tesla", "hello")) == template("hello")
+    assert generator.stats()["fallback"] == 1
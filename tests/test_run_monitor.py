@@ -0,0 +1,85 @@
+"""
+run_monitor(..., sources=) with stub sources: every source answers, one source times out
+(what it delivered before the timeout and the other sources' items are kept), one raises.
+"""
+
+import asyncio
+import importlib
+
+import pandas as pd
+import pytest
+
+from collectors import Collector
+
+PHRASES = ["battery range keeps improving", "service centre wait was far too long",
+           "autopilot update rolled out smoothly", "charging network coverage expanded again",
+           "paint quality issues reported by owners", "resale value holding up well",
+           "delivery delayed for the third time", "new showroom opened downtown today",
+           "software glitch locked drivers out", "record quarterly deliveries announced",
+           "insurance costs are climbing fast", "loved the test drive experience"]
+OFFSETS = {"news": 0, "reddit": 4, "twitter": 8}  # distinct texts per source, so dedup keeps them all
+
+
+def items(source, n):
+    return [{"platform": source, "author": f"{source}-user{i}", "url": f"https://{source}.example/{i}",
+             "text": PHRASES[(OFFSETS[source] + i) % len(PHRASES)], "date": "2025-01-06 10:00:00",
+             "engagement": i, "brand": "Tesla", "collected_at": "2025-01-06 10:05:00"}
+            for i in range(n)]
+
+
+def ok_source(name):
+    return lambda brand, keywords, days, limit: items(name, limit)
+
+
+def failing_source(brand, keywords, days, limit):
+    raise RuntimeError("upstream 503")
+
+
+class StallingCollector(Collector):
+    """Delivers one page, then hangs past any timeout."""
+
+    def __init__(self, name, n):
+        self.name = name
+        self.n = n
+
+    async def stream(self, query):
+        yield items(self.name, self.n)
+        await asyncio.sleep(60)
+
+
+@pytest.fixture
+def monitor(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # the module creates ./outputs on import
+    module = importlib.import_module("monitoring_agent_v3")
+    monkeypatch.setattr(module, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(module, "OUTPUT_FORMAT", "csv")
+    monkeypatch.setattr(module, "get_archive", lambda: None)
+    return module
+
+
+def run(monitor, sources, **kwargs):
+    path = monitor.run_monitor("Tesla", list(sources), [], days=7, limit_per_platform=4, sources=sources,
+                               incremental=False, **kwargs)
+    return None if path is None else pd.read_csv(path)
+
+
+def test_all_sources_ok(monitor):
+    df = run(monitor, {"news": ok_source("news"), "reddit": ok_source("reddit")})
+    assert len(df) == 8
+    assert df["platform"].value_counts().to_dict() == {"news": 4, "reddit": 4}
+    assert df["sentiment"].isin(["positive", "negative", "neutral"]).all()
+
+
+def test_timed_out_source_keeps_partial_results(monitor):
+    sources = {"news": ok_source("news"), "twitter": StallingCollector("twitter", 2)}
+    df = run(monitor, sources, per_source_timeout=0.5, total_deadline=5)
+    assert df["platform"].value_counts().to_dict() == {"news": 4, "twitter": 2}
+
+
+def test_failing_source_does_not_sink_the_run(monitor):
+    df = run(monitor, {"news": ok_source("news"), "reddit": failing_source})
+    assert df["platform"].value_counts().to_dict() == {"news": 4}
+
+
+def test_no_items_returns_none(monitor):
+    assert run(monitor, {"reddit": failing_source}) is None
@@ -0,0 +1,52 @@
+"""/process_batch end to end through FastAPI's test client."""
+
+import pytest
+
+fastapi_testclient = pytest.importorskip("fastapi.testclient")
+
+import sentiment_agent  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def client():
+    return fastapi_testclient.TestClient(sentiment_agent.app)
+
+
+def mentions(texts):
+    return [{"id": str(i), "platform": "twitter", "text": t} for i, t in enumerate(texts)]
+
+
+def test_negative_spike_is_reported_once(client):
+    texts = [f"Terrible service, awful experience number {i}" for i in range(12)]
+    resp = client.post("/process_batch", json={"brand": "alert-test-brand", "mentions": mentions(texts)})
+    assert resp.status_code == 200
+    types = [a["type"] for a in resp.json()["data"]["alerts"]]
+    assert types.count("rolling_negative_ratio") + types.count("high_negative_ratio") == 1
+
+
+def test_dedup_is_opt_in(client):
+    texts = ["I love this car"] * 3
+    data = client.post("/process_batch", json={"mentions": mentions(texts)}).json()["data"]
+    assert data["summary"]["total_mentions"] == 3
+    body = {"mentions": [dict(m, id="same") for m in mentions(texts)], "dedup": True}
+    data = client.post("/process_batch", json=body).json()["data"]
+    assert data["summary"]["total_mentions"] == 1 and data["summary"]["duplicates_collapsed"] == 2
+
+
+def test_reputation_score_stays_count_based(client):
+    texts = ["I love this car", "Terrible service", "It arrived on Tuesday"]
+    data = client.post("/process_batch", json={"mentions": mentions(texts)}).json()["data"]
+    counts = data["summary"]
+    assert data["reputation_score"] == sentiment_agent.compute_reputation_score(
+        counts["positive"], counts["neutral"], counts["negative"])
+    assert data["weighted_reputation_score"] == data["reputation"]["score"]
+
+
+def test_lifespan_runs_startup_and_shutdown(monkeypatch):
+    calls = []
+    for name in ("start_parallel_scorer", "start_warm_up", "stop_parallel_scorer"):
+        monkeypatch.setattr(sentiment_agent, name, lambda name=name: calls.append(name))
+    with fastapi_testclient.TestClient(sentiment_agent.app) as client:
+        assert calls == ["start_parallel_scorer", "start_warm_up"]
+        assert client.get("/health").status_code == 200
+    assert calls[-1] == "stop_parallel_scorer"
@@ -0,0 +1,43 @@
+"""iter_ndjson line splitting and the max_line_bytes limit."""
+
+import asyncio
+import json
+
+from stream_ingest import LineTooLong, iter_ndjson
+
+
+async def chunked(data, size):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def parse(data, size, max_line_bytes=64):
+    async def run():
+        return [obj async for obj in iter_ndjson(chunked(data, size), max_line_bytes=max_line_bytes)]
+    return asyncio.run(run())
+
+
+def test_lines_across_chunk_boundaries():
+    lines = [{"id": str(i), "text": f"mention {i}"} for i in range(5)]
+    data = b"\n".join(json.dumps(x).encode() for x in lines) + b"\n\n"
+    for size in (1, 7, len(data)):
+        assert parse(data, size) == lines
+
+
+def test_oversized_line_inside_one_chunk_is_rejected():
+    data = b'{"id": "1"}\n{"text": "' + b"x" * 100 + b'"}\n{"id": "2"}\n'
+    out = parse(data, len(data))
+    assert out[0] == {"id": "1"} and out[2] == {"id": "2"}
+    assert isinstance(out[1], LineTooLong)
+
+
+def test_oversized_line_spanning_chunks_is_rejected_once():
+    data = b'{"id": "1"}\n{"text": "' + b"x" * 300 + b'"}\n{"id": "2"}'
+    out = parse(data, 16)
+    assert out[0] == {"id": "1"} and out[-1] == {"id": "2"}
+    assert sum(isinstance(o, LineTooLong) for o in out) == 1 and len(out) == 3
+
+
+def test_malformed_line_yields_the_error():
+    out = parse(b'{"id": "1"}\nnot json\n', 4)
+    assert out[0] == {"id": "1"} and isinstance(out[1], ValueError)